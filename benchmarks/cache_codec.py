@@ -0,0 +1,80 @@
+"""Size and encode/decode time of cached films in the pre-codec format against cache codecs
+
+Run from the repository root:
+
+    PYTHONPATH=movies_api:etl python -m benchmarks.cache_codec
+"""
+
+import timeit
+from typing import Any, Callable
+
+import orjson
+
+from benchmarks.catalogue import load_catalogue
+from movies_api.models.film import Film
+from movies_api.services.codec import Codec
+from movies_api.services.film import FilmService
+
+PAGE_SIZE = 100
+REPEAT = 20
+
+CODECS = {
+    'json': Codec('json'),
+    'json+zstd': Codec('json', 'zstd', min_compress_size=1024),
+    'msgpack': Codec('msgpack'),
+    'msgpack+zlib': Codec('msgpack', 'zlib', min_compress_size=1024),
+    'msgpack+lz4': Codec('msgpack', 'lz4', min_compress_size=1024),
+    'msgpack+zstd': Codec('msgpack', 'zstd', min_compress_size=1024),
+}
+
+
+def measure(encode: Callable[[Any], bytes], decode: Callable[[bytes], Any], items: list[Any]) -> tuple[float, ...]:
+    values = [encode(item) for item in items]
+    encode_time = timeit.timeit(lambda: [encode(item) for item in items], number=REPEAT) / REPEAT / len(items)
+    decode_time = timeit.timeit(lambda: [decode(value) for value in values], number=REPEAT) / REPEAT / len(items)
+    return sum(map(len, values)) / len(values), encode_time * 1e6, decode_time * 1e6
+
+
+def report(title: str, rows: dict[str, tuple[float, ...]]):
+    print(f'\n{title}')
+    print(f'{"format":<24}{"bytes":>10}{"encode, us":>14}{"decode, us":>14}')
+    for name, (size, encode_time, decode_time) in rows.items():
+        print(f'{name:<24}{size:>10.0f}{encode_time:>14.1f}{decode_time:>14.1f}')
+
+
+def main():
+    films = [Film.model_validate(doc) for doc in load_catalogue()['movies']]
+    pages = [films[start : start + PAGE_SIZE] for start in range(0, len(films), PAGE_SIZE)]
+
+    details = {
+        'current (model json)': measure(Film.model_dump_json, Film.model_validate_json, films),
+    }
+    for name, codec in CODECS.items():
+        details[name] = measure(
+            lambda film, codec=codec: codec.encode(film.model_dump()),
+            lambda value, codec=codec: Film.model_validate(codec.decode(value)),
+            films,
+        )
+    report(f'film details, {len(films)} films', details)
+
+    lists = {
+        'current (orjson list)': measure(
+            lambda page: orjson.dumps([film.model_dump() for film in page]),
+            lambda value: [Film.model_validate(film) for film in orjson.loads(value)],
+            pages,
+        ),
+    }
+    for projection in (None, FilmService.list_fields):
+        for name, codec in CODECS.items():
+            lists[f'{name}{"+projection" if projection else ""}'] = measure(
+                lambda page, codec=codec, projection=projection: codec.encode(
+                    [film.model_dump(include=projection) for film in page]
+                ),
+                lambda value, codec=codec: [Film.model_validate(film) for film in codec.decode(value)],
+                pages,
+            )
+    report(f'film list pages, {PAGE_SIZE} films each', lists)
+
+
+if __name__ == '__main__':
+    main()
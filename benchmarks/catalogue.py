@@ -0,0 +1,56 @@
+import glob
+import os
+import sqlite3
+from collections import defaultdict
+from typing import Any
+
+import orjson
+
+from etl.transform import transform_film, transform_genre, transform_person
+
+DUMP_PATH = 'dump.sql'
+
+
+def load_catalogue(path: str = DUMP_PATH) -> dict[str, list[dict[str, Any]]]:
+    """Builds movies, genres and persons documents from dump.sql the way the ETL does, without Postgres"""
+    connection = sqlite3.connect(':memory:')
+    connection.row_factory = sqlite3.Row
+    with open(path) as f:
+        connection.executescript(f.read())
+
+    films = {row['id']: {**row, 'persons': [], 'genres': []} for row in connection.execute('SELECT * FROM film_work')}
+    for row in connection.execute(
+        'SELECT pfw.film_work_id, pfw.role, p.id, p.full_name '
+        'FROM person_film_work pfw JOIN person p ON p.id = pfw.person_id'
+    ):
+        films[row['film_work_id']]['persons'].append(
+            {'role': row['role'], 'id': row['id'], 'full_name': row['full_name']}
+        )
+    for row in connection.execute(
+        'SELECT gfw.film_work_id, g.name FROM genre_film_work gfw JOIN genre g ON g.id = gfw.genre_id'
+    ):
+        films[row['film_work_id']]['genres'].append(row['name'])
+
+    roles = defaultdict(lambda: defaultdict(list))
+    for row in connection.execute('SELECT person_id, film_work_id, role FROM person_film_work ORDER BY role'):
+        roles[row['person_id']][row['film_work_id']].append(row['role'])
+    persons = [
+        {**row, 'films': [{'id': film, 'roles': film_roles} for film, film_roles in roles[row['id']].items()]}
+        for row in connection.execute('SELECT * FROM person')
+    ]
+
+    return {
+        'movies': [transform_film(film) for film in films.values()],
+        'genres': [transform_genre(dict(row)) for row in connection.execute('SELECT * FROM genre')],
+        'persons': [transform_person(person) for person in persons],
+    }
+
+
+def load_bulk(directory: str) -> dict[str, list[dict[str, Any]]]:
+    """Documents of the NDJSON bulk files written by benchmarks.synthetic_catalogue, by index"""
+    catalogue = defaultdict(list)
+    for path in sorted(glob.glob(os.path.join(directory, '*.ndjson'))):
+        with open(path, 'rb') as f:
+            for action, doc in zip(f, f):
+                catalogue[orjson.loads(action)['index']['_index']].append(orjson.loads(doc))
+    return catalogue
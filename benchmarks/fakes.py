@@ -0,0 +1,253 @@
+"""In-process stand-in of Elasticsearch serving a catalogue, for running the API without services
+
+Evaluates the subset of the query DSL the services build: bool, match, term, terms, nested and match_all
+queries, sort with search_after, from/size, _source filtering, terms, nested and top_hits aggregations,
+completion suggestions and points in time. Matching is a linear scan, results are memoized by the request body,
+so the fake costs the replayed app once per distinct query.
+"""
+
+import asyncio
+import itertools
+import time
+from collections import Counter
+from typing import Any, Callable, Iterable
+
+import orjson
+from elastic_transport import ApiResponseMeta, HttpHeaders, NodeConfig
+from elasticsearch import NotFoundError
+
+Doc = dict[str, Any]
+
+# keyword subfields of text fields
+RAW_SUFFIX = '.raw'
+
+
+def _not_found(index: str, id: str) -> NotFoundError:
+    meta = ApiResponseMeta(404, '1.1', HttpHeaders(), 0.0, NodeConfig('http', 'localhost', 9200))
+    return NotFoundError('not_found', meta, {'_index': index, '_id': id, 'found': False})
+
+
+def _values(doc: Doc, field: str) -> list[Any]:
+    value = doc.get(field.removesuffix(RAW_SUFFIX))
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+def _words(text: Any) -> set[str]:
+    return set(f'{text}'.lower().split())
+
+
+def _matches(query: dict[str, Any], doc: Doc, prefix: str = '') -> bool:
+    """Whether `doc` matches `query`, fields of nested documents are prefixed by their `prefix` path"""
+    (kind, clause), *_ = query.items()
+    if kind == 'match_all':
+        return True
+    if kind == 'bool':
+        must = [*clause.get('must', ()), *clause.get('filter', ())]
+        should = clause.get('should', ())
+        minimum = clause.get('minimum_should_match', 0 if must else 1)
+        return all(_matches(q, doc, prefix) for q in must) and (
+            not should or sum(_matches(q, doc, prefix) for q in should) >= minimum
+        )
+    if kind == 'nested':
+        path = clause['path'].removeprefix(prefix)
+        return any(_matches(clause['query'], nested, f'{clause["path"]}.') for nested in doc.get(path) or ())
+
+    (field, value), *_ = clause.items()
+    values = _values(doc, field.removeprefix(prefix))
+    if kind == 'term':
+        return value in values
+    if kind == 'terms':
+        return any(v in values for v in value)
+    if kind == 'match':
+        text, operator = (value['query'], value.get('operator', 'or')) if isinstance(value, dict) else (value, 'or')
+        words, found = _words(text), set().union(*map(_words, values))
+        return words <= found if operator == 'and' else bool(words & found)
+    raise ValueError(f'unsupported query {kind}')
+
+
+def _source(doc: Doc, fields: list[str] | dict[str, list[str]] | None, prefix: str = '') -> Doc:
+    if fields is None:
+        return doc
+    if isinstance(fields, dict):
+        excludes = {f.removeprefix(prefix) for f in fields.get('excludes', ())}
+        return {field: value for field, value in doc.items() if field not in excludes}
+    return {field: doc[field] for f in fields if (field := f.removeprefix(prefix)) in doc}
+
+
+def _source_param(kwargs: dict[str, Any]) -> list[str] | dict[str, list[str]] | None:
+    """`_source` filter of the get and mget parameters"""
+    if excludes := kwargs.get('_source_excludes'):
+        return {'excludes': [excludes] if isinstance(excludes, str) else excludes}
+    return kwargs.get('_source')
+
+
+def _sort_value(doc: Doc, field: str, reverse: bool) -> Any:
+    """Sort value of the hit, missing values are sent as infinities sorted last like missing numbers are"""
+    if (value := doc.get(field)) is None:
+        return '-Infinity' if reverse else 'Infinity'
+    return value
+
+
+def _comparable(value: Any) -> Any:
+    return float(value) if value in ('Infinity', '-Infinity') else value
+
+
+class FakeElastic:
+    """Async Elasticsearch client answering from `indexes` of documents by id
+
+    Every request waits `latency` seconds first, a stand-in for the network and the cluster. `calls` counts
+    requests by method.
+    """
+
+    def __init__(self, indexes: dict[str, Iterable[Doc]], latency: float = 0.0):
+        self.indexes = {index: {doc['id']: doc for doc in docs} for index, docs in indexes.items()}
+        self.latency = latency
+        self.calls = Counter()
+        self._pits: dict[str, str] = {}
+        self._pit_ids = itertools.count()
+        self._results: dict[bytes, dict[str, Any]] = {}
+
+    async def _request(self, method: str):
+        self.calls[method] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    async def get(self, index: str, id: str, **kwargs) -> dict[str, Any]:
+        await self._request('get')
+        if (doc := self.indexes[index].get(id)) is None:
+            raise _not_found(index, id)
+        return {'_index': index, '_id': id, 'found': True, '_source': _source(doc, _source_param(kwargs))}
+
+    async def mget(self, index: str, ids: list[str], **kwargs) -> dict[str, Any]:
+        await self._request('mget')
+        docs, source = self.indexes[index], _source_param(kwargs)
+        return {
+            'docs': [
+                {'_index': index, '_id': id, 'found': True, '_source': _source(docs[id], source)}
+                if id in docs
+                else {'_index': index, '_id': id, 'found': False}
+                for id in ids
+            ]
+        }
+
+    async def search(self, index: str | None = None, body: dict[str, Any] | None = None, **kwargs) -> dict[str, Any]:
+        await self._request('search')
+        body = body or kwargs
+        if pit := body.get('pit'):
+            # batches of every point in time of the index are the same, they are memoized once
+            result = self._memoized(self._pits[pit['id']], {k: v for k, v in body.items() if k != 'pit'}, self._search)
+            return result | {'pit_id': pit['id']}
+        return self._memoized(index, body, self._search)
+
+    async def msearch(self, searches: list[dict[str, Any]], **kwargs) -> dict[str, Any]:
+        await self._request('msearch')
+        return {
+            'responses': [
+                self._memoized(head['index'], body, self._suggest) for head, body in zip(searches[::2], searches[1::2])
+            ]
+        }
+
+    async def open_point_in_time(self, index: str, keep_alive: str, **kwargs) -> dict[str, Any]:
+        await self._request('open_point_in_time')
+        pit_id = f'pit-{next(self._pit_ids)}'
+        self._pits[pit_id] = index
+        return {'id': pit_id}
+
+    async def close_point_in_time(self, id: str, **kwargs) -> dict[str, Any]:
+        await self._request('close_point_in_time')
+        return {'succeeded': self._pits.pop(id, None) is not None, 'num_freed': 1}
+
+    async def close(self):
+        pass
+
+    def _memoized(self, index: str, body: dict[str, Any], search: Callable[[str, dict], dict]) -> dict[str, Any]:
+        key = orjson.dumps([index, body], default=str, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SORT_KEYS)
+        if (result := self._results.get(key)) is None:
+            started = time.perf_counter()
+            result = self._results[key] = search(index, body)
+            result['took'] = int((time.perf_counter() - started) * 1000)
+        return result
+
+    def _search(self, index: str, body: dict[str, Any]) -> dict[str, Any]:
+        docs = [doc for doc in self.indexes[index].values() if _matches(body.get('query', {'match_all': {}}), doc)]
+        result = {'hits': {'hits': self._hits(docs, body)}}
+        if aggs := body.get('aggs'):
+            result['aggregations'] = self._aggregate(aggs, docs)
+        return result
+
+    def _hits(self, docs: list[Doc], body: dict[str, Any]) -> list[Doc]:
+        size = body.get('size', 10)
+        if not size:
+            return []
+        # orders are given as {'field': 'desc'} or {'field': {'order': 'desc'}}
+        sort = [
+            (
+                field.removesuffix(RAW_SUFFIX) if field != '_shard_doc' else 'id',
+                (order['order'] if isinstance(order, dict) else order) == 'desc',
+            )
+            for clause in body.get('sort', [{'id': {'order': 'asc'}}])
+            for field, order in (clause.items() if isinstance(clause, dict) else [(clause, 'asc')])
+        ]
+        # stable sorts from the last key, missing values go last whatever the order
+        for field, reverse in reversed(sort):
+            present = [doc for doc in docs if doc.get(field) is not None]
+            present.sort(key=lambda doc: doc[field], reverse=reverse)
+            docs = present + [doc for doc in docs if doc.get(field) is None]
+        keys = [[_sort_value(doc, field, reverse) for field, reverse in sort] for doc in docs]
+        start = body.get('from', 0)
+        if after := body.get('search_after'):
+            start = next((i for i, key in enumerate(keys) if self._is_after(key, after, sort)), len(docs))
+        return [
+            {'_id': doc['id'], '_source': _source(doc, body.get('_source')), 'sort': key}
+            for doc, key in zip(docs[start : start + size], keys[start : start + size])
+        ]
+
+    @staticmethod
+    def _is_after(key: list[Any], after: list[Any], sort: list[tuple[str, bool]]) -> bool:
+        for value, cursor, (_, reverse) in zip(key, after, sort):
+            value, cursor = _comparable(value), _comparable(cursor)
+            if value == cursor:
+                continue
+            return value < cursor if reverse else value > cursor
+        return False
+
+    def _aggregate(self, aggs: dict[str, Any], docs: list[Doc], prefix: str = '') -> dict[str, Any]:
+        result = {}
+        for name, agg in aggs.items():
+            if 'nested' in agg:
+                path = agg['nested']['path']
+                nested = [n for doc in docs for n in doc.get(path.removeprefix(prefix)) or ()]
+                result[name] = {'doc_count': len(nested), **self._aggregate(agg.get('aggs', {}), nested, f'{path}.')}
+            elif 'terms' in agg:
+                field = agg['terms']['field'].removeprefix(prefix)
+                groups: dict[Any, list[Doc]] = {}
+                for doc in docs:
+                    for value in _values(doc, field):
+                        groups.setdefault(value, []).append(doc)
+                top = sorted(groups.items(), key=lambda group: (-len(group[1]), group[0]))[: agg['terms']['size']]
+                result[name] = {
+                    'buckets': [
+                        {'key': key, 'doc_count': len(group), **self._aggregate(agg.get('aggs', {}), group, prefix)}
+                        for key, group in top
+                    ]
+                }
+            elif 'top_hits' in agg:
+                hits = docs[: agg['top_hits'].get('size', 3)]
+                source = agg['top_hits'].get('_source')
+                result[name] = {'hits': {'hits': [{'_source': _source(doc, source, prefix)} for doc in hits]}}
+            else:
+                raise ValueError(f'unsupported aggregation {name}')
+        return result
+
+    def _suggest(self, index: str, body: dict[str, Any]) -> dict[str, Any]:
+        completion = body['suggest']['suggest']
+        prefix, size = completion['prefix'].lower(), completion['completion']['size']
+        options = []
+        for doc in self.indexes[index].values():
+            if any(text.lower().startswith(prefix) for text in doc.get('suggest', ())):
+                options.append({'_id': doc['id'], '_source': _source(doc, body.get('_source'))})
+                if len(options) == size:
+                    break
+        return {'suggest': {'suggest': [{'text': prefix, 'offset': 0, 'length': len(prefix), 'options': options}]}}
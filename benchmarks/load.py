@@ -0,0 +1,210 @@
+"""Throughput, latency percentiles and allocations per endpoint of the API replaying a request mix
+
+The app runs in process with the in-memory cache and a fake Elasticsearch serving dump.sql or the bulk files
+of benchmarks.synthetic_catalogue, so no services are needed. The mix is either recorded traffic, a JSONL file of `{"method": "GET", "url": "/api/v1/films/"}`
+lines with an optional JSON `body`, or a synthetic one whose films, persons, genres and queries are drawn
+from a Zipf distribution over their popularity. Run from the repository root:
+
+    PYTHONPATH=movies_api:etl python -m benchmarks.load --requests 20000 --concurrency 32
+    PYTHONPATH=movies_api:etl python -m benchmarks.load --traffic traffic.jsonl
+    PYTHONPATH=movies_api:etl python -m benchmarks.load --catalogue catalogue
+
+Settings come from the environment as usual, e.g. RESPONSE_CACHE_ENABLED=true. With --allocations requests
+are replayed one by one under tracemalloc, which slows them down, so latencies of such runs are not comparable.
+"""
+
+import argparse
+import asyncio
+import bisect
+import itertools
+import random
+import time
+import tracemalloc
+from typing import Any, Callable, Iterable, NamedTuple
+from unittest import mock
+
+import httpx
+import orjson
+from fastapi import FastAPI
+from fastapi.routing import APIRoute
+
+from benchmarks.catalogue import load_bulk, load_catalogue
+from benchmarks.fakes import FakeElastic
+from movies_api.core.config import settings
+from movies_api.db import elastic
+from movies_api.main import app
+
+FILM_SORTS = ('-rating', '-rating', '-rating', 'title', 'id')
+
+
+class Request(NamedTuple):
+    method: str
+    url: str
+    body: Any = None
+
+
+class Sample(NamedTuple):
+    endpoint: str
+    status: int
+    seconds: float
+    allocated: int
+
+
+class Zipf:
+    """Ranks from 0 to `n`, rank `k` is drawn with probability proportional to 1 / (k + 1) ** s"""
+
+    def __init__(self, n: int, s: float, rng: random.Random):
+        self.cum_weights = list(itertools.accumulate(1 / (k + 1) ** s for k in range(n)))
+        self.rng = rng
+
+    def __call__(self) -> int:
+        return bisect.bisect(self.cum_weights, self.rng.random() * self.cum_weights[-1])
+
+
+def synthetic_mix(catalogue: dict[str, list[dict]], count: int, s: float, seed: int) -> list[Request]:
+    """Requests of the endpoints weighted as in production, popular films are the best rated ones"""
+    rng = random.Random(seed)
+    films = sorted(catalogue['movies'], key=lambda film: -(film['rating'] or 0))
+    persons = sorted(catalogue['persons'], key=lambda person: -len(person['films']))
+    genres = catalogue['genres']
+    film, person, genre, page = (
+        Zipf(len(films), s, rng),
+        Zipf(len(persons), s, rng),
+        Zipf(len(genres), s, rng),
+        Zipf(20, s, rng),
+    )
+
+    def films_page() -> str:
+        url = f'/api/v1/films/?sort={rng.choice(FILM_SORTS)}&page_number={page()}'
+        return url + f'&genre={genres[genre()]["name"]}' if rng.random() < 0.3 else url
+
+    endpoints: dict[Callable[[], str], int] = {
+        lambda: f'/api/v1/films/{films[film()]["id"]}': 30,
+        films_page: 15,
+        lambda: f'/api/v1/films/search?query={rng.choice(films[film()]["title"].split())}': 12,
+        lambda: f'/api/v1/films/{persons[person()]["id"]}/film': 5,
+        lambda: f'/api/v1/persons/{persons[person()]["id"]}': 10,
+        lambda: f'/api/v1/persons/search?query={persons[person()]["full_name"].split()[0]}': 5,
+        lambda: f'/api/v1/genres/{genres[genre()]["id"]}': 3,
+        lambda: '/api/v1/genres/': 3,
+        lambda: '/api/v1/genres/stats': 2,
+        lambda: f'/api/v1/suggest/?query={films[film()]["title"][: rng.randint(2, 5)]}': 15,
+        lambda: f'/api/v1/films/export?genre={genres[genre()]["name"]}': 1,
+        lambda: f'/api/v1/persons/export?actor={persons[person()]["full_name"].split()[-1]}': 1,
+    }
+    urls = rng.choices(list(endpoints), weights=list(endpoints.values()), k=count)
+    return [Request('GET', url()) for url in urls]
+
+
+def recorded_mix(path: str) -> list[Request]:
+    with open(path, 'rb') as f:
+        lines = [orjson.loads(line) for line in f if line.strip()]
+    return [Request(line.get('method', 'GET'), line['url'], line.get('body')) for line in lines]
+
+
+def endpoint(app: FastAPI, request: Request) -> str:
+    """Route template of the request, so that samples of one endpoint are reported together"""
+    path = httpx.URL(request.url).path
+    for route in app.routes:
+        if isinstance(route, APIRoute) and request.method in route.methods and route.path_regex.match(path):
+            return f'{request.method} {route.path}'
+    return f'{request.method} unmatched'
+
+
+async def replay(client: httpx.AsyncClient, requests: Iterable[tuple[str, Request]], concurrency: int) -> list[Sample]:
+    samples = []
+    requests = iter(requests)
+
+    async def worker():
+        for name, request in requests:
+            allocated = 0
+            if tracing := tracemalloc.is_tracing():
+                tracemalloc.reset_peak()
+                before = tracemalloc.get_traced_memory()[0]
+            started = time.perf_counter()
+            response = await client.request(request.method, request.url, json=request.body)
+            seconds = time.perf_counter() - started
+            if tracing:
+                allocated = tracemalloc.get_traced_memory()[1] - before
+            samples.append(Sample(name, response.status_code, seconds, allocated))
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return samples
+
+
+def percentile(values: list[float], p: float) -> float:
+    """Nearest-rank percentile of sorted `values`"""
+    return values[max(0, min(len(values) - 1, round(p / 100 * len(values) + 0.5) - 1))]
+
+
+def report(samples: list[Sample], seconds: float, elastic_calls: int):
+    print(f'{len(samples)} requests in {seconds:.2f}s, {len(samples) / seconds:.0f} req/s, ', end='')
+    print(f'{elastic_calls / len(samples):.3f} Elasticsearch requests per request')
+    print(f'{"endpoint":<32}{"count":>8}{"req/s":>8}{"errors":>8}{"p50, ms":>10}{"p95, ms":>10}{"p99, ms":>10}', end='')
+    print(f'{"peak, KiB":>12}' if any(sample.allocated for sample in samples) else '')
+    by_endpoint = itertools.groupby(sorted(samples), key=lambda sample: sample.endpoint)
+    for name, group in by_endpoint:
+        group = list(group)
+        latencies = sorted(sample.seconds * 1000 for sample in group)
+        errors = sum(sample.status >= 500 for sample in group)
+        print(f'{name:<32}{len(group):>8}{len(group) / seconds:>8.0f}{errors:>8}', end='')
+        print(''.join(f'{percentile(latencies, p):>10.2f}' for p in (50, 95, 99)), end='')
+        allocated = sum(sample.allocated for sample in group) / len(group) / 1024
+        print(f'{allocated:>12.1f}' if allocated else '')
+
+
+async def run(args: argparse.Namespace):
+    if args.catalogue:
+        bulk = load_bulk(args.catalogue)
+        indexes = (settings.MOVIES_INDEX, settings.GENRES_INDEX, settings.PERSONS_INDEX)
+        catalogue = dict(zip(('movies', 'genres', 'persons'), (bulk[index] for index in indexes)))
+    else:
+        catalogue = load_catalogue()
+    if args.traffic:
+        requests = recorded_mix(args.traffic)
+    else:
+        requests = synthetic_mix(catalogue, args.warmup + args.requests, args.zipf, args.seed)
+    requests = [(endpoint(app, request), request) for request in requests]
+
+    fake = FakeElastic(
+        {
+            settings.MOVIES_INDEX: catalogue['movies'],
+            settings.GENRES_INDEX: catalogue['genres'],
+            settings.PERSONS_INDEX: catalogue['persons'],
+        },
+        latency=args.elastic_latency / 1000,
+    )
+    settings.CACHE_BACKEND = 'memory'
+    # measured runs start cold unless --warmup requests are replayed first
+    settings.WARMUP_SOURCE = 'none'
+    with mock.patch.object(elastic, 'create_elastic', return_value=fake):
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+            async with httpx.AsyncClient(transport=transport, base_url='http://benchmark') as client:
+                await replay(client, requests[: args.warmup], args.concurrency)
+                calls = fake.calls.total()
+                if args.allocations:
+                    tracemalloc.start()
+                started = time.perf_counter()
+                samples = await replay(client, requests[args.warmup :], 1 if args.allocations else args.concurrency)
+                seconds = time.perf_counter() - started
+                tracemalloc.stop()
+    report(samples, seconds, fake.calls.total() - calls)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--catalogue', help='directory of bulk files to serve, dump.sql when not set')
+    parser.add_argument('--traffic', help='JSONL file of recorded requests, a synthetic mix when not set')
+    parser.add_argument('--requests', type=int, default=10000, help='synthetic requests measured')
+    parser.add_argument('--warmup', type=int, default=0, help='requests replayed first and not measured')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--zipf', type=float, default=1.1, help='exponent of the popularity distribution')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--elastic-latency', type=float, default=1.0, help='milliseconds of every ES request')
+    parser.add_argument('--allocations', action='store_true', help='peak allocations per request, one at a time')
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
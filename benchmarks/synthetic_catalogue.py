@@ -0,0 +1,371 @@
+"""Synthetic catalogue of any size with the skew of a real one, as ETL input or Elasticsearch bulk files
+
+Persons get a Pareto distributed popularity, so a few of them play in thousands of films and most in one or
+two, film casts have power-law sizes and genres are picked by a Zipf distribution over their popularity.
+Ids are derived from the seed, so the same arguments always produce the same catalogue. Films are generated
+in one pass with bounded memory, links and person films are spilled to temporary files. Run from
+the repository root:
+
+    PYTHONPATH=movies_api:etl python -m benchmarks.synthetic_catalogue --films 10000000 --format sql -o catalogue.sql
+    PYTHONPATH=movies_api:etl python -m benchmarks.synthetic_catalogue --films 100000 --format bulk -o catalogue
+
+The sql format is a Postgres script with the tables of dump.sql filled by COPY, mount it into
+docker-entrypoint-initdb.d instead of dump.sql and run the ETL. The bulk format is a directory of NDJSON
+files with the documents the ETL would index, load them into the indexes created by scripts/init_schema_es.bash:
+
+    for f in catalogue/*.ndjson; do
+        curl -s -H 'Content-Type: application/x-ndjson' --data-binary @$f localhost:9200/_bulk > /dev/null
+    done
+"""
+
+import argparse
+import hashlib
+import itertools
+import os
+import random
+import shutil
+import tempfile
+from array import array
+from bisect import bisect
+from datetime import datetime, timedelta, timezone
+from typing import IO, Any, Iterable, Iterator
+
+import orjson
+
+from etl.transform import ROLES, transform_film, transform_genre, transform_person
+from movies_api.core.config import settings
+
+GENRES = (
+    'Action', 'Adventure', 'Fantasy', 'Sci-Fi', 'Drama', 'Music', 'Romance', 'Thriller', 'Mystery', 'Comedy',
+    'Animation', 'Family', 'Biography', 'Musical', 'Crime', 'Short', 'Western', 'Documentary', 'History', 'War',
+    'Game-Show', 'Reality-TV', 'Horror', 'Sport', 'Talk-Show', 'News',
+)  # fmt: skip
+GENRE_QUALIFIERS = ('Dark', 'Romantic', 'Historical', 'Psychological', 'Space', 'Urban', 'Teen', 'Epic', 'Satirical')
+FIRST_NAMES = (
+    'James', 'Mary', 'John', 'Patricia', 'Robert', 'Jennifer', 'Michael', 'Linda', 'William', 'Elizabeth', 'David',
+    'Barbara', 'Richard', 'Susan', 'Joseph', 'Jessica', 'Thomas', 'Sarah', 'Charles', 'Karen', 'Daniel', 'Nancy',
+    'Matthew', 'Lisa', 'Anthony', 'Sandra', 'Mark', 'Emily', 'George', 'Olga', 'Ivan', 'Yuki', 'Hiro', 'Ana',
+)  # fmt: skip
+LAST_NAMES = (
+    'Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis', 'Rodriguez', 'Martinez', 'Lucas',
+    'Wilson', 'Anderson', 'Taylor', 'Thomas', 'Moore', 'Jackson', 'Martin', 'Lee', 'Thompson', 'White', 'Harris',
+    'Clark', 'Lewis', 'Walker', 'Young', 'King', 'Wright', 'Scott', 'Green', 'Baker', 'Ivanov', 'Tanaka', 'Silva',
+)  # fmt: skip
+ADJECTIVES = (
+    'Last', 'Dark', 'Silent', 'Lost', 'Golden', 'Broken', 'Hidden', 'Final', 'Red', 'Wild', 'Secret', 'Endless',
+    'Frozen', 'Burning', 'Forgotten', 'Little', 'Great', 'Strange', 'Electric', 'Crimson', 'Hollow', 'Distant',
+)  # fmt: skip
+NOUNS = (
+    'Star', 'River', 'Empire', 'Kingdom', 'Night', 'Road', 'Dream', 'City', 'Storm', 'Heart', 'Shadow', 'Island',
+    'Planet', 'Garden', 'Machine', 'Voyage', 'Legend', 'Ocean', 'Mountain', 'Song', 'Promise', 'Winter', 'Dragon',
+)  # fmt: skip
+SEQUELS = ('II', 'III', 'Returns', 'Reloaded', 'Origins', 'The Beginning')
+FILM_TYPES = ('movie', 'movie', 'movie', 'tv_show')
+
+CREATED_AT = datetime(2021, 6, 16, 20, 14, 9, tzinfo=timezone.utc)
+
+SCHEMA = """
+CREATE TABLE film_work (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    description TEXT,
+    creation_date DATE,
+    file_path TEXT,
+    rating FLOAT,
+    type TEXT not null,
+    created_at timestamp with time zone,
+    updated_at timestamp with time zone
+);
+CREATE TABLE genre (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    description TEXT,
+    created_at timestamp with time zone,
+    updated_at timestamp with time zone
+);
+CREATE TABLE genre_film_work (
+    id TEXT PRIMARY KEY,
+    film_work_id TEXT NOT NULL,
+    genre_id TEXT NOT NULL,
+    created_at timestamp with time zone
+);
+CREATE TABLE person (
+    id TEXT PRIMARY KEY,
+    full_name TEXT NOT NULL,
+    created_at timestamp with time zone,
+    updated_at timestamp with time zone
+);
+CREATE TABLE person_film_work (
+    id TEXT PRIMARY KEY,
+    film_work_id TEXT NOT NULL,
+    person_id TEXT NOT NULL,
+    role TEXT NOT NULL,
+    created_at timestamp with time zone
+);
+"""
+
+# person films are spilled as (person // shards) << 40 | film << 2 | role
+FILM_BITS = 38
+ROLE_BITS = 2
+SPILL_SIZE = 1 << 20
+# RFC 4122 variant bits set in the first hex digit of the fourth group
+UUID_VARIANT = {digit: '89ab'[int(digit, 16) & 3] for digit in '0123456789abcdef'}
+
+
+class SyntheticCatalogue:
+    def __init__(
+        self,
+        films: int,
+        persons: int,
+        genres: int,
+        seed: int = 0,
+        popularity_exponent: float = 1.5,
+        max_popularity: float = 2000,
+        cast_exponent: float = 2.0,
+        max_cast: int = 300,
+    ):
+        if films >= 1 << FILM_BITS:
+            raise ValueError(f'at most {1 << FILM_BITS} films')
+        self.films, self.persons, self.genres = films, persons, genres
+        self.seed = seed
+        self.cast_exponent = cast_exponent
+        self.max_cast = max_cast
+        rng = random.Random(seed)
+        # expected films of a person are proportional to their popularity
+        popularity = (min(rng.paretovariate(popularity_exponent), max_popularity) for _ in range(persons))
+        self.person_weights = array('d', itertools.accumulate(popularity))
+        self.genre_weights = array('d', itertools.accumulate(1 / (k + 1) for k in range(genres)))
+
+    def id(self, kind: str, k: int | str) -> str:
+        """Random looking uuid4 of the `k`-th entity of the kind, formatted by hand as uuid.UUID is slow"""
+        h = hashlib.blake2b(f'{self.seed}:{kind}:{k}'.encode(), digest_size=16).hexdigest()
+        return f'{h[:8]}-{h[8:12]}-4{h[13:16]}-{UUID_VARIANT[h[16]]}{h[17:20]}-{h[20:]}'
+
+    def genre(self, k: int) -> dict[str, Any]:
+        name = GENRES[k % len(GENRES)]
+        if k >= len(GENRES):
+            name = f'{GENRE_QUALIFIERS[(k // len(GENRES) - 1) % len(GENRE_QUALIFIERS)]} {name}'
+        if k >= len(GENRES) * (len(GENRE_QUALIFIERS) + 1):
+            name = f'{name} {k // (len(GENRES) * (len(GENRE_QUALIFIERS) + 1)) + 1}'
+        return {'id': self.id('genre', k), 'name': name, 'description': None, **_timestamps(k)}
+
+    def person(self, k: int) -> dict[str, Any]:
+        return {'id': self.id('person', k), 'full_name': self.full_name(k), **_timestamps(k)}
+
+    def full_name(self, k: int) -> str:
+        first, last = divmod(k * 7919 + self.seed, len(LAST_NAMES))
+        name = f'{FIRST_NAMES[first % len(FIRST_NAMES)]} {LAST_NAMES[last]}'
+        if k >= len(FIRST_NAMES) * len(LAST_NAMES):
+            name = f'{name} {chr(ord("A") + k % 26)}.'
+        return name
+
+    def generate(self) -> Iterator[tuple[int, dict[str, Any], list[int], list[tuple[int, str]]]]:
+        """Rows of films with the indexes of their genres and `(person, role)` of their casts"""
+        rng = random.Random(self.seed + 1)
+        for i in range(self.films):
+            title = f'{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)}'
+            if rng.random() < 0.3:
+                title = f'The {title}'
+            if rng.random() < 0.1:
+                title = f'{title} {rng.choice(SEQUELS)}'
+            words = rng.choices(NOUNS, k=rng.randint(8, 30))
+            film = dict(
+                id=self.id('film', i),
+                title=title,
+                description=f'{title} is a story of {" and ".join(words).lower()}.',
+                creation_date=None,
+                file_path=None,
+                rating=None if rng.random() < 0.02 else round(min(max(rng.gauss(6.4, 1.3), 1), 10), 1),
+                type=rng.choice(FILM_TYPES),
+                **_timestamps(i),
+            )
+            genres = {self._pick(self.genre_weights, rng) for _ in range(min(1 + int(rng.expovariate(1)), 5))}
+            cast = {
+                'director': 1 if rng.random() < 0.9 else 2,
+                'writer': rng.randint(0, 3),
+                'actor': min(int(rng.paretovariate(self.cast_exponent) * 3), self.max_cast),
+            }
+            persons = [
+                (person, role)
+                for role, size in cast.items()
+                for person in dict.fromkeys(self._pick(self.person_weights, rng) for _ in range(size))
+            ]
+            yield i, film, sorted(genres), persons
+
+    @staticmethod
+    def _pick(cum_weights: array, rng: random.Random) -> int:
+        return bisect(cum_weights, rng.random() * cum_weights[-1])
+
+
+def _timestamps(k: int) -> dict[str, str]:
+    at = f'{CREATED_AT + timedelta(seconds=k):%Y-%m-%d %H:%M:%S}+00'
+    return {'created_at': at, 'updated_at': at}
+
+
+def _copy_row(values: Iterable[Any]) -> bytes:
+    return '\t'.join(r'\N' if value is None else f'{value}' for value in values).encode() + b'\n'
+
+
+def _copy(output: IO[bytes], table: str, columns: Iterable[str], rows: IO[bytes]):
+    output.write(f'COPY {table} ({", ".join(columns)}) FROM stdin;\n'.encode())
+    shutil.copyfileobj(rows, output)
+    output.write(b'\\.\n')
+
+
+def write_sql(catalogue: SyntheticCatalogue, path: str):
+    """Postgres script creating the tables of dump.sql and filling them by COPY
+
+    Rows of every table are spilled to its own file while films are generated and copied to the script after.
+    """
+    columns = {
+        'genre': ('id', 'name', 'description', 'created_at', 'updated_at'),
+        'person': ('id', 'full_name', 'created_at', 'updated_at'),
+        'film_work': (
+            'id', 'title', 'description', 'creation_date', 'file_path', 'rating', 'type', 'created_at', 'updated_at'
+        ),
+        'genre_film_work': ('id', 'film_work_id', 'genre_id', 'created_at'),
+        'person_film_work': ('id', 'film_work_id', 'person_id', 'role', 'created_at'),
+    }  # fmt: skip
+    with tempfile.TemporaryDirectory() as tmp:
+        tables = {table: open(os.path.join(tmp, table), 'w+b') for table in columns}
+        for k in range(catalogue.genres):
+            tables['genre'].write(_copy_row(catalogue.genre(k).values()))
+        for k in range(catalogue.persons):
+            tables['person'].write(_copy_row(catalogue.person(k).values()))
+        for i, film, genres, persons in catalogue.generate():
+            tables['film_work'].write(_copy_row(film.values()))
+            for k in genres:
+                link = (catalogue.id('genre_film_work', f'{i}:{k}'), film['id'], catalogue.id('genre', k))
+                tables['genre_film_work'].write(_copy_row((*link, film['created_at'])))
+            for n, (k, role) in enumerate(persons):
+                link = (catalogue.id('person_film_work', f'{i}:{n}'), film['id'], catalogue.id('person', k), role)
+                tables['person_film_work'].write(_copy_row((*link, film['created_at'])))
+
+        with open(path, 'wb') as output:
+            output.write(f'BEGIN;\n{SCHEMA}'.encode())
+            for table, rows in tables.items():
+                rows.seek(0)
+                _copy(output, table, columns[table], rows)
+                rows.close()
+            output.write(b'COMMIT;\n')
+
+
+class BulkWriter:
+    """NDJSON files of bulk index actions, at most `size` documents each"""
+
+    def __init__(self, directory: str, index: str, size: int):
+        self.directory, self.index, self.size = directory, index, size
+        self.files = itertools.count()
+        self.output: IO[bytes] | None = None
+        self.written = 0
+
+    def write(self, doc: dict[str, Any]):
+        if self.output is None or self.written == self.size:
+            self.close()
+            self.output = open(os.path.join(self.directory, f'{self.index}-{next(self.files):05d}.ndjson'), 'wb')
+            self.written = 0
+        self.output.write(orjson.dumps({'index': {'_index': self.index, '_id': doc['id']}}) + b'\n')
+        self.output.write(orjson.dumps(doc) + b'\n')
+        self.written += 1
+
+    def close(self):
+        if self.output:
+            self.output.close()
+
+
+def write_bulk(catalogue: SyntheticCatalogue, directory: str, bulk_size: int, person_shards: int):
+    """Bulk files of the movies, genres and persons indexes with the documents the ETL builds
+
+    Films of persons are spilled to `person_shards` files while films are written, the person documents
+    of one shard are built at a time, so memory is bounded by the links of one shard.
+    """
+    os.makedirs(directory, exist_ok=True)
+    genres = BulkWriter(directory, settings.GENRES_INDEX, bulk_size)
+    names = []
+    for k in range(catalogue.genres):
+        genres.write(genre := transform_genre(catalogue.genre(k)))
+        names.append(genre['name'])
+    genres.close()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        shards = [open(os.path.join(tmp, f'{shard}'), 'w+b') for shard in range(person_shards)]
+        spills = [array('Q') for _ in shards]
+        movies = BulkWriter(directory, settings.MOVIES_INDEX, bulk_size)
+        for i, film, genres, persons in catalogue.generate():
+            film['genres'] = [names[k] for k in genres]
+            film['persons'] = []
+            for k, role in persons:
+                film['persons'].append(
+                    {'role': role, 'id': catalogue.id('person', k), 'full_name': catalogue.full_name(k)}
+                )
+                shard = k % person_shards
+                spills[shard].append(
+                    (k // person_shards) << (FILM_BITS + ROLE_BITS) | i << ROLE_BITS | ROLES.index(role)
+                )
+                if len(spills[shard]) == SPILL_SIZE:
+                    spills[shard].tofile(shards[shard])
+                    del spills[shard][:]
+            movies.write(transform_film(film))
+        movies.close()
+
+        persons = BulkWriter(directory, settings.PERSONS_INDEX, bulk_size)
+        for shard, (spilled, spill) in enumerate(zip(shards, spills)):
+            spilled.seek(0)
+            links = array('Q')
+            links.frombytes(spilled.read())
+            links.extend(spill)
+            spilled.close()
+            # films of a person are spilled in the order of films, the roles of one film are consecutive
+            films: dict[int, array] = {}
+            for link in links:
+                films.setdefault(link >> (FILM_BITS + ROLE_BITS), array('Q')).append(
+                    link & ((1 << (FILM_BITS + ROLE_BITS)) - 1)
+                )
+            for local in range((catalogue.persons - shard + person_shards - 1) // person_shards):
+                person = catalogue.person(local * person_shards + shard)
+                person['films'] = [
+                    {
+                        'id': catalogue.id('film', i),
+                        'roles': sorted({ROLES[link & ((1 << ROLE_BITS) - 1)] for link in group}),
+                    }
+                    for i, group in itertools.groupby(films.pop(local, ()), key=lambda link: link >> ROLE_BITS)
+                ]
+                persons.write(transform_person(person))
+        persons.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--films', type=int, default=100_000)
+    parser.add_argument('--persons', type=int, help='half the films when not set')
+    parser.add_argument('--genres', type=int, default=60)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--popularity-exponent', type=float, default=1.5, help='Pareto shape of persons popularity')
+    parser.add_argument('--max-popularity', type=float, default=2000, help='cap of a person popularity')
+    parser.add_argument('--cast-exponent', type=float, default=2.0, help='Pareto shape of actors per film')
+    parser.add_argument('--max-cast', type=int, default=300, help='actors of a film at most')
+    parser.add_argument('--format', choices=('sql', 'bulk'), default='sql')
+    parser.add_argument('-o', '--output', required=True, help='sql file or bulk files directory')
+    parser.add_argument('--bulk-size', type=int, default=5000, help='documents per bulk file')
+    parser.add_argument('--person-shards', type=int, help='passes building person documents, bounds memory')
+    args = parser.parse_args()
+
+    persons = args.persons or max(args.films // 2, 1)
+    catalogue = SyntheticCatalogue(
+        args.films,
+        persons,
+        args.genres,
+        args.seed,
+        args.popularity_exponent,
+        args.max_popularity,
+        args.cast_exponent,
+        args.max_cast,
+    )
+    if args.format == 'sql':
+        write_sql(catalogue, args.output)
+    else:
+        write_bulk(catalogue, args.output, args.bulk_size, args.person_shards or max(persons // 500_000, 1))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""Time of the model validation and serialisation steps of detail and list requests, per document
+
+Run from the repository root:
+
+    PYTHONPATH=movies_api:etl python -m benchmarks.validation
+"""
+
+import timeit
+from typing import Any, Callable
+
+import orjson
+
+from benchmarks.catalogue import load_catalogue
+from movies_api.api.v1 import schemas
+from movies_api.models.film import Film
+from movies_api.models.genre import Genre
+from movies_api.models.persons import Person
+from movies_api.services.codec import codec
+from movies_api.services.film import FilmService
+from movies_api.services.response_cache import _default
+
+REPEAT = 20
+
+
+def measure(step: Callable[[Any], Any], items: list[Any]) -> float:
+    """Microseconds of `step` per item"""
+    return timeit.timeit(lambda: [step(item) for item in items], number=REPEAT) / REPEAT / len(items) * 1e6
+
+
+def film_response(film: Film) -> bytes:
+    return orjson.dumps(schemas.Film(uuid=film.id, title=film.title, imdb_rating=film.rating), default=_default)
+
+
+def person_response(person: Person) -> bytes:
+    films = [schemas.FilmRoles(uuid=film.id, roles=film.roles) for film in person.films]
+    return orjson.dumps(schemas.Person(uuid=person.id, full_name=person.full_name, films=films), default=_default)
+
+
+def main():
+    catalogue = load_catalogue()
+    films = [Film.model_validate(doc) for doc in catalogue['movies']]
+    persons = [Person.model_validate(doc) for doc in catalogue['persons']]
+    projected = [film.model_dump(include=FilmService.list_fields) for film in films]
+    cached = [codec.encode(film.model_dump()) for film in films]
+
+    steps = {
+        'film: validate document': (Film.model_validate, catalogue['movies']),
+        'film: validate list projection': (Film.model_validate, projected),
+        'film: decode and validate cached': (lambda value: Film.model_validate(codec.decode(value)), cached),
+        'film: dump to cache': (lambda film: codec.encode(film.model_dump()), films),
+        'film: list item response': (film_response, films),
+        'person: validate document': (Person.model_validate, catalogue['persons']),
+        'person: response': (person_response, persons),
+        'genre: validate document': (Genre.model_validate, catalogue['genres']),
+    }
+    print(f'{"step":<36}{"items":>8}{"us per item":>14}')
+    for name, (step, items) in steps.items():
+        print(f'{name:<36}{len(items):>8}{measure(step, items):>14.2f}')
+
+
+if __name__ == '__main__':
+    main()
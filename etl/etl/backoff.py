@@ -0,0 +1,22 @@
+import time
+from functools import wraps
+
+from etl.core.logger import logger
+
+
+def backoff(exceptions: tuple[type[Exception], ...], start_sleep_time=0.1, factor=2, border_sleep_time=10):
+    def func_wrapper(func):
+        @wraps(func)
+        def inner(*args, **kwargs):
+            sleep_time = start_sleep_time
+            while True:
+                try:
+                    return func(*args, **kwargs)
+                except exceptions as e:
+                    logger.warning('%s failed: %s, retry in %.1fs', func.__name__, e, sleep_time)
+                    time.sleep(sleep_time)
+                    sleep_time = min(sleep_time * factor, border_sleep_time)
+
+        return inner
+
+    return func_wrapper
@@ -0,0 +1,34 @@
+import logging
+
+from pydantic_settings import BaseSettings
+
+from etl.core.logger import LOG_FORMAT, LOG_LEVEL
+
+
+class Settings(BaseSettings):
+    DB_NAME: str = 'postgres'
+    POSTGRES_USER: str = 'postgres'
+    POSTGRES_PASSWORD: str = 'example'
+    POSTGRES_HOST: str = '127.0.0.1'
+    POSTGRES_PORT: int = 5432
+
+    ELASTIC_HOST: str = '127.0.0.1'
+    ELASTIC_PORT: int = 9200
+
+    REDIS_HOST: str = '127.0.0.1'
+    REDIS_PORT: int = 6379
+
+    CACHE_INVALIDATION_CHANNEL: str = 'cache-invalidation'
+
+    STATE_FILE_PATH: str = 'state.json'
+
+    BATCH_SIZE: int = 500
+    SLEEP_TIME_IN_SECONDS: int = 10
+
+    MOVIES_INDEX: str = 'movies'
+    GENRES_INDEX: str = 'genres'
+    PERSONS_INDEX: str = 'persons'
+
+
+logging.basicConfig(level=LOG_LEVEL, format=LOG_FORMAT)
+settings = Settings()
@@ -0,0 +1,6 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+LOG_LEVEL = logging.INFO
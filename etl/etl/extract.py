@@ -0,0 +1,24 @@
+from typing import Any, Iterator
+from uuid import uuid4
+
+from psycopg2.extensions import connection as _connection
+from psycopg2.extras import RealDictCursor
+
+
+class PostgresExtractor:
+    def __init__(self, connection: _connection, batch_size: int):
+        self.connection = connection
+        self.batch_size = batch_size
+
+    def extract(self, query: str, params: dict[str, Any]) -> Iterator[list[dict[str, Any]]]:
+        # named cursor is server-side: rows are streamed by batches instead of loaded at once
+        with self.connection.cursor(name=f'etl_{uuid4().hex}', cursor_factory=RealDictCursor) as cursor:
+            cursor.itersize = self.batch_size
+            cursor.execute(query, params)
+            while rows := cursor.fetchmany(self.batch_size):
+                yield rows
+
+    def fetch_all(self, query: str, params: dict[str, Any]) -> list[dict[str, Any]]:
+        with self.connection.cursor(cursor_factory=RealDictCursor) as cursor:
+            cursor.execute(query, params)
+            return cursor.fetchall()
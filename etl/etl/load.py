@@ -0,0 +1,34 @@
+from typing import Any, Iterable
+
+from elasticsearch import Elasticsearch
+from elasticsearch.helpers import bulk
+
+from etl.core.logger import logger
+from etl.publish import RedisPublisher
+
+
+class ElasticsearchLoader:
+    def __init__(self, client: Elasticsearch, publisher: RedisPublisher | None = None):
+        self.client = client
+        self.publisher = publisher
+
+    def load(self, index: str, docs: list[dict[str, Any]]) -> int:
+        """Indexes the documents, rejected ones are logged and skipped so the watermark still advances"""
+        actions = ({'_index': index, '_id': doc['id'], '_source': doc} for doc in docs)
+        return self._bulk(index, actions, [doc['id'] for doc in docs])
+
+    def delete(self, index: str, ids: list[str]) -> int:
+        """Deletes the documents, ids missing from the index are skipped"""
+        actions = ({'_op_type': 'delete', '_index': index, '_id': id} for id in ids)
+        return self._bulk(index, actions, ids)
+
+    def _bulk(self, index: str, actions: Iterable[dict[str, Any]], ids: list[str]) -> int:
+        # searches see the documents before the API evicts its cache, otherwise old pages would be cached again
+        success, errors = bulk(self.client, actions, refresh='wait_for', raise_on_error=False)
+        for error in errors:
+            item = next(iter(error.values()))
+            if item.get('status') != 404:
+                logger.error('%s: document %s rejected: %s', index, item.get('_id'), item.get('error'))
+        if self.publisher and ids:
+            self.publisher.publish(index, ids)
+        return success
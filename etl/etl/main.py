@@ -0,0 +1,193 @@
+import time
+from contextlib import closing
+
+import psycopg2
+from elasticsearch import ConnectionError as ElasticConnectionError
+from elasticsearch import Elasticsearch
+from redis import ConnectionError as RedisConnectionError
+from redis import Redis
+
+from etl.backoff import backoff
+from etl.core.config import settings
+from etl.extract import PostgresExtractor
+from etl.load import ElasticsearchLoader
+from etl.pipeline import DeletionPipeline, FanOutPipeline, Pipeline
+from etl.publish import RedisPublisher
+from etl.queries import (
+    CHANGED_GENRE_FILM_WORKS_QUERY,
+    CHANGED_GENRES_QUERY,
+    CHANGED_PERSON_FILM_WORKS_QUERY,
+    CHANGED_PERSONS_QUERY,
+    DELETED_FILM_WORKS_QUERY,
+    DELETED_GENRE_FILM_WORKS_QUERY,
+    DELETED_GENRES_QUERY,
+    DELETED_PERSON_FILM_WORKS_QUERY,
+    DELETED_PERSONS_QUERY,
+    DELETED_ROW_LOG_INSTALLED_QUERY,
+    DELETED_ROW_LOG_SCHEMA,
+    FILM_IDS_BY_DELETED_GENRES_QUERY,
+    FILM_IDS_BY_DELETED_LINKS_QUERY,
+    FILM_IDS_BY_DELETED_PERSONS_QUERY,
+    FILM_IDS_BY_GENRE_FILM_WORKS_QUERY,
+    FILM_IDS_BY_GENRES_QUERY,
+    FILM_IDS_BY_PERSON_FILM_WORKS_QUERY,
+    FILM_IDS_BY_PERSONS_QUERY,
+    FILMS_BY_IDS_QUERY,
+    FILMS_QUERY,
+    GENRES_QUERY,
+    PERSON_IDS_BY_DELETED_FILM_WORKS_QUERY,
+    PERSON_IDS_BY_DELETED_LINKS_QUERY,
+    PERSON_IDS_BY_PERSON_FILM_WORKS_QUERY,
+    PERSONS_BY_IDS_QUERY,
+    PERSONS_QUERY,
+)
+from etl.state import JsonFileStorage, State
+from etl.transform import transform_film, transform_genre, transform_person
+
+PIPELINES = (
+    Pipeline('genres', settings.GENRES_INDEX, GENRES_QUERY, transform_genre),
+    Pipeline('persons', settings.PERSONS_INDEX, PERSONS_QUERY, transform_person),
+    Pipeline('movies', settings.MOVIES_INDEX, FILMS_QUERY, transform_film),
+)
+
+FAN_OUT_PIPELINES = (
+    FanOutPipeline(
+        'movies_by_persons',
+        settings.MOVIES_INDEX,
+        CHANGED_PERSONS_QUERY,
+        FILM_IDS_BY_PERSONS_QUERY,
+        FILMS_BY_IDS_QUERY,
+        transform_film,
+    ),
+    FanOutPipeline(
+        'movies_by_genres',
+        settings.MOVIES_INDEX,
+        CHANGED_GENRES_QUERY,
+        FILM_IDS_BY_GENRES_QUERY,
+        FILMS_BY_IDS_QUERY,
+        transform_film,
+    ),
+    FanOutPipeline(
+        'movies_by_person_film_works',
+        settings.MOVIES_INDEX,
+        CHANGED_PERSON_FILM_WORKS_QUERY,
+        FILM_IDS_BY_PERSON_FILM_WORKS_QUERY,
+        FILMS_BY_IDS_QUERY,
+        transform_film,
+    ),
+    FanOutPipeline(
+        'persons_by_person_film_works',
+        settings.PERSONS_INDEX,
+        CHANGED_PERSON_FILM_WORKS_QUERY,
+        PERSON_IDS_BY_PERSON_FILM_WORKS_QUERY,
+        PERSONS_BY_IDS_QUERY,
+        transform_person,
+    ),
+    FanOutPipeline(
+        'movies_by_genre_film_works',
+        settings.MOVIES_INDEX,
+        CHANGED_GENRE_FILM_WORKS_QUERY,
+        FILM_IDS_BY_GENRE_FILM_WORKS_QUERY,
+        FILMS_BY_IDS_QUERY,
+        transform_film,
+    ),
+    # documents referencing deleted rows are rebuilt without them
+    FanOutPipeline(
+        'movies_by_deleted_persons',
+        settings.MOVIES_INDEX,
+        DELETED_PERSONS_QUERY,
+        FILM_IDS_BY_DELETED_PERSONS_QUERY,
+        FILMS_BY_IDS_QUERY,
+        transform_film,
+    ),
+    FanOutPipeline(
+        'movies_by_deleted_genres',
+        settings.MOVIES_INDEX,
+        DELETED_GENRES_QUERY,
+        FILM_IDS_BY_DELETED_GENRES_QUERY,
+        FILMS_BY_IDS_QUERY,
+        transform_film,
+    ),
+    FanOutPipeline(
+        'persons_by_deleted_movies',
+        settings.PERSONS_INDEX,
+        DELETED_FILM_WORKS_QUERY,
+        PERSON_IDS_BY_DELETED_FILM_WORKS_QUERY,
+        PERSONS_BY_IDS_QUERY,
+        transform_person,
+    ),
+    FanOutPipeline(
+        'movies_by_deleted_person_film_works',
+        settings.MOVIES_INDEX,
+        DELETED_PERSON_FILM_WORKS_QUERY,
+        FILM_IDS_BY_DELETED_LINKS_QUERY,
+        FILMS_BY_IDS_QUERY,
+        transform_film,
+    ),
+    FanOutPipeline(
+        'persons_by_deleted_person_film_works',
+        settings.PERSONS_INDEX,
+        DELETED_PERSON_FILM_WORKS_QUERY,
+        PERSON_IDS_BY_DELETED_LINKS_QUERY,
+        PERSONS_BY_IDS_QUERY,
+        transform_person,
+    ),
+    FanOutPipeline(
+        'movies_by_deleted_genre_film_works',
+        settings.MOVIES_INDEX,
+        DELETED_GENRE_FILM_WORKS_QUERY,
+        FILM_IDS_BY_DELETED_LINKS_QUERY,
+        FILMS_BY_IDS_QUERY,
+        transform_film,
+    ),
+)
+
+DELETION_PIPELINES = (
+    DeletionPipeline('deleted_movies', settings.MOVIES_INDEX, DELETED_FILM_WORKS_QUERY),
+    DeletionPipeline('deleted_persons', settings.PERSONS_INDEX, DELETED_PERSONS_QUERY),
+    DeletionPipeline('deleted_genres', settings.GENRES_INDEX, DELETED_GENRES_QUERY),
+)
+
+
+def install_deleted_row_log(extractor: PostgresExtractor):
+    """Creates the log of deleted rows and its triggers once, deletes before it are not seen"""
+    if not extractor.fetch_all(DELETED_ROW_LOG_INSTALLED_QUERY, {})[0]['installed']:
+        with extractor.connection.cursor() as cursor:
+            cursor.execute(DELETED_ROW_LOG_SCHEMA)
+        extractor.connection.commit()
+
+
+@backoff((psycopg2.OperationalError, ElasticConnectionError, RedisConnectionError))
+def run_once(state: State):
+    dsn = {
+        'dbname': settings.DB_NAME,
+        'user': settings.POSTGRES_USER,
+        'password': settings.POSTGRES_PASSWORD,
+        'host': settings.POSTGRES_HOST,
+        'port': settings.POSTGRES_PORT,
+    }
+    es_url = f'http://{settings.ELASTIC_HOST}:{settings.ELASTIC_PORT}'
+    with (
+        closing(psycopg2.connect(**dsn)) as pg,
+        Elasticsearch(es_url) as es,
+        Redis(host=settings.REDIS_HOST, port=settings.REDIS_PORT) as rd,
+    ):
+        extractor = PostgresExtractor(pg, settings.BATCH_SIZE)
+        loader = ElasticsearchLoader(es, RedisPublisher(rd, settings.CACHE_INVALIDATION_CHANNEL))
+        install_deleted_row_log(extractor)
+        for pipeline in (*FAN_OUT_PIPELINES, *DELETION_PIPELINES):
+            pipeline.init_state(extractor, state)
+        for pipeline in (*PIPELINES, *FAN_OUT_PIPELINES, *DELETION_PIPELINES):
+            pipeline.run(extractor, loader, state)
+            pg.commit()
+
+
+def main():
+    state = State(JsonFileStorage(settings.STATE_FILE_PATH))
+    while True:
+        run_once(state)
+        time.sleep(settings.SLEEP_TIME_IN_SECONDS)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+from typing import Any, Callable
+
+from etl.core.logger import logger
+from etl.extract import PostgresExtractor
+from etl.load import ElasticsearchLoader
+from etl.queries import NOW_QUERY
+from etl.state import State
+
+INITIAL_WATERMARK = {'updated_at': '-infinity', 'id': ''}
+
+
+class Pipeline:
+    """Incrementally moves rows changed after the saved `(updated_at, id)` watermark into an index"""
+
+    def __init__(self, name: str, index: str, query: str, transform: Callable[[dict[str, Any]], dict[str, Any]]):
+        self.name = name
+        self.index = index
+        self.query = query
+        self.transform = transform
+
+    def run(self, extractor: PostgresExtractor, loader: ElasticsearchLoader, state: State) -> int:
+        watermark = state.get_state(self.name, INITIAL_WATERMARK)
+        loaded = 0
+        for rows in extractor.extract(self.query, watermark):
+            loaded += loader.load(self.index, [self.transform(row) for row in rows])
+            last = rows[-1]
+            state.set_state(self.name, {'updated_at': last['updated_at'].isoformat(), 'id': last['id']})
+
+        if loaded:
+            logger.info('%s: loaded %d documents into %s', self.name, loaded, self.index)
+        return loaded
+
+
+def _init_state(name: str, extractor: PostgresExtractor, state: State):
+    # a first full load of the base pipelines already covers everything changed before now
+    if state.get_state(name) is None:
+        now = extractor.fetch_all(NOW_QUERY, {})[0]['now']
+        state.set_state(name, {'updated_at': now.isoformat(), 'id': ''})
+
+
+class FanOutPipeline:
+    """Reindexes only the documents referencing rows changed after the saved watermark
+
+    producer yields changed row ids, enricher resolves them through link tables into document ids
+    with one `= ANY` query per batch, merger rebuilds those documents by ids. Producers of the
+    `deleted_row` log make documents losing a deleted person, genre or link be rebuilt without it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        index: str,
+        producer_query: str,
+        enricher_query: str,
+        merger_query: str,
+        transform: Callable[[dict[str, Any]], dict[str, Any]],
+    ):
+        self.name = name
+        self.index = index
+        self.producer_query = producer_query
+        self.enricher_query = enricher_query
+        self.merger_query = merger_query
+        self.transform = transform
+
+    def init_state(self, extractor: PostgresExtractor, state: State):
+        _init_state(self.name, extractor, state)
+
+    def run(self, extractor: PostgresExtractor, loader: ElasticsearchLoader, state: State) -> int:
+        watermark = state.get_state(self.name, INITIAL_WATERMARK)
+        loaded = 0
+        for rows in extractor.extract(self.producer_query, watermark):
+            changed_ids = [row['id'] for row in rows]
+            ids = [row['id'] for row in extractor.fetch_all(self.enricher_query, {'ids': changed_ids})]
+            for start in range(0, len(ids), extractor.batch_size):
+                docs = extractor.fetch_all(self.merger_query, {'ids': ids[start : start + extractor.batch_size]})
+                loaded += loader.load(self.index, [self.transform(doc) for doc in docs])
+            last = rows[-1]
+            state.set_state(self.name, {'updated_at': last['updated_at'].isoformat(), 'id': last['id']})
+
+        if loaded:
+            logger.info('%s: reindexed %d documents in %s', self.name, loaded, self.index)
+        return loaded
+
+
+class DeletionPipeline:
+    """Deletes the documents of rows deleted after the saved watermark
+
+    Deleted rows are read from the `deleted_row` log filled by the triggers of DELETED_ROW_LOG_SCHEMA.
+    """
+
+    def __init__(self, name: str, index: str, producer_query: str):
+        self.name = name
+        self.index = index
+        self.producer_query = producer_query
+
+    def init_state(self, extractor: PostgresExtractor, state: State):
+        _init_state(self.name, extractor, state)
+
+    def run(self, extractor: PostgresExtractor, loader: ElasticsearchLoader, state: State) -> int:
+        watermark = state.get_state(self.name, INITIAL_WATERMARK)
+        deleted = 0
+        for rows in extractor.extract(self.producer_query, watermark):
+            deleted += loader.delete(self.index, [row['row_id'] for row in rows])
+            last = rows[-1]
+            state.set_state(self.name, {'updated_at': last['updated_at'].isoformat(), 'id': last['id']})
+
+        if deleted:
+            logger.info('%s: deleted %d documents from %s', self.name, deleted, self.index)
+        return deleted
@@ -0,0 +1,14 @@
+import json
+
+from redis import Redis
+
+
+class RedisPublisher:
+    """Announces ids of reindexed documents so the API can evict cache entries containing them"""
+
+    def __init__(self, client: Redis, channel: str):
+        self.client = client
+        self.channel = channel
+
+    def publish(self, index: str, ids: list[str]):
+        self.client.publish(self.channel, json.dumps({'index': index, 'ids': ids}))
@@ -0,0 +1,220 @@
+_FILMS_SELECT = """
+SELECT
+    fw.id,
+    fw.title,
+    fw.description,
+    fw.rating,
+    fw.updated_at,
+    COALESCE(
+        jsonb_agg(DISTINCT jsonb_build_object('role', pfw.role, 'id', p.id, 'full_name', p.full_name))
+        FILTER (WHERE p.id IS NOT NULL),
+        '[]'
+    ) AS persons,
+    COALESCE(array_agg(DISTINCT g.name) FILTER (WHERE g.id IS NOT NULL), '{}') AS genres
+FROM film_work fw
+LEFT JOIN person_film_work pfw ON pfw.film_work_id = fw.id
+LEFT JOIN person p ON p.id = pfw.person_id
+LEFT JOIN genre_film_work gfw ON gfw.film_work_id = fw.id
+LEFT JOIN genre g ON g.id = gfw.genre_id
+"""
+
+_PERSONS_SELECT = """
+SELECT
+    p.id,
+    p.full_name,
+    p.updated_at,
+    COALESCE(
+        json_agg(json_build_object('id', pf.film_work_id, 'roles', pf.roles)) FILTER (WHERE pf.film_work_id IS NOT NULL),
+        '[]'
+    ) AS films
+FROM person p
+LEFT JOIN LATERAL (
+    SELECT pfw.film_work_id, array_agg(pfw.role ORDER BY pfw.role) AS roles
+    FROM person_film_work pfw
+    JOIN film_work fw ON fw.id = pfw.film_work_id
+    WHERE pfw.person_id = p.id
+    GROUP BY pfw.film_work_id
+) pf ON TRUE
+"""
+
+FILMS_QUERY = f"""{_FILMS_SELECT}
+WHERE (fw.updated_at, fw.id) > (%(updated_at)s::timestamptz, %(id)s)
+GROUP BY fw.id
+ORDER BY fw.updated_at, fw.id
+"""
+
+FILMS_BY_IDS_QUERY = f"""{_FILMS_SELECT}
+WHERE fw.id = ANY(%(ids)s)
+GROUP BY fw.id
+"""
+
+GENRES_QUERY = """
+SELECT g.id, g.name, g.updated_at
+FROM genre g
+WHERE (g.updated_at, g.id) > (%(updated_at)s::timestamptz, %(id)s)
+ORDER BY g.updated_at, g.id
+"""
+
+PERSONS_QUERY = f"""{_PERSONS_SELECT}
+WHERE (p.updated_at, p.id) > (%(updated_at)s::timestamptz, %(id)s)
+GROUP BY p.id
+ORDER BY p.updated_at, p.id
+"""
+
+PERSONS_BY_IDS_QUERY = f"""{_PERSONS_SELECT}
+WHERE p.id = ANY(%(ids)s)
+GROUP BY p.id
+"""
+
+# producers: ids of changed rows after the watermark
+
+CHANGED_PERSONS_QUERY = """
+SELECT id, updated_at
+FROM person
+WHERE (updated_at, id) > (%(updated_at)s::timestamptz, %(id)s)
+ORDER BY updated_at, id
+"""
+
+CHANGED_GENRES_QUERY = """
+SELECT id, updated_at
+FROM genre
+WHERE (updated_at, id) > (%(updated_at)s::timestamptz, %(id)s)
+ORDER BY updated_at, id
+"""
+
+CHANGED_PERSON_FILM_WORKS_QUERY = """
+SELECT id, created_at AS updated_at
+FROM person_film_work
+WHERE (created_at, id) > (%(updated_at)s::timestamptz, %(id)s)
+ORDER BY created_at, id
+"""
+
+CHANGED_GENRE_FILM_WORKS_QUERY = """
+SELECT id, created_at AS updated_at
+FROM genre_film_work
+WHERE (created_at, id) > (%(updated_at)s::timestamptz, %(id)s)
+ORDER BY created_at, id
+"""
+
+# enrichers: ids of documents referencing the changed rows
+
+FILM_IDS_BY_PERSONS_QUERY = """
+SELECT DISTINCT film_work_id AS id
+FROM person_film_work
+WHERE person_id = ANY(%(ids)s)
+"""
+
+FILM_IDS_BY_GENRES_QUERY = """
+SELECT DISTINCT film_work_id AS id
+FROM genre_film_work
+WHERE genre_id = ANY(%(ids)s)
+"""
+
+FILM_IDS_BY_PERSON_FILM_WORKS_QUERY = """
+SELECT DISTINCT film_work_id AS id
+FROM person_film_work
+WHERE id = ANY(%(ids)s)
+"""
+
+PERSON_IDS_BY_PERSON_FILM_WORKS_QUERY = """
+SELECT DISTINCT person_id AS id
+FROM person_film_work
+WHERE id = ANY(%(ids)s)
+"""
+
+FILM_IDS_BY_GENRE_FILM_WORKS_QUERY = """
+SELECT DISTINCT film_work_id AS id
+FROM genre_film_work
+WHERE id = ANY(%(ids)s)
+"""
+
+# deleted rows are logged by triggers, the ETL has no other way to see them
+
+DELETED_ROW_TABLES = ('film_work', 'person', 'genre', 'person_film_work', 'genre_film_work')
+
+DELETED_ROW_LOG_INSTALLED_QUERY = "SELECT to_regclass('deleted_row') IS NOT NULL AS installed"
+
+# one transaction, the log table exists only together with its triggers
+DELETED_ROW_LOG_SCHEMA = """
+CREATE TABLE IF NOT EXISTS deleted_row (
+    id TEXT PRIMARY KEY DEFAULT gen_random_uuid()::text,
+    table_name TEXT NOT NULL,
+    row_id TEXT NOT NULL,
+    film_work_id TEXT,
+    person_id TEXT,
+    genre_id TEXT,
+    deleted_at timestamp with time zone NOT NULL DEFAULT now()
+);
+CREATE INDEX IF NOT EXISTS deleted_row_table_name_deleted_at ON deleted_row (table_name, deleted_at, id);
+CREATE OR REPLACE FUNCTION log_deleted_row() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO deleted_row (table_name, row_id, film_work_id, person_id, genre_id)
+    VALUES (
+        TG_TABLE_NAME,
+        OLD.id,
+        to_jsonb(OLD) ->> 'film_work_id',
+        to_jsonb(OLD) ->> 'person_id',
+        to_jsonb(OLD) ->> 'genre_id'
+    );
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql;
+""" + ''.join(
+    f"""
+CREATE OR REPLACE TRIGGER {table}_deleted AFTER DELETE ON {table}
+FOR EACH ROW EXECUTE FUNCTION log_deleted_row();
+"""
+    for table in DELETED_ROW_TABLES
+)
+
+
+def deleted_rows_query(table: str) -> str:
+    """Producer of the log of rows deleted from `table`, `row_id` is the id of the deleted row"""
+    return f"""
+SELECT id, row_id, deleted_at AS updated_at
+FROM deleted_row
+WHERE table_name = '{table}' AND (deleted_at, id) > (%(updated_at)s::timestamptz, %(id)s)
+ORDER BY deleted_at, id
+"""
+
+
+DELETED_FILM_WORKS_QUERY = deleted_rows_query('film_work')
+DELETED_PERSONS_QUERY = deleted_rows_query('person')
+DELETED_GENRES_QUERY = deleted_rows_query('genre')
+DELETED_PERSON_FILM_WORKS_QUERY = deleted_rows_query('person_film_work')
+DELETED_GENRE_FILM_WORKS_QUERY = deleted_rows_query('genre_film_work')
+
+FILM_IDS_BY_DELETED_LINKS_QUERY = """
+SELECT DISTINCT film_work_id AS id
+FROM deleted_row
+WHERE id = ANY(%(ids)s)
+"""
+
+PERSON_IDS_BY_DELETED_LINKS_QUERY = """
+SELECT DISTINCT person_id AS id
+FROM deleted_row
+WHERE id = ANY(%(ids)s)
+"""
+
+FILM_IDS_BY_DELETED_PERSONS_QUERY = """
+SELECT DISTINCT pfw.film_work_id AS id
+FROM deleted_row d
+JOIN person_film_work pfw ON pfw.person_id = d.row_id
+WHERE d.id = ANY(%(ids)s)
+"""
+
+FILM_IDS_BY_DELETED_GENRES_QUERY = """
+SELECT DISTINCT gfw.film_work_id AS id
+FROM deleted_row d
+JOIN genre_film_work gfw ON gfw.genre_id = d.row_id
+WHERE d.id = ANY(%(ids)s)
+"""
+
+PERSON_IDS_BY_DELETED_FILM_WORKS_QUERY = """
+SELECT DISTINCT pfw.person_id AS id
+FROM deleted_row d
+JOIN person_film_work pfw ON pfw.film_work_id = d.row_id
+WHERE d.id = ANY(%(ids)s)
+"""
+
+NOW_QUERY = 'SELECT now() AS now'
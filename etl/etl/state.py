@@ -0,0 +1,34 @@
+import json
+import os
+from typing import Any
+
+
+class JsonFileStorage:
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+
+    def save_state(self, state: dict[str, Any]):
+        tmp_path = f'{self.file_path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.file_path)
+
+    def retrieve_state(self) -> dict[str, Any]:
+        try:
+            with open(self.file_path) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+
+class State:
+    def __init__(self, storage: JsonFileStorage):
+        self.storage = storage
+        self.state = storage.retrieve_state()
+
+    def set_state(self, key: str, value: Any):
+        self.state[key] = value
+        self.storage.save_state(self.state)
+
+    def get_state(self, key: str, default: Any = None) -> Any:
+        return self.state.get(key, default)
@@ -0,0 +1,43 @@
+from typing import Any
+
+ROLES = ('director', 'actor', 'writer')
+
+
+def suggest_inputs(text: str) -> list[str]:
+    """Completion suggester inputs, the text is suggested by a prefix starting at any of its words"""
+    words = text.split()
+    return [' '.join(words[i:]) for i in range(len(words))]
+
+
+def transform_film(row: dict[str, Any]) -> dict[str, Any]:
+    persons = {role: [] for role in ROLES}
+    for person in row['persons']:
+        persons[person['role']].append({'id': person['id'], 'full_name': person['full_name']})
+
+    return {
+        'id': row['id'],
+        'title': row['title'],
+        'suggest': suggest_inputs(row['title']),
+        'rating': row['rating'],
+        'description': row['description'],
+        'genres': sorted(row['genres']),
+        'directors_names': ', '.join(p['full_name'] for p in persons['director']),
+        'actors_names': ', '.join(p['full_name'] for p in persons['actor']),
+        'writers_names': ', '.join(p['full_name'] for p in persons['writer']),
+        'directors': persons['director'],
+        'actors': persons['actor'],
+        'writers': persons['writer'],
+    }
+
+
+def transform_genre(row: dict[str, Any]) -> dict[str, Any]:
+    return {'id': row['id'], 'name': row['name'], 'suggest': suggest_inputs(row['name'])}
+
+
+def transform_person(row: dict[str, Any]) -> dict[str, Any]:
+    return {
+        'id': row['id'],
+        'full_name': row['full_name'],
+        'suggest': suggest_inputs(row['full_name']),
+        'films': [{'id': film['id'], 'roles': film['roles']} for film in row['films']],
+    }
@@ -12,6 +12,12 @@ class FilmSortOption(StrEnum):
     neg_rating = '-rating'
 
 
+class FilmFacet(StrEnum):
+    genres = 'genres'
+    directors = 'directors'
+    actors = 'actors'
+
+
 class GenreSortOption(StrEnum):
     id = 'id'
     neg_id = '-id'
@@ -26,3 +32,8 @@ class PersonSortOption(StrEnum):
 
     full_name = 'full_name'
     neg_full_name = '-full_name'
+
+
+class FilterMode(StrEnum):
+    any = 'any'
+    all = 'all'
@@ -1,11 +1,18 @@
 from typing import Annotated
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
 
-from movies_api.api.v1.enums import FilmSortOption
-from movies_api.api.v1.schemas import Film
+from movies_api.api.v1.enums import FilmFacet, FilmSortOption, FilterMode
+from movies_api.api.v1.params import MAX_FILTER_VALUES, Name, get_search_after
+from movies_api.api.v1.schemas import Film, FilmsSearch, Uuids
+from movies_api.core.config import settings
+from movies_api.services.cache import tag_key
 from movies_api.services.film import FilmService, get_film_service
+from movies_api.services.pagination import next_cursor_headers
+from movies_api.services.response_cache import ResponseCache, get_film_response_cache
 
 router = APIRouter(prefix='/api/v1/films', tags=['films'])
 
@@ -17,46 +24,150 @@ router = APIRouter(prefix='/api/v1/films', tags=['films'])
     description='Get all films with filters, pagination and sorting',
 )
 async def list_films(
+    request: Request,
     sort: FilmSortOption = FilmSortOption.id,
     page_size: Annotated[int, Query(ge=0, le=100)] = 10,
     page_number: Annotated[int, Query(ge=0, le=100)] = 0,
-    genre: Annotated[str, Query(max_length=255, title='Genre name')] = '',
-    actor: Annotated[str, Query(max_length=255, title='Actor name')] = '',
-    writer: Annotated[str, Query(max_length=255, title='Writer name')] = '',
-    director: Annotated[str, Query(max_length=255, title='Director name')] = '',
+    search_after: list | None = Depends(get_search_after),
+    genre: Annotated[list[Name], Query(max_length=MAX_FILTER_VALUES, title='Genre name')] = [],
+    actor: Annotated[list[Name], Query(max_length=MAX_FILTER_VALUES, title='Actor name')] = [],
+    writer: Annotated[list[Name], Query(max_length=MAX_FILTER_VALUES, title='Writer name')] = [],
+    director: Annotated[list[Name], Query(max_length=MAX_FILTER_VALUES, title='Director name')] = [],
+    filter_mode: FilterMode = FilterMode.any,
     film_service: FilmService = Depends(get_film_service),
+    response_cache: ResponseCache = Depends(get_film_response_cache),
 ) -> list[Film]:
     """List of films"""
-    if not (films := await film_service.get_by_list(sort, page_size, page_number, genre, actor, writer, director)):
+    key = response_cache.key(
+        'films',
+        sort=sort,
+        page_size=page_size,
+        page_number=page_number,
+        search_after=search_after,
+        genre=genre,
+        actor=actor,
+        writer=writer,
+        director=director,
+        filter_mode=filter_mode,
+    )
+    if cached := await response_cache.get(request, key):
+        return cached
+    if not (
+        films := await film_service.get_by_list(
+            sort, page_size, page_number, genre, actor, writer, director, filter_mode, search_after
+        )
+    ):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='films not found')
-    return [Film(uuid=film.id, title=film.title, imdb_rating=film.rating) for film in films]
+    return await response_cache.respond(
+        request,
+        key,
+        [Film(uuid=film.id, title=film.title, imdb_rating=film.rating) for film in films],
+        [tag_key(settings.MOVIES_INDEX, film.id) for film in films],
+        next_cursor_headers(films, page_size),
+    )
 
 
 @router.get(
     '/search',
-    response_model=list[Film],
+    response_model=list[Film] | FilmsSearch,
     summary='Get all films of search query',
-    description='Get all films of search query with filters, pagination and sorting',
+    description='Get all films of search query with filters, pagination and sorting, '
+    'with the requested facets counted over all matching films',
 )
 async def search_films(
+    request: Request,
     query: Annotated[str, Query(max_length=255, title='Film title')] = '',
     sort: FilmSortOption = FilmSortOption.id,
     page_size: Annotated[int, Query(ge=0, le=100)] = 10,
     page_number: Annotated[int, Query(ge=0, le=100)] = 0,
-    genre: Annotated[str, Query(max_length=255, title='Genre name')] = '',
-    actor: Annotated[str, Query(max_length=255, title='Actor name')] = '',
-    writer: Annotated[str, Query(max_length=255, title='Writer name')] = '',
-    director: Annotated[str, Query(max_length=255, title='Director name')] = '',
+    search_after: list | None = Depends(get_search_after),
+    genre: Annotated[list[Name], Query(max_length=MAX_FILTER_VALUES, title='Genre name')] = [],
+    actor: Annotated[list[Name], Query(max_length=MAX_FILTER_VALUES, title='Actor name')] = [],
+    writer: Annotated[list[Name], Query(max_length=MAX_FILTER_VALUES, title='Writer name')] = [],
+    director: Annotated[list[Name], Query(max_length=MAX_FILTER_VALUES, title='Director name')] = [],
+    filter_mode: FilterMode = FilterMode.any,
+    facets: Annotated[list[FilmFacet], Query(title='Facets to count')] = [],
+    facet_size: Annotated[int, Query(ge=1, le=100)] = 10,
+    film_service: FilmService = Depends(get_film_service),
+    response_cache: ResponseCache = Depends(get_film_response_cache),
+) -> list[Film] | FilmsSearch:
+    """List of films with searching by title, with facets if requested"""
+    key = response_cache.key(
+        'films/search',
+        query=query,
+        sort=sort,
+        page_size=page_size,
+        page_number=page_number,
+        search_after=search_after,
+        genre=genre,
+        actor=actor,
+        writer=writer,
+        director=director,
+        filter_mode=filter_mode,
+        facets=sorted(facets),
+        facet_size=facet_size,
+    )
+    if cached := await response_cache.get(request, key):
+        return cached
+    args = (query, sort, page_size, page_number, genre, actor, writer, director, filter_mode, search_after)
+    if facets:
+        if not (result := await film_service.search_with_facets(*args, facets, facet_size)):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='films not found')
+        films, counts = result
+    elif not (films := await film_service.search_by_title(*args)):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='films not found')
+    content = [Film(uuid=film.id, title=film.title, imdb_rating=film.rating) for film in films]
+    return await response_cache.respond(
+        request,
+        key,
+        FilmsSearch(films=content, facets=counts) if facets else content,
+        [tag_key(settings.MOVIES_INDEX, film.id) for film in films],
+        next_cursor_headers(films, page_size),
+    )
+
+
+@router.post(
+    '/batch',
+    response_model=list[Film],
+    summary='Get films by uuids',
+    description='Get many films by uuids in one request',
+)
+async def films_batch(
+    batch: Uuids,
     film_service: FilmService = Depends(get_film_service),
 ) -> list[Film]:
-    """List of films with searching by title"""
-    if not (
-        films := await film_service.search_by_title(query, sort, page_size, page_number, genre, actor, writer, director)
-    ):
+    """List of films by uuids"""
+    if not (films := await film_service.get_by_ids(batch.uuids)):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='films not found')
     return [Film(uuid=film.id, title=film.title, imdb_rating=film.rating) for film in films]
 
 
+@router.get(
+    '/export',
+    response_class=StreamingResponse,
+    summary='Export films',
+    description='Stream all films matching the filters as NDJSON, one film per line',
+)
+async def export_films(
+    genre: Annotated[list[Name], Query(max_length=MAX_FILTER_VALUES, title='Genre name')] = [],
+    actor: Annotated[list[Name], Query(max_length=MAX_FILTER_VALUES, title='Actor name')] = [],
+    writer: Annotated[list[Name], Query(max_length=MAX_FILTER_VALUES, title='Writer name')] = [],
+    director: Annotated[list[Name], Query(max_length=MAX_FILTER_VALUES, title='Director name')] = [],
+    filter_mode: FilterMode = FilterMode.any,
+    film_service: FilmService = Depends(get_film_service),
+) -> StreamingResponse:
+    """All films as NDJSON"""
+
+    async def lines():
+        async for films in film_service.export(genre, actor, writer, director, filter_mode):
+            yield b''.join(
+                orjson.dumps(Film(uuid=film.id, title=film.title, imdb_rating=film.rating).model_dump()) + b'\n'
+                for film in films
+            )
+
+    return StreamingResponse(lines(), media_type='application/x-ndjson')
+
+
 @router.get(
     '/{uuid}/film',
     response_model=list[Film],
@@ -64,16 +175,30 @@ async def search_films(
     description='Get all films by uuid person with pagination and sorting',
 )
 async def person_films(
+    request: Request,
     uuid: UUID,
     sort: FilmSortOption = FilmSortOption.id,
     page_size: Annotated[int, Query(ge=0, le=100)] = 10,
     page_number: Annotated[int, Query(ge=0, le=100)] = 0,
+    search_after: list | None = Depends(get_search_after),
     film_service: FilmService = Depends(get_film_service),
+    response_cache: ResponseCache = Depends(get_film_response_cache),
 ) -> list[Film]:
     """List of films by person"""
-    if not (films := await film_service.get_films_by_person(uuid, sort, page_size, page_number)):
+    key = response_cache.key(
+        'films/person', uuid=uuid, sort=sort, page_size=page_size, page_number=page_number, search_after=search_after
+    )
+    if cached := await response_cache.get(request, key):
+        return cached
+    if not (films := await film_service.get_films_by_person(uuid, sort, page_size, page_number, search_after)):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='films not found')
-    return [Film(uuid=film.id, title=film.title, imdb_rating=film.rating) for film in films]
+    return await response_cache.respond(
+        request,
+        key,
+        [Film(uuid=film.id, title=film.title, imdb_rating=film.rating) for film in films],
+        [tag_key(settings.MOVIES_INDEX, film.id) for film in films] + [tag_key(settings.PERSONS_INDEX, uuid)],
+        next_cursor_headers(films, page_size),
+    )
 
 
 @router.get(
@@ -83,10 +208,20 @@ async def person_films(
     description='Get film by uuid',
 )
 async def film_details(
+    request: Request,
     uuid: UUID,
     film_service: FilmService = Depends(get_film_service),
+    response_cache: ResponseCache = Depends(get_film_response_cache),
 ) -> Film:
     """Single film by uuid"""
+    key = response_cache.key('film', uuid=uuid)
+    if cached := await response_cache.get(request, key):
+        return cached
     if not (film := await film_service.get_by_id(uuid)):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='film not found')
-    return Film(uuid=film.id, title=film.title, imdb_rating=film.rating)
+    return await response_cache.respond(
+        request,
+        key,
+        Film(uuid=film.id, title=film.title, imdb_rating=film.rating),
+        [tag_key(settings.MOVIES_INDEX, film.id)],
+    )
@@ -1,11 +1,16 @@
 from typing import Annotated
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 
 from movies_api.api.v1.enums import GenreSortOption
-from movies_api.api.v1.schemas import Genre
+from movies_api.api.v1.params import get_search_after
+from movies_api.api.v1.schemas import Genre, GenreStats, Uuids
+from movies_api.core.config import settings
+from movies_api.services.cache import index_tag_key, tag_key
 from movies_api.services.genre import GenreService, get_genre_service
+from movies_api.services.pagination import next_cursor_headers
+from movies_api.services.response_cache import ResponseCache, get_genre_response_cache
 
 router = APIRouter(prefix='/api/v1/genres', tags=['genres'])
 
@@ -17,15 +22,29 @@ router = APIRouter(prefix='/api/v1/genres', tags=['genres'])
     description='Get all genres with filters, pagination and sorting',
 )
 async def list_genres(
+    request: Request,
     sort: GenreSortOption = GenreSortOption.id,
     page_size: Annotated[int, Query(ge=0, le=100)] = 10,
     page_number: Annotated[int, Query(ge=0, le=100)] = 0,
+    search_after: list | None = Depends(get_search_after),
     genre_service: GenreService = Depends(get_genre_service),
+    response_cache: ResponseCache = Depends(get_genre_response_cache),
 ) -> list[Genre]:
     """List of genres"""
-    if not (genres := await genre_service.get_by_list(sort, page_size, page_number)):
+    key = response_cache.key(
+        'genres', sort=sort, page_size=page_size, page_number=page_number, search_after=search_after
+    )
+    if cached := await response_cache.get(request, key):
+        return cached
+    if not (genres := await genre_service.get_by_list(sort, page_size, page_number, search_after)):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='films not found')
-    return [Genre(uuid=genre.id, name=genre.name) for genre in genres]
+    return await response_cache.respond(
+        request,
+        key,
+        [Genre(uuid=genre.id, name=genre.name) for genre in genres],
+        [tag_key(settings.GENRES_INDEX, genre.id) for genre in genres],
+        next_cursor_headers(genres, page_size),
+    )
 
 
 @router.get(
@@ -35,14 +54,66 @@ async def list_genres(
     description='Get all genres of search query with pagination and sorting',
 )
 async def search_genres(
+    request: Request,
     query: Annotated[str, Query(max_length=255, title='Genre name')] = '',
     sort: GenreSortOption = GenreSortOption.id,
     page_size: Annotated[int, Query(ge=0, le=100)] = 10,
     page_number: Annotated[int, Query(ge=0, le=100)] = 0,
+    search_after: list | None = Depends(get_search_after),
     genre_service: GenreService = Depends(get_genre_service),
+    response_cache: ResponseCache = Depends(get_genre_response_cache),
 ) -> list[Genre]:
     """List of genres with searching by name"""
-    if not (genres := await genre_service.search_by_name(query, sort, page_size, page_number)):
+    key = response_cache.key(
+        'genres/search', query=query, sort=sort, page_size=page_size, page_number=page_number, search_after=search_after
+    )
+    if cached := await response_cache.get(request, key):
+        return cached
+    if not (genres := await genre_service.search_by_name(query, sort, page_size, page_number, search_after)):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='genres not found')
+    return await response_cache.respond(
+        request,
+        key,
+        [Genre(uuid=genre.id, name=genre.name) for genre in genres],
+        [tag_key(settings.GENRES_INDEX, genre.id) for genre in genres],
+        next_cursor_headers(genres, page_size),
+    )
+
+
+@router.get(
+    '/stats',
+    response_model=list[GenreStats],
+    summary='Get films count of genres',
+    description='Get number of films of every genre',
+)
+async def genres_stats(
+    request: Request,
+    genre_service: GenreService = Depends(get_genre_service),
+    response_cache: ResponseCache = Depends(get_genre_response_cache),
+) -> list[GenreStats]:
+    """Films count per genre"""
+    key = response_cache.key('genres/stats')
+    if cached := await response_cache.get(request, key):
+        return cached
+    if not (stats := await genre_service.get_stats()):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='genres not found')
+    return await response_cache.respond(
+        request, key, [GenreStats.model_validate(s) for s in stats], [index_tag_key(settings.MOVIES_INDEX)]
+    )
+
+
+@router.post(
+    '/batch',
+    response_model=list[Genre],
+    summary='Get genres by uuids',
+    description='Get many genres by uuids in one request',
+)
+async def genres_batch(
+    batch: Uuids,
+    genre_service: GenreService = Depends(get_genre_service),
+) -> list[Genre]:
+    """List of genres by uuids"""
+    if not (genres := await genre_service.get_by_ids(batch.uuids)):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='genres not found')
     return [Genre(uuid=genre.id, name=genre.name) for genre in genres]
 
@@ -54,10 +125,20 @@ async def search_genres(
     description='Get genre by uuid',
 )
 async def genre_details(
+    request: Request,
     uuid: UUID,
     genre_service: GenreService = Depends(get_genre_service),
+    response_cache: ResponseCache = Depends(get_genre_response_cache),
 ) -> Genre:
     """Single genre by uuid"""
+    key = response_cache.key('genre', uuid=uuid)
+    if cached := await response_cache.get(request, key):
+        return cached
     if not (genre := await genre_service.get_by_id(uuid)):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='genre not found')
-    return Genre(uuid=genre.id, name=genre.name)
+    return await response_cache.respond(
+        request,
+        key,
+        Genre(uuid=genre.id, name=genre.name),
+        [tag_key(settings.GENRES_INDEX, genre.id)],
+    )
@@ -0,0 +1,20 @@
+from typing import Annotated, Any
+
+from fastapi import HTTPException, Query, status
+from pydantic import StringConstraints
+
+from movies_api.services.pagination import InvalidCursor, decode_cursor
+
+# value of a filter parameter, filters take several values each
+Name = Annotated[str, StringConstraints(max_length=255)]
+MAX_FILTER_VALUES = 10
+
+
+def get_search_after(
+    cursor: Annotated[str, Query(max_length=1024, title='Cursor of the page, from X-Next-Cursor')] = '',
+) -> list[Any] | None:
+    """Sort values to continue after, pages by cursor instead of page_number when given"""
+    try:
+        return decode_cursor(cursor)
+    except InvalidCursor:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail='invalid cursor')
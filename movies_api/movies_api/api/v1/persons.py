@@ -1,11 +1,18 @@
 from typing import Annotated
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
 
-from movies_api.api.v1.enums import PersonSortOption
-from movies_api.api.v1.schemas import FilmRoles, Person
+from movies_api.api.v1.enums import FilterMode, PersonSortOption
+from movies_api.api.v1.params import MAX_FILTER_VALUES, Name, get_search_after
+from movies_api.api.v1.schemas import FilmRoles, Person, Uuids
+from movies_api.core.config import settings
+from movies_api.services.cache import tag_key
+from movies_api.services.pagination import next_cursor_headers
 from movies_api.services.person import PersonService, get_person_service
+from movies_api.services.response_cache import ResponseCache, get_person_response_cache
 
 router = APIRouter(prefix='/api/v1/persons', tags=['persons'])
 
@@ -17,25 +24,52 @@ router = APIRouter(prefix='/api/v1/persons', tags=['persons'])
     description='Get all persons with filters, pagination and sorting',
 )
 async def list_persons(
+    request: Request,
     sort: PersonSortOption = PersonSortOption.id,
     page_size: Annotated[int, Query(ge=0, le=100)] = 10,
     page_number: Annotated[int, Query(ge=0, le=100)] = 0,
-    actor: Annotated[str, Query(max_length=255, title='Actor name')] = '',
-    writer: Annotated[str, Query(max_length=255, title='Writer name')] = '',
-    director: Annotated[str, Query(max_length=255, title='Director name')] = '',
+    search_after: list | None = Depends(get_search_after),
+    actor: Annotated[list[Name], Query(max_length=MAX_FILTER_VALUES, title='Actor name')] = [],
+    writer: Annotated[list[Name], Query(max_length=MAX_FILTER_VALUES, title='Writer name')] = [],
+    director: Annotated[list[Name], Query(max_length=MAX_FILTER_VALUES, title='Director name')] = [],
+    filter_mode: FilterMode = FilterMode.any,
     person_service: PersonService = Depends(get_person_service),
+    response_cache: ResponseCache = Depends(get_person_response_cache),
 ) -> list[Person]:
     """List of persons"""
-    if not (persons := await person_service.get_by_list(sort, page_size, page_number, actor, writer, director)):
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='persons not found')
-    return [
-        Person(
-            uuid=person.id,
-            full_name=person.full_name,
-            films=[FilmRoles(uuid=film.id, roles=film.roles) for film in person.films],
+    key = response_cache.key(
+        'persons',
+        sort=sort,
+        page_size=page_size,
+        page_number=page_number,
+        search_after=search_after,
+        actor=actor,
+        writer=writer,
+        director=director,
+        filter_mode=filter_mode,
+    )
+    if cached := await response_cache.get(request, key):
+        return cached
+    if not (
+        persons := await person_service.get_by_list(
+            sort, page_size, page_number, actor, writer, director, filter_mode, search_after
         )
-        for person in persons
-    ]
+    ):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='persons not found')
+    return await response_cache.respond(
+        request,
+        key,
+        [
+            Person(
+                uuid=person.id,
+                full_name=person.full_name,
+                films=[FilmRoles(uuid=film.id, roles=film.roles) for film in person.films],
+            )
+            for person in persons
+        ],
+        [tag_key(settings.PERSONS_INDEX, person.id) for person in persons],
+        next_cursor_headers(persons, page_size),
+    )
 
 
 @router.get(
@@ -45,19 +79,68 @@ async def list_persons(
     description='Get all persons of search query with filters, pagination and sorting',
 )
 async def search_persons(
+    request: Request,
     query: Annotated[str, Query(max_length=255, title='Person full_name')] = '',
     sort: PersonSortOption = PersonSortOption.id,
     page_size: Annotated[int, Query(ge=0, le=100)] = 10,
     page_number: Annotated[int, Query(ge=0, le=100)] = 0,
-    actor: Annotated[str, Query(max_length=255, title='Actor name')] = '',
-    writer: Annotated[str, Query(max_length=255, title='Writer name')] = '',
-    director: Annotated[str, Query(max_length=255, title='Director name')] = '',
+    search_after: list | None = Depends(get_search_after),
+    actor: Annotated[list[Name], Query(max_length=MAX_FILTER_VALUES, title='Actor name')] = [],
+    writer: Annotated[list[Name], Query(max_length=MAX_FILTER_VALUES, title='Writer name')] = [],
+    director: Annotated[list[Name], Query(max_length=MAX_FILTER_VALUES, title='Director name')] = [],
+    filter_mode: FilterMode = FilterMode.any,
     person_service: PersonService = Depends(get_person_service),
+    response_cache: ResponseCache = Depends(get_person_response_cache),
 ) -> list[Person]:
     """List of persons with searching by full_name"""
-    persons = await person_service.search_by_full_name(query, sort, page_size, page_number, actor, writer, director)
+    key = response_cache.key(
+        'persons/search',
+        query=query,
+        sort=sort,
+        page_size=page_size,
+        page_number=page_number,
+        search_after=search_after,
+        actor=actor,
+        writer=writer,
+        director=director,
+        filter_mode=filter_mode,
+    )
+    if cached := await response_cache.get(request, key):
+        return cached
+    persons = await person_service.search_by_full_name(
+        query, sort, page_size, page_number, actor, writer, director, filter_mode, search_after
+    )
     if not persons:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='persons not found')
+    return await response_cache.respond(
+        request,
+        key,
+        [
+            Person(
+                uuid=person.id,
+                full_name=person.full_name,
+                films=[FilmRoles(uuid=film.id, roles=film.roles) for film in person.films],
+            )
+            for person in persons
+        ],
+        [tag_key(settings.PERSONS_INDEX, person.id) for person in persons],
+        next_cursor_headers(persons, page_size),
+    )
+
+
+@router.post(
+    '/batch',
+    response_model=list[Person],
+    summary='Get persons by uuids',
+    description='Get many persons by uuids in one request',
+)
+async def persons_batch(
+    batch: Uuids,
+    person_service: PersonService = Depends(get_person_service),
+) -> list[Person]:
+    """List of persons by uuids"""
+    if not (persons := await person_service.get_by_ids(batch.uuids)):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='persons not found')
     return [
         Person(
             uuid=person.id,
@@ -68,6 +151,38 @@ async def search_persons(
     ]
 
 
+@router.get(
+    '/export',
+    response_class=StreamingResponse,
+    summary='Export persons',
+    description='Stream all persons matching the filters as NDJSON, one person per line',
+)
+async def export_persons(
+    actor: Annotated[list[Name], Query(max_length=MAX_FILTER_VALUES, title='Actor name')] = [],
+    writer: Annotated[list[Name], Query(max_length=MAX_FILTER_VALUES, title='Writer name')] = [],
+    director: Annotated[list[Name], Query(max_length=MAX_FILTER_VALUES, title='Director name')] = [],
+    filter_mode: FilterMode = FilterMode.any,
+    person_service: PersonService = Depends(get_person_service),
+) -> StreamingResponse:
+    """All persons as NDJSON"""
+
+    async def lines():
+        async for persons in person_service.export(actor, writer, director, filter_mode):
+            yield b''.join(
+                orjson.dumps(
+                    Person(
+                        uuid=person.id,
+                        full_name=person.full_name,
+                        films=[FilmRoles(uuid=film.id, roles=film.roles) for film in person.films],
+                    ).model_dump()
+                )
+                + b'\n'
+                for person in persons
+            )
+
+    return StreamingResponse(lines(), media_type='application/x-ndjson')
+
+
 @router.get(
     '/{uuid}',
     response_model=Person,
@@ -75,14 +190,24 @@ async def search_persons(
     description='Get person by uuid',
 )
 async def person_details(
+    request: Request,
     uuid: UUID,
     person_service: PersonService = Depends(get_person_service),
+    response_cache: ResponseCache = Depends(get_person_response_cache),
 ) -> Person:
     """Single person by uuid"""
+    key = response_cache.key('person', uuid=uuid)
+    if cached := await response_cache.get(request, key):
+        return cached
     if not (person := await person_service.get_by_id(uuid)):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='person not found')
-    return Person(
-        uuid=person.id,
-        full_name=person.full_name,
-        films=[FilmRoles(uuid=film.id, roles=film.roles) for film in person.films],
+    return await response_cache.respond(
+        request,
+        key,
+        Person(
+            uuid=person.id,
+            full_name=person.full_name,
+            films=[FilmRoles(uuid=film.id, roles=film.roles) for film in person.films],
+        ),
+        [tag_key(settings.PERSONS_INDEX, person.id)],
     )
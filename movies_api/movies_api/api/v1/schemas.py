@@ -1,12 +1,12 @@
 from uuid import UUID
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class Film(BaseModel):
     uuid: UUID
     title: str
-    imdb_rating: float
+    imdb_rating: float | None = None
 
 
 class Genre(BaseModel):
@@ -23,3 +23,34 @@ class Person(BaseModel):
 class FilmRoles(BaseModel):
     uuid: UUID
     roles: list[str]
+
+
+class FacetBucket(BaseModel):
+    key: str
+    name: str | None = None
+    count: int
+
+
+class FilmsSearch(BaseModel):
+    films: list[Film]
+    facets: dict[str, list[FacetBucket]]
+
+
+class GenreStats(BaseModel):
+    name: str
+    films_count: int
+
+
+class Suggestion(BaseModel):
+    uuid: UUID
+    text: str
+
+
+class Suggestions(BaseModel):
+    films: list[Suggestion]
+    persons: list[Suggestion]
+    genres: list[Suggestion]
+
+
+class Uuids(BaseModel):
+    uuids: list[UUID] = Field(min_length=1, max_length=100)
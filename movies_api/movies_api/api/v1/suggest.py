@@ -0,0 +1,30 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Query, Request
+
+from movies_api.api.v1.schemas import Suggestions
+from movies_api.services.response_cache import ResponseCache, get_suggest_response_cache
+from movies_api.services.suggest import SuggestService, get_suggest_service
+
+router = APIRouter(prefix='/api/v1/suggest', tags=['suggest'])
+
+
+@router.get(
+    '/',
+    response_model=Suggestions,
+    summary='Get suggestions',
+    description='Get films titles, persons full names and genres names starting with the typed prefix',
+)
+async def suggest(
+    request: Request,
+    query: Annotated[str, Query(min_length=1, max_length=50, title='Typed prefix')],
+    size: Annotated[int, Query(ge=1, le=10)] = 5,
+    suggest_service: SuggestService = Depends(get_suggest_service),
+    response_cache: ResponseCache = Depends(get_suggest_response_cache),
+) -> Suggestions:
+    """Suggestions of each kind for a typed prefix"""
+    key = response_cache.key('suggest', query=' '.join(query.lower().split()), size=size)
+    if cached := await response_cache.get(request, key):
+        return cached
+    suggestions = await suggest_service.suggest(query, size)
+    return await response_cache.respond(request, key, Suggestions.model_validate(suggestions), [])
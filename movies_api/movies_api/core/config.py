@@ -11,15 +11,126 @@ class Settings(BaseSettings):
 
     REDIS_HOST: str = '127.0.0.1'
     REDIS_PORT: int = 6379
+    # requests wait up to the pool timeout for one of max connections instead of opening more
+    REDIS_MAX_CONNECTIONS: int = 64
+    REDIS_POOL_TIMEOUT_IN_SECONDS: float = 1
+    REDIS_SOCKET_TIMEOUT_IN_SECONDS: float = 1
+    REDIS_SOCKET_CONNECT_TIMEOUT_IN_SECONDS: float = 1
+    REDIS_HEALTH_CHECK_INTERVAL_IN_SECONDS: int = 30
+    # retries of commands failed on connection errors and timeouts, with exponential backoff, cache reads and
+    # writes are cut at CACHE_TIMEOUT_IN_SECONDS first, so there they only retry quickly dropped connections
+    REDIS_RETRIES: int = 2
+    REDIS_RETRY_BACKOFF_BASE_IN_SECONDS: float = 0.01
+    REDIS_RETRY_BACKOFF_CAP_IN_SECONDS: float = 0.1
+    # redis, sentinel, cluster or memory, nodes are `host:port` JSON lists
+    CACHE_BACKEND: str = 'redis'
+    REDIS_REPLICAS: list[str] = []
+    REDIS_SENTINELS: list[str] = []
+    REDIS_SENTINEL_SERVICE_NAME: str = 'mymaster'
+    REDIS_CLUSTER_NODES: list[str] = []
+    # replicas lag behind the primary, reads may return entries already evicted there
+    REDIS_READ_FROM_REPLICAS: bool = False
 
     ELASTIC_HOST: str = '127.0.0.1'
     ELASTIC_PORT: int = 9200
+    # urls of the cluster nodes as a JSON list, ELASTIC_HOST and ELASTIC_PORT are used when empty
+    ELASTIC_HOSTS: list[str] = []
+    ELASTIC_CONNECTIONS_PER_NODE: int = 64
+    ELASTIC_REQUEST_TIMEOUT_IN_SECONDS: float = 5
+    ELASTIC_MAX_RETRIES: int = 2
+    ELASTIC_RETRY_ON_TIMEOUT: bool = True
+    # discovery of the other nodes of the cluster from the configured ones
+    ELASTIC_SNIFF_ON_START: bool = False
+    ELASTIC_SNIFF_ON_NODE_FAILURE: bool = False
+    ELASTIC_HTTP_COMPRESS: bool = False
 
     BASE_DIR: str = os.getcwd()
 
-    FILM_CACHE_EXPIRE_IN_SECONDS: int = 60 * 5
-    GENRE_CACHE_EXPIRE_IN_SECONDS: int = 60 * 5
-    PERSON_CACHE_EXPIRE_IN_SECONDS: int = 60 * 5
+    FILM_CACHE_EXPIRE_IN_SECONDS: int = 60 * 60 * 6
+    GENRE_CACHE_EXPIRE_IN_SECONDS: int = 60 * 60 * 6
+    PERSON_CACHE_EXPIRE_IN_SECONDS: int = 60 * 60 * 6
+    SUGGEST_CACHE_EXPIRE_IN_SECONDS: int = 60
+
+    # cache values encoding: json or msgpack, compressed with none, zlib, zstd or lz4 when large enough
+    CACHE_SERIALIZER: str = 'json'
+    CACHE_COMPRESSION: str = 'zstd'
+    CACHE_COMPRESSION_LEVEL: int = 3
+    CACHE_COMPRESSION_MIN_BYTES: int = 1024
+    # list entries keep only the fields list endpoints respond with
+    CACHE_LIST_PROJECTION: bool = True
+
+    # opt-in cache of final response bodies served without models validation
+    RESPONSE_CACHE_ENABLED: bool = False
+
+    # Cache-Control of responses for clients and edge caches
+    FILM_HTTP_MAX_AGE_IN_SECONDS: int = 60
+    FILM_HTTP_STALE_WHILE_REVALIDATE_IN_SECONDS: int = 60 * 5
+    GENRE_HTTP_MAX_AGE_IN_SECONDS: int = 60 * 60
+    GENRE_HTTP_STALE_WHILE_REVALIDATE_IN_SECONDS: int = 60 * 60
+    PERSON_HTTP_MAX_AGE_IN_SECONDS: int = 60
+    PERSON_HTTP_STALE_WHILE_REVALIDATE_IN_SECONDS: int = 60 * 5
+    SUGGEST_HTTP_MAX_AGE_IN_SECONDS: int = 60
+    SUGGEST_HTTP_STALE_WHILE_REVALIDATE_IN_SECONDS: int = 60
+
+    # list and search entries are served stale for this long after soft expiry while being refreshed
+    CACHE_STALE_WHILE_REVALIDATE_IN_SECONDS: int = 60 * 10
+    # XFetch early refresh aggressiveness, 1 is the optimal default, more refreshes earlier
+    CACHE_XFETCH_BETA: float = 1.0
+
+    # per-worker cache of validated detail objects in front of Redis
+    FILM_LOCAL_CACHE_MAX_ITEMS: int = 10_000
+    FILM_LOCAL_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    FILM_LOCAL_CACHE_EXPIRE_IN_SECONDS: int = 60
+    GENRE_LOCAL_CACHE_MAX_ITEMS: int = 1_000
+    GENRE_LOCAL_CACHE_MAX_BYTES: int = 1024 * 1024
+    GENRE_LOCAL_CACHE_EXPIRE_IN_SECONDS: int = 60 * 60 * 6
+    PERSON_LOCAL_CACHE_MAX_ITEMS: int = 10_000
+    PERSON_LOCAL_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    PERSON_LOCAL_CACHE_EXPIRE_IN_SECONDS: int = 60
+    SUGGEST_LOCAL_CACHE_MAX_ITEMS: int = 10_000
+    SUGGEST_LOCAL_CACHE_MAX_BYTES: int = 16 * 1024 * 1024
+    SUGGEST_LOCAL_CACHE_EXPIRE_IN_SECONDS: int = 10
+
+    # coalescing of concurrent cache misses, across workers through a Redis lock when distributed
+    SINGLE_FLIGHT_DISTRIBUTED: bool = False
+    SINGLE_FLIGHT_LOCK_TIMEOUT_IN_SECONDS: float = 5
+    SINGLE_FLIGHT_POLL_INTERVAL_IN_SECONDS: float = 0.05
+
+    # deadline of one cache operation including its Redis retries, slower ones count as failures and are served
+    # as misses, it supersedes the socket timeout so a stalled Redis never holds a request longer than this
+    CACHE_TIMEOUT_IN_SECONDS: float = 0.25
+    # deadline of one Elasticsearch request across its retries, including the wait for a bulkhead slot
+    ELASTIC_TIMEOUT_IN_SECONDS: float = 10
+    # Elasticsearch requests in flight per worker
+    ELASTIC_MAX_CONCURRENCY: int = 32
+    # consecutive failures opening a circuit and seconds between probe calls while it is open
+    CIRCUIT_BREAKER_FAILURE_THRESHOLD: int = 5
+    CIRCUIT_BREAKER_RECOVERY_TIMEOUT_IN_SECONDS: float = 5
+    # opt-in: list and search entries are kept this long after the revalidation window to be served while
+    # Elasticsearch is down, every such entry stays in Redis that much longer
+    CACHE_STALE_IF_ERROR_IN_SECONDS: int = 0
+
+    CACHE_INVALIDATION_CHANNEL: str = 'cache-invalidation'
+
+    # documents per Elasticsearch page of the NDJSON export and how long its point in time lives between pages
+    EXPORT_BATCH_SIZE: int = 1000
+    EXPORT_KEEP_ALIVE: str = '1m'
+
+    # spans exporter: none, otlp, console or memory, and the share of traces started here that are sampled
+    TRACING_EXPORTER: str = 'none'
+    TRACING_OTLP_ENDPOINT: str = 'http://127.0.0.1:4318/v1/traces'
+    TRACING_SAMPLE_RATIO: float = 1.0
+
+    # cache warmup in background on startup: none, top rated films pages and details or the hot requests log,
+    # the log of the most requested urls is written on shutdown when its path is set
+    WARMUP_SOURCE: str = 'top'
+    WARMUP_HOT_LOG_PATH: str = ''
+    WARMUP_HOT_URLS: int = 1000
+    WARMUP_TOP_FILMS: int = 1000
+    WARMUP_PAGE_SIZE: int = 10
+    # requests in flight at once, so warmup does not take up the Elasticsearch slots of live requests,
+    # every worker warms up on its start, so Elasticsearch gets up to this many times the workers
+    WARMUP_CONCURRENCY: int = 4
 
     MOVIES_INDEX: str = 'movies'
     GENRES_INDEX: str = 'genres'
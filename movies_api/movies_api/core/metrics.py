@@ -0,0 +1,87 @@
+import os
+
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+
+# seconds, from sub-millisecond cache reads to requests hitting the deadlines
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+# bytes, from 64B to 16MiB
+SIZE_BUCKETS = tuple(4**i for i in range(3, 13))
+
+http_request_duration = Histogram(
+    'http_request_duration_seconds',
+    'Requests latency by route template',
+    ['method', 'route', 'status'],
+    buckets=LATENCY_BUCKETS,
+)
+http_response_size = Histogram(
+    'http_response_size_bytes',
+    'Response body sizes by route template, streamed responses are not counted',
+    ['route'],
+    buckets=SIZE_BUCKETS,
+)
+cache_lookups = Counter(
+    'cache_lookups_total',
+    'Cache lookups by key family and result: l1_hit, hit, stale, miss',
+    ['index', 'family', 'result'],
+)
+cache_value_size = Histogram(
+    'cache_value_size_bytes',
+    'Encoded sizes of cached values by key family',
+    ['index', 'family'],
+    buckets=SIZE_BUCKETS,
+)
+dependency_request_duration = Histogram(
+    'dependency_request_duration_seconds',
+    'Round-trip latency of cache and Elasticsearch requests',
+    ['dependency', 'operation'],
+    buckets=LATENCY_BUCKETS,
+)
+dependency_failures = Counter(
+    'dependency_failures_total',
+    'Failed cache and Elasticsearch requests by reason: error or rejected by the open circuit',
+    ['dependency', 'operation', 'reason'],
+)
+elastic_took = Histogram(
+    'elastic_took_seconds',
+    'Time Elasticsearch reports spent on the request, round-trip minus took is transport and client overhead',
+    ['operation'],
+    buckets=LATENCY_BUCKETS,
+)
+local_cache_lookups = Counter(
+    'local_cache_lookups_total',
+    'Lookups of the per-worker L1 caches by result: hit, miss',
+    ['cache', 'result'],
+)
+local_cache_items = Gauge(
+    'local_cache_items',
+    'Entries held by the per-worker L1 caches, summed over live workers',
+    ['cache'],
+    multiprocess_mode='livesum',
+)
+local_cache_bytes = Gauge(
+    'local_cache_bytes',
+    'Encoded sizes of the entries held by the per-worker L1 caches, summed over live workers',
+    ['cache'],
+    multiprocess_mode='livesum',
+)
+model_validation_duration = Histogram(
+    'model_validation_duration_seconds',
+    'Validation of documents fetched from the cache or Elasticsearch',
+    ['model'],
+    buckets=LATENCY_BUCKETS,
+)
+circuit_open = Gauge(
+    'circuit_breaker_open',
+    'Whether the circuit of a dependency is open',
+    ['name'],
+    multiprocess_mode='max',
+)
+
+
+def render() -> bytes:
+    """Metrics in the text format, aggregated over workers when PROMETHEUS_MULTIPROC_DIR is set"""
+    if 'PROMETHEUS_MULTIPROC_DIR' not in os.environ:
+        return generate_latest()
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry)
@@ -0,0 +1,45 @@
+from typing import Optional
+
+from opentelemetry import trace
+from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter, SimpleSpanProcessor, SpanExporter
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+
+from movies_api.core.config import settings
+
+# spans are dropped by the default no-op provider until tracing is set up
+tracer = trace.get_tracer('movies_api')
+
+span_exporter: Optional[SpanExporter] = None
+
+
+def create_span_exporter(name: str) -> Optional[SpanExporter]:
+    if name == 'otlp':
+        return OTLPSpanExporter(endpoint=settings.TRACING_OTLP_ENDPOINT)
+    if name == 'console':
+        return ConsoleSpanExporter()
+    if name == 'memory':
+        return InMemorySpanExporter()
+    return None
+
+
+def setup_tracing() -> Optional[TracerProvider]:
+    """Installs the provider exporting spans to TRACING_EXPORTER, tracing stays a no-op when it is none"""
+    global span_exporter
+    if not (span_exporter := create_span_exporter(settings.TRACING_EXPORTER)):
+        return None
+
+    provider = TracerProvider(
+        resource=Resource.create({'service.name': settings.PROJECT_NAME}),
+        sampler=ParentBased(TraceIdRatioBased(settings.TRACING_SAMPLE_RATIO)),
+    )
+    # the collector is exported to in background batches, console and memory synchronously for tests
+    if settings.TRACING_EXPORTER == 'otlp':
+        provider.add_span_processor(BatchSpanProcessor(span_exporter))
+    else:
+        provider.add_span_processor(SimpleSpanProcessor(span_exporter))
+    trace.set_tracer_provider(provider)
+    return provider
@@ -0,0 +1,286 @@
+import asyncio
+import random
+import time
+from abc import ABC, abstractmethod
+from typing import Any, AsyncIterator, Iterable, Optional
+
+from redis.asyncio import Redis
+from redis.asyncio.cluster import ClusterNode, RedisCluster
+from redis.asyncio.sentinel import Sentinel
+
+from movies_api.core.config import settings
+from movies_api.db.redis import create_redis, redis_options
+
+# deletes the lock only if it is still held by the caller
+RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+# returns the keys registered in a tag set and deletes it atomically
+POP_TAG_SCRIPT = """
+local keys = redis.call('smembers', KEYS[1])
+redis.call('del', KEYS[1])
+return keys
+"""
+
+Entry = tuple[str, bytes, Iterable[str]]
+
+
+class Cache(ABC):
+    """Storage of the cache tier
+
+    Values are bytes, each entry may be registered in tag sets whose keys are evicted together.
+    Implementations route reads to replicas when configured, writes always go to the primary.
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> bytes | None: ...
+
+    @abstractmethod
+    async def mget(self, keys: list[str]) -> list[bytes | None]: ...
+
+    @abstractmethod
+    async def set(
+        self, key: str, value: bytes, ex: int | None = None, px: int | None = None, nx: bool = False
+    ) -> bool: ...
+
+    @abstractmethod
+    async def exists(self, key: str) -> bool: ...
+
+    @abstractmethod
+    async def delete(self, *keys: str | bytes) -> int: ...
+
+    @abstractmethod
+    async def put_many(self, entries: Iterable[Entry], expire: int):
+        """Sets `(key, value, tags)` entries and registers every key in its tag sets"""
+
+    @abstractmethod
+    async def pop_tags(self, tags: list[str]) -> Iterable[bytes]:
+        """Deletes tag sets and returns the keys they registered"""
+
+    @abstractmethod
+    async def release_lock(self, key: str, token: str) -> bool: ...
+
+    @abstractmethod
+    async def publish(self, channel: str, message: bytes): ...
+
+    @abstractmethod
+    def subscribe(self, channel: str) -> AsyncIterator[bytes]: ...
+
+    @abstractmethod
+    async def aclose(self): ...
+
+
+class RedisCache(Cache):
+    """Standalone Redis or the master found by Sentinel, with optional read replicas"""
+
+    def __init__(self, primary: Redis, replicas: list[Redis] = ()):
+        self.primary = primary
+        self.replicas = list(replicas)
+
+    @property
+    def reader(self) -> Redis:
+        return random.choice(self.replicas) if self.replicas else self.primary
+
+    async def get(self, key: str) -> bytes | None:
+        return await self.reader.get(key)
+
+    async def mget(self, keys: list[str]) -> list[bytes | None]:
+        return await self.reader.mget(keys)
+
+    async def set(self, key: str, value: bytes, ex: int | None = None, px: int | None = None, nx: bool = False) -> bool:
+        return bool(await self.primary.set(key, value, ex=ex, px=px, nx=nx))
+
+    async def exists(self, key: str) -> bool:
+        return bool(await self.primary.exists(key))
+
+    async def delete(self, *keys: str | bytes) -> int:
+        return await self.primary.delete(*keys) if keys else 0
+
+    async def put_many(self, entries: Iterable[Entry], expire: int):
+        async with self.primary.pipeline(transaction=False) as pipe:
+            for key, value, tags in entries:
+                pipe.set(key, value, expire)
+                for tag in tags:
+                    pipe.sadd(tag, key)
+                    pipe.expire(tag, expire)
+            await pipe.execute()
+
+    async def pop_tags(self, tags: list[str]) -> Iterable[bytes]:
+        async with self.primary.pipeline(transaction=True) as pipe:
+            for tag in tags:
+                pipe.smembers(tag)
+            pipe.delete(*tags)
+            *members, _ = await pipe.execute()
+        return set().union(*members)
+
+    async def release_lock(self, key: str, token: str) -> bool:
+        return bool(await self.primary.eval(RELEASE_LOCK_SCRIPT, 1, key, token))
+
+    async def publish(self, channel: str, message: bytes):
+        await self.primary.publish(channel, message)
+
+    async def subscribe(self, channel: str) -> AsyncIterator[bytes]:
+        async with self.primary.pubsub(ignore_subscribe_messages=True) as pubsub:
+            await pubsub.subscribe(channel)
+            async for message in pubsub.listen():
+                yield message['data']
+
+    async def aclose(self):
+        for client in (self.primary, *self.replicas):
+            await client.aclose()
+
+
+class RedisClusterCache(RedisCache):
+    """Redis Cluster, reads go to replicas when the client reads from replicas
+
+    Multi-key commands are split by slot and tag sets are popped one by one, entity keys and their tag
+    sets share a hash tag so they live on the same node. Pub/sub goes through a plain client of one node,
+    the cluster broadcasts published messages to every node.
+    """
+
+    def __init__(self, cluster: RedisCluster, node: Redis):
+        super().__init__(cluster)
+        self.node = node
+
+    async def mget(self, keys: list[str]) -> list[bytes | None]:
+        return await self.primary.mget_nonatomic(keys)
+
+    async def pop_tags(self, tags: list[str]) -> Iterable[bytes]:
+        members = await asyncio.gather(*(self.primary.eval(POP_TAG_SCRIPT, 1, tag) for tag in tags))
+        return set().union(*members)
+
+    async def publish(self, channel: str, message: bytes):
+        await self.node.publish(channel, message)
+
+    async def subscribe(self, channel: str) -> AsyncIterator[bytes]:
+        async with self.node.pubsub(ignore_subscribe_messages=True) as pubsub:
+            await pubsub.subscribe(channel)
+            async for message in pubsub.listen():
+                yield message['data']
+
+    async def aclose(self):
+        await self.primary.aclose()
+        await self.node.aclose()
+
+
+class InMemoryCache(Cache):
+    """Process local stand-in of Redis for tests and benchmarks"""
+
+    def __init__(self):
+        self._values: dict[str, tuple[Any, float | None]] = {}
+        self._channels: dict[str, list[asyncio.Queue]] = {}
+
+    def _get(self, key: str) -> Any:
+        value, expire_at = self._values.get(key, (None, None))
+        if expire_at is not None and expire_at <= time.monotonic():
+            del self._values[key]
+            return None
+        return value
+
+    async def get(self, key: str) -> bytes | None:
+        return self._get(key)
+
+    async def mget(self, keys: list[str]) -> list[bytes | None]:
+        return [self._get(key) for key in keys]
+
+    async def set(self, key: str, value: bytes, ex: int | None = None, px: int | None = None, nx: bool = False) -> bool:
+        if nx and self._get(key) is not None:
+            return False
+        expire = ex if ex is not None else px / 1000 if px is not None else None
+        self._values[key] = (value, None if expire is None else time.monotonic() + expire)
+        return True
+
+    async def exists(self, key: str) -> bool:
+        return self._get(key) is not None
+
+    async def delete(self, *keys: str | bytes) -> int:
+        keys = [key.decode() if isinstance(key, bytes) else key for key in keys]
+        return sum(self._values.pop(key, None) is not None for key in keys)
+
+    async def put_many(self, entries: Iterable[Entry], expire: int):
+        expire_at = time.monotonic() + expire
+        for key, value, tags in entries:
+            self._values[key] = (value, expire_at)
+            for tag in tags:
+                members = self._get(tag) or set()
+                members.add(key.encode())
+                self._values[tag] = (members, expire_at)
+
+    async def pop_tags(self, tags: list[str]) -> Iterable[bytes]:
+        members = [self._get(tag) or set() for tag in tags]
+        await self.delete(*tags)
+        return set().union(*members)
+
+    async def release_lock(self, key: str, token: str) -> bool:
+        if self._get(key) != token:
+            return False
+        return bool(await self.delete(key))
+
+    async def publish(self, channel: str, message: bytes):
+        for queue in self._channels.get(channel, []):
+            queue.put_nowait(message)
+
+    async def subscribe(self, channel: str) -> AsyncIterator[bytes]:
+        queue = asyncio.Queue()
+        self._channels.setdefault(channel, []).append(queue)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self._channels[channel].remove(queue)
+
+    async def aclose(self):
+        self._values.clear()
+
+
+client: Optional[Cache] = None
+
+
+async def get_cache() -> Cache:
+    return client
+
+
+def _address(node: str) -> tuple[str, int]:
+    host, _, port = node.rpartition(':')
+    return host, int(port)
+
+
+def create_cache(**overrides) -> Cache:
+    """Cache of the configured CACHE_BACKEND, `overrides` are passed to the connections"""
+    if settings.CACHE_BACKEND == 'memory':
+        return InMemoryCache()
+
+    if settings.CACHE_BACKEND == 'sentinel':
+        options = redis_options(**overrides)
+        for pool_option in ('host', 'port', 'timeout'):
+            options.pop(pool_option)
+        sentinel = Sentinel([_address(node) for node in settings.REDIS_SENTINELS], **options)
+        primary = sentinel.master_for(settings.REDIS_SENTINEL_SERVICE_NAME)
+        replicas = (
+            [sentinel.slave_for(settings.REDIS_SENTINEL_SERVICE_NAME)] if settings.REDIS_READ_FROM_REPLICAS else []
+        )
+        return RedisCache(primary, replicas)
+
+    if settings.CACHE_BACKEND == 'cluster':
+        options = redis_options(**overrides)
+        for pool_option in ('host', 'port', 'timeout'):
+            options.pop(pool_option)
+        nodes = [_address(node) for node in settings.REDIS_CLUSTER_NODES] or [
+            (settings.REDIS_HOST, settings.REDIS_PORT)
+        ]
+        cluster = RedisCluster(
+            startup_nodes=[ClusterNode(host, port) for host, port in nodes],
+            read_from_replicas=settings.REDIS_READ_FROM_REPLICAS,
+            **options,
+        )
+        host, port = nodes[0]
+        return RedisClusterCache(cluster, create_redis(host=host, port=port, socket_timeout=None, max_connections=2))
+
+    replicas = [
+        create_redis(host=host, port=port, **overrides) for host, port in map(_address, settings.REDIS_REPLICAS)
+    ]
+    return RedisCache(create_redis(**overrides), replicas)
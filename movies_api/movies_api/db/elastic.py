@@ -2,8 +2,23 @@ from typing import Optional
 
 from elasticsearch import AsyncElasticsearch
 
+from movies_api.core.config import settings
+
 es: Optional[AsyncElasticsearch] = None
 
 
 async def get_elastic() -> AsyncElasticsearch:
     return es
+
+
+def create_elastic() -> AsyncElasticsearch:
+    return AsyncElasticsearch(
+        settings.ELASTIC_HOSTS or [f'http://{settings.ELASTIC_HOST}:{settings.ELASTIC_PORT}'],
+        connections_per_node=settings.ELASTIC_CONNECTIONS_PER_NODE,
+        request_timeout=settings.ELASTIC_REQUEST_TIMEOUT_IN_SECONDS,
+        max_retries=settings.ELASTIC_MAX_RETRIES,
+        retry_on_timeout=settings.ELASTIC_RETRY_ON_TIMEOUT,
+        sniff_on_start=settings.ELASTIC_SNIFF_ON_START,
+        sniff_on_node_failure=settings.ELASTIC_SNIFF_ON_NODE_FAILURE,
+        http_compress=settings.ELASTIC_HTTP_COMPRESS,
+    )
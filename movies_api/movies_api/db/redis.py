@@ -1,9 +1,32 @@
-from typing import Optional
+from typing import Any
 
-from redis.asyncio import Redis
+from redis.asyncio import BlockingConnectionPool, Redis
+from redis.backoff import ExponentialBackoff
+from redis.exceptions import ConnectionError, TimeoutError
+from redis.retry import Retry
 
-rd: Optional[Redis] = None
+from movies_api.core.config import settings
 
 
-async def get_redis() -> Redis:
-    return rd
+def redis_options(**overrides) -> dict[str, Any]:
+    backoff = ExponentialBackoff(
+        settings.REDIS_RETRY_BACKOFF_CAP_IN_SECONDS, settings.REDIS_RETRY_BACKOFF_BASE_IN_SECONDS
+    )
+    options = {
+        'host': settings.REDIS_HOST,
+        'port': settings.REDIS_PORT,
+        'max_connections': settings.REDIS_MAX_CONNECTIONS,
+        'timeout': settings.REDIS_POOL_TIMEOUT_IN_SECONDS,
+        'socket_timeout': settings.REDIS_SOCKET_TIMEOUT_IN_SECONDS,
+        'socket_connect_timeout': settings.REDIS_SOCKET_CONNECT_TIMEOUT_IN_SECONDS,
+        'socket_keepalive': True,
+        'health_check_interval': settings.REDIS_HEALTH_CHECK_INTERVAL_IN_SECONDS,
+        'retry': Retry(backoff, settings.REDIS_RETRIES),
+        'retry_on_error': [ConnectionError, TimeoutError],
+    }
+    return options | overrides
+
+
+def create_redis(**overrides) -> Redis:
+    """Bytes mode client, cached values are decoded by the cache codec"""
+    return Redis.from_pool(BlockingConnectionPool(**redis_options(**overrides)))
@@ -1,22 +1,46 @@
-from contextlib import asynccontextmanager
+import asyncio
+import time
+from contextlib import asynccontextmanager, suppress
 
-from elasticsearch import AsyncElasticsearch
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response, status
 from fastapi.responses import ORJSONResponse
-from redis.asyncio import Redis
+from opentelemetry import propagate
+from opentelemetry.trace import SpanKind
+from prometheus_client import CONTENT_TYPE_LATEST
 
-from movies_api.api.v1 import films, genres, persons
+from movies_api.api.v1 import films, genres, persons, suggest
+from movies_api.core import metrics, tracing
 from movies_api.core.config import settings
-from movies_api.db import elastic, redis
+from movies_api.db import cache, elastic
+from movies_api.services import warmup
+from movies_api.services.invalidation import listen_invalidations
+from movies_api.services.pagination import MAX_RESULT_WINDOW, InvalidCursor, PageOutOfRange
+from movies_api.services.resilience import DependencyUnavailable, FailSafeCache, GuardedElastic
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    redis.rd = Redis(host=settings.REDIS_HOST, port=settings.REDIS_PORT, decode_responses=True)
-    elastic.es = AsyncElasticsearch(f'http://{settings.ELASTIC_HOST}:{settings.ELASTIC_PORT}')
+    provider = tracing.setup_tracing()
+    cache.client = FailSafeCache(cache.create_cache())
+    elastic.es = GuardedElastic(elastic.create_elastic())
+    # pub/sub connection idles between messages, so it has no socket timeout
+    listener = cache.create_cache(socket_timeout=None, max_connections=2)
+    if settings.CACHE_BACKEND == 'memory':
+        listener = cache.client
+    invalidation = asyncio.create_task(listen_invalidations(listener))
+    warming = asyncio.create_task(warmup.warm(app))
     yield
-    await redis.rd.aclose()
+    for task in (warming, invalidation):
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    if settings.WARMUP_HOT_LOG_PATH:
+        warmup.hot_urls.dump(settings.WARMUP_HOT_LOG_PATH)
+    await listener.aclose()
+    await cache.client.aclose()
     await elastic.es.close()
+    if provider:
+        provider.shutdown()
 
 
 app = FastAPI(
@@ -26,6 +50,69 @@ app = FastAPI(
 )
 
 
+@app.exception_handler(DependencyUnavailable)
+async def dependency_unavailable_handler(request: Request, exc: DependencyUnavailable) -> ORJSONResponse:
+    return ORJSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={'detail': 'service unavailable'},
+        headers={'Retry-After': f'{settings.CIRCUIT_BREAKER_RECOVERY_TIMEOUT_IN_SECONDS:.0f}'},
+    )
+
+
+@app.exception_handler(InvalidCursor)
+async def invalid_cursor_handler(request: Request, exc: InvalidCursor) -> ORJSONResponse:
+    return ORJSONResponse(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, content={'detail': 'invalid cursor'})
+
+
+@app.exception_handler(PageOutOfRange)
+async def page_out_of_range_handler(request: Request, exc: PageOutOfRange) -> ORJSONResponse:
+    return ORJSONResponse(
+        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        content={'detail': f'(page_number + 1) * page_size must be at most {MAX_RESULT_WINDOW}, use cursor'},
+    )
+
+
+@app.middleware('http')
+async def observe_requests(request: Request, call_next) -> Response:
+    started = time.perf_counter()
+    # continues the trace of the caller when it sent traceparent
+    with tracing.tracer.start_as_current_span(
+        request.method, context=propagate.extract(request.headers), kind=SpanKind.SERVER
+    ) as span:
+        response = await call_next(request)
+        # route templates keep the labels bounded, unmatched paths share one label
+        route = route.path if (route := request.scope.get('route')) else 'unmatched'
+        if span.is_recording():
+            span.update_name(f'{request.method} {route}')
+            span.set_attributes(
+                {
+                    'http.request.method': request.method,
+                    'http.route': route,
+                    'http.response.status_code': response.status_code,
+                    'url.query': request.url.query,
+                }
+            )
+    # warmup requests are neither observed as traffic nor recorded as hot
+    if request.scope.get('warmup'):
+        return response
+    metrics.http_request_duration.labels(request.method, route, response.status_code).observe(
+        time.perf_counter() - started
+    )
+    if size := response.headers.get('content-length'):
+        metrics.http_response_size.labels(route).observe(int(size))
+    if settings.WARMUP_HOT_LOG_PATH and response.status_code == 200 and request.method == 'GET':
+        # only cached JSON responses are worth warming, not exports streamed from Elasticsearch nor metrics
+        if route != 'unmatched' and response.headers.get('content-type') == 'application/json':
+            warmup.hot_urls.record(f'{request.url.path}?{request.url.query}' if request.url.query else request.url.path)
+    return response
+
+
+@app.get('/metrics', include_in_schema=False)
+async def metrics_endpoint() -> Response:
+    return Response(metrics.render(), media_type=CONTENT_TYPE_LATEST)
+
+
 app.include_router(films.router)
 app.include_router(genres.router)
 app.include_router(persons.router)
+app.include_router(suggest.router)
@@ -8,13 +8,12 @@ from movies_api.models.persons import Actor, Director, Writer
 class Film(BaseModel):
     id: UUID
     title: str
-    rating: float | None
-    description: str | None
-    genres: list[str] | None
-    description: str | None
-    directors_names: str | None
-    actors_names: str | None
-    writers_names: str | None
-    directors: list[Director] | None
-    actors: list[Actor] | None
-    writers: list[Writer] | None
+    rating: float | None = None
+    description: str | None = None
+    genres: list[str] | None = None
+    directors_names: str | None = None
+    actors_names: str | None = None
+    writers_names: str | None = None
+    directors: list[Director] | None = None
+    actors: list[Actor] | None = None
+    writers: list[Writer] | None = None
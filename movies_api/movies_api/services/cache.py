@@ -0,0 +1,102 @@
+import hashlib
+import math
+import random
+import time
+from typing import Any, Iterable
+
+import orjson
+from pydantic import BaseModel
+
+from movies_api.core.config import settings
+from movies_api.db.cache import Cache
+from movies_api.services.codec import codec
+from movies_api.services.resilience import elastic_breaker
+
+
+def entity_key(namespace: str, uuid: Any) -> str:
+    """Key of a cached entity, the id is a hash tag so the entity and its tag set share a cluster slot"""
+    return f'{namespace}:{{{uuid}}}'
+
+
+def _normalise(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {f'{name}': _normalise(v) for name, v in value.items()}
+    if isinstance(value, (set, frozenset)):
+        return sorted(f'{v}' for v in value)
+    if isinstance(value, (list, tuple)):
+        return [_normalise(v) for v in value]
+    return value
+
+
+def normalised_params(params: dict[str, Any]) -> bytes:
+    """JSON of the parameters independent of their order
+
+    Set values are sorted, so filters passed as sets are equal whatever the order and repetition of values.
+    """
+    return orjson.dumps(_normalise(params), option=orjson.OPT_SORT_KEYS)
+
+
+def params_key(namespace: str, endpoint: str, params: dict[str, Any]) -> str:
+    """`{namespace}:{endpoint}:{digest}` of the normalised parameters"""
+    return f'{namespace}:{endpoint}:{hashlib.blake2b(normalised_params(params), digest_size=16).hexdigest()}'
+
+
+def schema_version(model: type[BaseModel]) -> str:
+    """Digest of the model schema, entries cached before the model changed are never read"""
+    data = orjson.dumps(model.model_json_schema(), option=orjson.OPT_SORT_KEYS)
+    return hashlib.blake2b(data, digest_size=4).hexdigest()
+
+
+def tag_key(index: str, uuid: Any) -> str:
+    return f'tag:{index}:{{{uuid}}}'
+
+
+def index_tag_key(index: str) -> str:
+    """Tag of entries depending on every document of the index, evicted by a change of any of them"""
+    return tag_key(index, '*')
+
+
+async def put_to_cache(redis: Cache, key: str, value: bytes, expire: int, tags: Iterable[str]):
+    """Sets the cache entry and registers its key in the tag set of every entity it contains"""
+    await redis.put_many([(key, value, tags)], expire)
+
+
+async def put_many_to_cache(redis: Cache, entries: Iterable[tuple[str, bytes, Iterable[str]]], expire: int):
+    """Sets `(key, value, tags)` entries in one round-trip"""
+    await redis.put_many(entries, expire)
+
+
+async def invalidate(redis: Cache, index: str, ids: Iterable[Any]) -> int:
+    """Evicts every cache entry tagged by one of the changed entities, returns number of evicted keys"""
+    if not (tags := [tag_key(index, uuid) for uuid in ids]):
+        return 0
+    return await redis.delete(*await redis.pop_tags([*tags, index_tag_key(index)]))
+
+
+def pack_entry(data: Any, expire: int, delta: float) -> bytes:
+    """Wraps cached data with its soft expiry and the time it took to compute"""
+    return codec.encode({'expire_at': time.time() + expire, 'delta': delta, 'data': data})
+
+
+def entry_expire(expire: int) -> int:
+    """Hard expiry of an entry with soft `expire`, it outlives the revalidation window to be served on errors"""
+    return expire + settings.CACHE_STALE_WHILE_REVALIDATE_IN_SECONDS + settings.CACHE_STALE_IF_ERROR_IN_SECONDS
+
+
+def unpack_entry(value: str | bytes) -> tuple[Any, bool] | None:
+    """Returns cached data and whether it should be recomputed in background
+
+    Entries past the revalidation window are served only while the Elasticsearch circuit is open, None otherwise.
+    """
+    entry = codec.decode(value)
+    if not isinstance(entry, dict):
+        # entries written before soft expiry was introduced
+        return entry, True
+    if time.time() >= entry['expire_at'] + settings.CACHE_STALE_WHILE_REVALIDATE_IN_SECONDS:
+        return None if elastic_breaker.closed else (entry['data'], True)
+    return entry['data'], should_refresh(entry['expire_at'], entry['delta'])
+
+
+def should_refresh(expire_at: float, delta: float) -> bool:
+    """XFetch: recompute early with probability growing towards the soft expiry, sooner for slow computations"""
+    return time.time() - delta * settings.CACHE_XFETCH_BETA * math.log(random.random()) >= expire_at
@@ -0,0 +1,125 @@
+import zlib
+from functools import lru_cache
+from typing import Any
+
+import orjson
+
+from movies_api.core.config import settings
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+try:
+    import lz4.frame
+except ImportError:  # pragma: no cover
+    lz4 = None
+
+# header: magic, version, serializer id, compression id
+MAGIC = 0xCA
+VERSION = 1
+HEADER_SIZE = 4
+
+SERIALIZERS = {'json': 1, 'msgpack': 2}
+COMPRESSIONS = {'none': 0, 'zlib': 1, 'zstd': 2, 'lz4': 3}
+
+
+class CodecError(Exception):
+    pass
+
+
+def _dumps(serializer: int, obj: Any) -> bytes:
+    if serializer == SERIALIZERS['msgpack']:
+        return msgpack.packb(obj, default=str)
+    return orjson.dumps(obj)
+
+
+def _loads(serializer: int, data: bytes) -> Any:
+    if serializer == SERIALIZERS['msgpack']:
+        return msgpack.unpackb(data)
+    return orjson.loads(data)
+
+
+@lru_cache
+def _zstd_compressor(level: int) -> 'zstandard.ZstdCompressor':
+    return zstandard.ZstdCompressor(level=level)
+
+
+@lru_cache
+def _zstd_decompressor() -> 'zstandard.ZstdDecompressor':
+    return zstandard.ZstdDecompressor()
+
+
+def _compress(compression: int, data: bytes, level: int) -> bytes:
+    if compression == COMPRESSIONS['zstd']:
+        return _zstd_compressor(level).compress(data)
+    if compression == COMPRESSIONS['lz4']:
+        return lz4.frame.compress(data, compression_level=level)
+    return zlib.compress(data, level)
+
+
+def _decompress(compression: int, data: bytes) -> bytes:
+    if compression == COMPRESSIONS['zstd']:
+        return _zstd_decompressor().decompress(data)
+    if compression == COMPRESSIONS['lz4']:
+        return lz4.frame.decompress(data)
+    return zlib.decompress(data)
+
+
+class Codec:
+    """Encodes cache values with a versioned header, so values written by any configuration stay readable
+
+    Values shorter than `min_compress_size` are stored uncompressed, values without header are
+    plain json written before the codec was introduced.
+    """
+
+    def __init__(self, serializer: str = 'json', compression: str = 'none', level: int = 3, min_compress_size: int = 0):
+        if serializer not in SERIALIZERS:
+            raise CodecError(f'unknown serializer {serializer}')
+        if compression not in COMPRESSIONS:
+            raise CodecError(f'unknown compression {compression}')
+        if serializer == 'msgpack' and msgpack is None:
+            raise CodecError('msgpack serializer requires msgpack package')
+        if compression == 'zstd' and zstandard is None:
+            raise CodecError('zstd compression requires zstandard package')
+        if compression == 'lz4' and lz4 is None:
+            raise CodecError('lz4 compression requires lz4 package')
+
+        self.serializer = SERIALIZERS[serializer]
+        self.compression = COMPRESSIONS[compression]
+        self.level = level
+        self.min_compress_size = min_compress_size
+
+    def encode(self, obj: Any) -> bytes:
+        data = _dumps(self.serializer, obj)
+        compression = COMPRESSIONS['none']
+        if self.compression and len(data) >= self.min_compress_size:
+            data = _compress(self.compression, data, self.level)
+            compression = self.compression
+        return bytes((MAGIC, VERSION, self.serializer, compression)) + data
+
+    def decode(self, value: bytes | str) -> Any:
+        if isinstance(value, str) or not value or value[0] != MAGIC:
+            return orjson.loads(value)
+        if value[1] != VERSION:
+            raise CodecError(f'unsupported cache value version {value[1]}')
+
+        serializer, compression = value[2], value[3]
+        data = memoryview(value)[HEADER_SIZE:]
+        if compression:
+            data = _decompress(compression, data)
+        return _loads(serializer, data)
+
+
+codec = Codec(
+    settings.CACHE_SERIALIZER,
+    settings.CACHE_COMPRESSION,
+    settings.CACHE_COMPRESSION_LEVEL,
+    settings.CACHE_COMPRESSION_MIN_BYTES,
+)
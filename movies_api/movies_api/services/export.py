@@ -0,0 +1,41 @@
+from typing import Any, AsyncIterator
+
+from elasticsearch import AsyncElasticsearch
+
+
+async def scan(
+    elastic: AsyncElasticsearch,
+    index: str,
+    query: dict[str, Any],
+    source: list[str] | dict[str, list[str]] | None = None,
+    batch_size: int = 1000,
+    keep_alive: str = '1m',
+) -> AsyncIterator[list[dict[str, Any]]]:
+    """Yields `_source` batches of all documents matching `query`
+
+    Pages with search_after over a point in time, so the batches are a consistent snapshot of the index
+    and only one batch is held in memory. The point in time is closed when the iteration stops.
+    """
+    pit = await elastic.open_point_in_time(index=index, keep_alive=keep_alive)
+    pit_id = pit['id']
+    body = {
+        'query': query,
+        'size': batch_size,
+        # cheapest total order of a point in time
+        'sort': [{'_shard_doc': 'asc'}],
+        'track_total_hits': False,
+    }
+    if source is not None:
+        body['_source'] = source
+    try:
+        while True:
+            docs = await elastic.search(body=body | {'pit': {'id': pit_id, 'keep_alive': keep_alive}})
+            if not (hits := docs['hits']['hits']):
+                return
+            yield [hit['_source'] for hit in hits]
+            if len(hits) < batch_size:
+                return
+            pit_id = docs.get('pit_id', pit_id)
+            body['search_after'] = hits[-1]['sort']
+    finally:
+        await elastic.close_point_in_time(id=pit_id)
@@ -1,52 +1,49 @@
-from functools import lru_cache
-from typing import Optional
+from functools import lru_cache, partial
+from typing import AsyncIterator, Sequence
 from uuid import UUID
 
-import orjson
-from elasticsearch import AsyncElasticsearch, NotFoundError
+from elasticsearch import AsyncElasticsearch
 from fastapi import Depends
-from redis.asyncio import Redis
 
-from movies_api.api.v1.enums import FilmSortOption
+from movies_api.api.v1.enums import FilmFacet, FilmSortOption, FilterMode
 from movies_api.core.config import settings
+from movies_api.db.cache import Cache, get_cache
 from movies_api.db.elastic import get_elastic
-from movies_api.db.redis import get_redis
 from movies_api.models.film import Film
-
-
-class FilmService:
-    def __init__(self, redis: Redis, elastic: AsyncElasticsearch):
-        self.redis = redis
-        self.elastic = elastic
-
-    async def get_by_id(self, uuid: UUID) -> Optional[Film]:
-        if not (film := await self._film_from_cache(uuid)):
-            if not (film := await self._get_film_from_elastic(uuid)):
-                return None
-            await self._put_film_to_cache(film)
-
-        return film
+from movies_api.services.cache import tag_key
+from movies_api.services.pagination import Page
+from movies_api.services.query import FilterField, bool_query, compile_filters, search_body
+from movies_api.services.repository import CachedRepository
+
+
+class FilmService(CachedRepository[Film]):
+    model = Film
+    index = settings.MOVIES_INDEX
+    expire = settings.FILM_CACHE_EXPIRE_IN_SECONDS
+    list_fields = {'id', 'title', 'rating'}
+    # a person name is matched within one person of the film
+    filter_fields = {
+        'genre': FilterField('genres', exact=True),
+        'actor': FilterField('actors.full_name', path='actors'),
+        'writer': FilterField('writers.full_name', path='writers'),
+        'director': FilterField('directors.full_name', path='directors'),
+    }
 
     async def get_by_list(
         self,
         sort: FilmSortOption,
         page_size: int,
         page_number: int,
-        genre: str,
-        actor: str,
-        writer: str,
-        director: str,
-    ) -> list[Film]:
-        if not (films := await self._films_from_cache(sort, page_size, page_number, genre, actor, writer, director)):
-            if not (
-                films := await self._get_films_from_elastic(
-                    sort, page_size, page_number, genre, actor, writer, director
-                )
-            ):
-                return None
-            await self._put_films_to_cache(films, sort, page_size, page_number, genre, actor, writer, director)
-
-        return films
+        genre: Sequence[str],
+        actor: Sequence[str],
+        writer: Sequence[str],
+        director: Sequence[str],
+        filter_mode: FilterMode = FilterMode.any,
+        search_after: list | None = None,
+    ) -> Page | None:
+        return await self.search_by_title(
+            '', sort, page_size, page_number, genre, actor, writer, director, filter_mode, search_after
+        )
 
     async def search_by_title(
         self,
@@ -54,159 +51,177 @@ class FilmService:
         sort: FilmSortOption,
         page_size: int,
         page_number: int,
-        genre: str,
-        actor: str,
-        writer: str,
-        director: str,
-    ) -> list[Film]:
-        if not (
-            films := await self._films_from_cache(query, sort, page_size, page_number, genre, actor, writer, director)
-        ):
-            if not (
-                films := await self._search_films_from_elastic(
-                    query, sort, page_size, page_number, genre, actor, writer, director
-                )
-            ):
-                return None
-            await self._put_films_to_cache(films, query, sort, page_size, page_number, genre, actor, writer, director)
-
-        return films
-
-    async def get_films_by_person(self, uuid: UUID, sort, page_size: int, page_number: int):
-        if not (films := await self._films_from_cache(uuid, sort, page_size, page_number)):
-            if not (films := await self._get_films_by_person_from_elastic(uuid, sort, page_size, page_number)):
-                return None
-            await self._put_films_to_cache(films, uuid, sort, page_size, page_number)
-
-        return films
-
-    async def _get_film_from_elastic(self, uuid: UUID) -> Optional[Film]:
-        try:
-            doc = await self.elastic.get(index=settings.MOVIES_INDEX, id=f'{uuid}')
-        except NotFoundError:
-            return None
-        return Film.model_validate(doc['_source'])
-
-    async def _get_films_from_elastic(
+        genre: Sequence[str],
+        actor: Sequence[str],
+        writer: Sequence[str],
+        director: Sequence[str],
+        filter_mode: FilterMode = FilterMode.any,
+        search_after: list | None = None,
+    ) -> Page | None:
+        args = (query, sort, page_size, page_number, genre, actor, writer, director, filter_mode, search_after)
+        filters = self._filters(genre, actor, writer, director, filter_mode)
+        body = self._search_body(query, sort, page_size, page_number, filters, search_after)
+        return await self.search('search' if query else 'list', self._params(*args), body)
+
+    async def search_with_facets(
         self,
+        query: str,
         sort: FilmSortOption,
         page_size: int,
         page_number: int,
-        genre: str,
-        actor: str,
-        writer: str,
-        director: str,
-    ) -> list[Film]:
-        filters = []
-
-        if genre:
-            filters.append({'match': {'genres': genre}})
-        if actor:
-            filters.append({'match': {'actors_names': actor}})
-        if writer:
-            filters.append({'match': {'writers_names': writer}})
-        if director:
-            filters.append({'match': {'directors_names': director}})
-
-        query = {'bool': {'must': filters}} if filters else {'match_all': {}}
-        order, row = ('desc', sort[1:]) if sort[0] == '-' else ('asc', sort)
-        sort = [{row: {'order': order}}]
-
-        body = {
-            'query': query,
-            'from': page_number,
-            'size': page_size,
+        genre: Sequence[str],
+        actor: Sequence[str],
+        writer: Sequence[str],
+        director: Sequence[str],
+        filter_mode: FilterMode,
+        search_after: list | None,
+        facets: Sequence[FilmFacet],
+        facet_size: int,
+    ) -> tuple[Page, dict[str, list[dict]]] | None:
+        facets = sorted({f'{facet}' for facet in facets})
+        args = (query, sort, page_size, page_number, genre, actor, writer, director, filter_mode, search_after)
+        filters = self._filters(genre, actor, writer, director, filter_mode)
+        body = self._search_body(query, sort, page_size, page_number, filters, search_after)
+        body['aggs'] = self._facets_aggs(facets, facet_size)
+        return await self.cached(
+            'search_facets',
+            self._params(*args) | {'facets': facets, 'facet_size': facet_size},
+            partial(self._search_faceted_films_from_elastic, body),
+            self._dump_faceted_films,
+            self._validate_faceted_films,
+        )
+
+    async def get_films_by_person(
+        self, uuid: UUID, sort: FilmSortOption, page_size: int, page_number: int, search_after: list | None = None
+    ) -> Page | None:
+        roles = [
+            {'nested': {'path': r, 'query': {'term': {f'{r}.id': f'{uuid}'}}}}
+            for r in ('actors', 'writers', 'directors')
+        ]
+        query = bool_query(filters=[{'bool': {'should': roles, 'minimum_should_match': 1}}])
+        body = search_body(query, sort, page_size, page_number, search_after, self.list_fields)
+        params = {
+            'person': uuid,
             'sort': sort,
+            'page_size': page_size,
+            'page_number': page_number,
+            'search_after': search_after,
         }
+        # a new film of the person changes this list, it is announced by the person id
+        return await self.search('person', params, body, [tag_key(settings.PERSONS_INDEX, uuid)])
 
-        docs = await self.elastic.search(index=settings.MOVIES_INDEX, body=body)
-        return [Film.model_validate(doc['_source']) for doc in docs['hits']['hits']]
-
-    async def _search_films_from_elastic(
+    async def export(
         self,
+        genre: Sequence[str],
+        actor: Sequence[str],
+        writer: Sequence[str],
+        director: Sequence[str],
+        filter_mode: FilterMode = FilterMode.any,
+    ) -> AsyncIterator[list[Film]]:
+        query = bool_query(filters=self._filters(genre, actor, writer, director, filter_mode))
+        async for films in self.scan(query, sorted(self.list_fields)):
+            yield films
+
+    @staticmethod
+    def _params(
         query: str,
         sort: FilmSortOption,
         page_size: int,
         page_number: int,
-        genre: str,
-        actor: str,
-        writer: str,
-        director: str,
-    ) -> list[Film]:
-        filters = [{'match': {'title': query}}] if query else []
-
-        if genre:
-            filters.append({'match': {'genres': genre}})
-        if actor:
-            filters.append({'match': {'actors_names': actor}})
-        if writer:
-            filters.append({'match': {'writers_names': writer}})
-        if director:
-            filters.append({'match': {'directors_names': director}})
-
-        query = {'bool': {'must': filters}} if filters else {'match_all': {}}
-        order, row = ('desc', sort[1:]) if sort[0] == '-' else ('asc', sort)
-        sort = [{row: {'order': order}}]
-
-        body = {
+        genre: Sequence[str],
+        actor: Sequence[str],
+        writer: Sequence[str],
+        director: Sequence[str],
+        filter_mode: FilterMode,
+        search_after: list | None,
+    ) -> dict:
+        return {
             'query': query,
-            'from': page_number,
-            'size': page_size,
             'sort': sort,
+            'page_size': page_size,
+            'page_number': page_number,
+            'genre': set(genre),
+            'actor': set(actor),
+            'writer': set(writer),
+            'director': set(director),
+            'filter_mode': filter_mode,
+            'search_after': search_after,
         }
 
-        docs = await self.elastic.search(index=settings.MOVIES_INDEX, body=body)
-        return [Film.model_validate(doc['_source']) for doc in docs['hits']['hits']]
-
-    async def _get_films_by_person_from_elastic(
-        self, uuid: UUID, sort: FilmSortOption, page_size: int, page_number: int
-    ):
-        filters = [
-            {'nested': {'path': r, 'query': {'match': {f'{r}.id': uuid}}}} for r in ('actors', 'writers', 'directors')
-        ]
-
-        query = {'bool': {'should': filters}}
-        order, row = ('desc', sort[1:]) if sort[0] == '-' else ('asc', sort)
-        sort = [{row: {'order': order}}]
-
-        body = {
-            'query': query,
-            'from': page_number,
-            'size': page_size,
-            'sort': sort,
-        }
-
-        docs = await self.elastic.search(index=settings.MOVIES_INDEX, body=body)
-        return [Film.model_validate(doc['_source']) for doc in docs['hits']['hits']]
-
-    async def _film_from_cache(self, uuid: UUID) -> Optional[Film]:
-        key = f'{settings.MOVIES_INDEX}:{uuid}'
-        if not (data := await self.redis.get(key)):
-            return None
-        film = Film.model_validate_json(data)
-        return film
-
-    async def _films_from_cache(self, *args) -> Optional[Film]:
-        key = f'{settings.MOVIES_INDEX}:' + ','.join(f'{arg}' for arg in args)
-        if not (data := await self.redis.get(key)):
+    def _search_body(
+        self,
+        query: str,
+        sort: FilmSortOption,
+        page_size: int,
+        page_number: int,
+        filters: list[dict],
+        search_after: list | None,
+    ) -> dict:
+        must = [{'match': {'title': query}}] if query else []
+        return search_body(bool_query(must, filters), sort, page_size, page_number, search_after, self.list_fields)
+
+    async def _search_faceted_films_from_elastic(self, body: dict) -> tuple[Page, dict[str, list[dict]]]:
+        docs = await self._search(body)
+        return self._page(docs['hits']['hits']), self._facets(docs.get('aggregations', {}))
+
+    def _dump_faceted_films(self, result: tuple[Page, dict[str, list[dict]]]) -> tuple[dict, list[str]]:
+        films, facets = result
+        data, tags = self._dump_page(films)
+        return {'films': data, 'facets': facets}, tags
+
+    def _validate_faceted_films(self, data: dict) -> tuple[Page, dict[str, list[dict]]] | None:
+        if isinstance(data['films'], list):
+            # pages cached before their sort values are read as misses
             return None
-        films = [Film.model_validate(f) for f in orjson.loads(data)]
-        return films
-
-    async def _put_film_to_cache(self, film: Film):
-        key = f'{settings.MOVIES_INDEX}:{film.id}'
-        value = film.model_dump_json()
-        await self.redis.set(key, value, settings.FILM_CACHE_EXPIRE_IN_SECONDS)
-
-    async def _put_films_to_cache(self, films: list[Film], *args):
-        key = f'{settings.MOVIES_INDEX}:' + ','.join(f'{arg}' for arg in args)
-        value = orjson.dumps([f.model_dump() for f in films])
-        await self.redis.set(key, value, settings.FILM_CACHE_EXPIRE_IN_SECONDS)
+        return self._validate_page(data['films']), data['facets']
+
+    @staticmethod
+    def _facets_aggs(facets: Sequence[FilmFacet], size: int) -> dict:
+        aggs = {}
+        for facet in facets:
+            if facet == FilmFacet.genres:
+                aggs[facet] = {'terms': {'field': 'genres', 'size': size}}
+                continue
+            # persons are counted by id, the name is taken from one of their nested documents
+            persons = {
+                'terms': {'field': f'{facet}.id', 'size': size},
+                'aggs': {'person': {'top_hits': {'size': 1, '_source': [f'{facet}.full_name']}}},
+            }
+            aggs[facet] = {'nested': {'path': facet}, 'aggs': {'persons': persons}}
+        return aggs
+
+    @staticmethod
+    def _facets(aggregations: dict) -> dict[str, list[dict]]:
+        facets = {}
+        for facet, agg in aggregations.items():
+            if facet == FilmFacet.genres:
+                facets[facet] = [{'key': b['key'], 'count': b['doc_count']} for b in agg['buckets']]
+                continue
+            facets[facet] = [
+                {
+                    'key': b['key'],
+                    'name': b['person']['hits']['hits'][0]['_source'].get('full_name'),
+                    'count': b['doc_count'],
+                }
+                for b in agg['persons']['buckets']
+            ]
+        return facets
+
+    def _filters(
+        self,
+        genre: Sequence[str],
+        actor: Sequence[str],
+        writer: Sequence[str],
+        director: Sequence[str],
+        filter_mode: FilterMode = FilterMode.any,
+    ) -> list[dict]:
+        values = {'genre': genre, 'actor': actor, 'writer': writer, 'director': director}
+        return compile_filters(self.filter_fields, values, filter_mode)
 
 
 @lru_cache
 def get_film_service(
-    redis: Redis = Depends(get_redis),
+    redis: Cache = Depends(get_cache),
     elastic: AsyncElasticsearch = Depends(get_elastic),
 ) -> FilmService:
     return FilmService(redis, elastic)
@@ -1,39 +1,31 @@
 from functools import lru_cache
 from typing import Optional
-from uuid import UUID
 
-import orjson
-from elasticsearch import AsyncElasticsearch, NotFoundError
+from elasticsearch import AsyncElasticsearch
 from fastapi import Depends
-from redis.asyncio import Redis
 
 from movies_api.api.v1.enums import GenreSortOption
 from movies_api.core.config import settings
+from movies_api.db.cache import Cache, get_cache
 from movies_api.db.elastic import get_elastic
-from movies_api.db.redis import get_redis
 from movies_api.models.genre import Genre
+from movies_api.services.cache import index_tag_key
+from movies_api.services.pagination import Page
+from movies_api.services.query import bool_query, search_body
+from movies_api.services.repository import CachedRepository
 
 
-class GenreService:
-    def __init__(self, redis: Redis, elastic: AsyncElasticsearch):
-        self.redis = redis
-        self.elastic = elastic
+class GenreService(CachedRepository[Genre]):
+    model = Genre
+    index = settings.GENRES_INDEX
+    expire = settings.GENRE_CACHE_EXPIRE_IN_SECONDS
+    # more than the genres of the catalogue, films per genre are counted for all of them
+    stats_size = 1000
 
-    async def get_by_id(self, uuid: UUID) -> Optional[Genre]:
-        if not (genre := await self._genre_from_cache(uuid)):
-            if not (genre := await self._get_genre_from_elastic(uuid)):
-                return None
-            await self._put_genre_to_cache(genre)
-
-        return genre
-
-    async def get_by_list(self, sort: GenreSortOption, page_size: int, page_number: int) -> list[Genre]:
-        if not (genres := await self._genres_from_cache(sort, page_size, page_number)):
-            if not (genres := await self._get_genres_from_elastic(sort, page_size, page_number)):
-                return None
-            await self._put_genres_to_cache(genres, sort, page_size, page_number)
-
-        return genres
+    async def get_by_list(
+        self, sort: GenreSortOption, page_size: int, page_number: int, search_after: list | None = None
+    ) -> Page | None:
+        return await self.search_by_name('', sort, page_size, page_number, search_after)
 
     async def search_by_name(
         self,
@@ -41,93 +33,43 @@ class GenreService:
         sort: GenreSortOption,
         page_size: int,
         page_number: int,
-    ) -> list[Genre]:
-        if not (genres := await self._genres_from_cache(query, sort, page_size, page_number)):
-            if not (genres := await self._search_genres_from_elastic(query, sort, page_size, page_number)):
-                return None
-            await self._put_genres_to_cache(genres)
-
-        return genres
-
-    async def _get_genre_from_elastic(self, uuid: UUID) -> Optional[Genre]:
-        try:
-            doc = await self.elastic.get(index=settings.GENRES_INDEX, id=f'{uuid}')
-        except NotFoundError:
-            return None
-        return Genre.model_validate(doc['_source'])
-
-    async def _get_genres_from_elastic(
-        self,
-        sort: GenreSortOption,
-        page_size: int,
-        page_number: int,
-    ) -> list[Genre]:
-        query = {'match_all': {}}
-        order, row = ('desc', sort[1:]) if sort[0] == '-' else ('asc', sort)
-        sort = [{row: {'order': order}}]
-
-        body = {
+        search_after: list | None = None,
+    ) -> Page | None:
+        family = 'search' if query else 'list'
+        params = {
             'query': query,
-            'from': page_number,
-            'size': page_size,
             'sort': sort,
+            'page_size': page_size,
+            'page_number': page_number,
+            'search_after': search_after,
         }
-
-        docs = await self.elastic.search(index=settings.GENRES_INDEX, body=body)
-        return [Genre.model_validate(doc['_source']) for doc in docs['hits']['hits']]
-
-    async def _search_genres_from_elastic(
-        self,
-        query: str,
-        sort: GenreSortOption,
-        page_size: int,
-        page_number: int,
-    ) -> list[Genre]:
-        filters = {'match': {'name': query}} if query else []
-
-        query = filters if filters else {'match_all': {}}
-        order, row = ('desc', sort[1:]) if sort[0] == '-' else ('asc', sort)
-        sort = [{row: {'order': order}}]
-
+        query = bool_query([{'match': {'name': query}}] if query else [])
+        body = search_body(query, sort, page_size, page_number, search_after)
+        return await self.search(family, params, body)
+
+    async def get_stats(self) -> Optional[list[dict]]:
+        # counts change with any film, the entry is evicted by every reindex of films
+        return await self.cached(
+            'stats',
+            {},
+            self._get_stats_from_elastic,
+            lambda stats: (stats, [index_tag_key(settings.MOVIES_INDEX)]),
+            list,
+        )
+
+    async def _get_stats_from_elastic(self) -> list[dict]:
         body = {
-            'query': query,
-            'from': page_number,
-            'size': page_size,
-            'sort': sort,
+            'size': 0,
+            'track_total_hits': False,
+            'aggs': {'genres': {'terms': {'field': 'genres', 'size': self.stats_size}}},
         }
-
-        docs = await self.elastic.search(index=settings.GENRES_INDEX, body=body)
-        return [Genre.model_validate(doc['_source']) for doc in docs['hits']['hits']]
-
-    async def _genre_from_cache(self, uuid: UUID) -> Optional[Genre]:
-        key = f'{settings.GENRES_INDEX}:{uuid}'
-        if not (data := await self.redis.get(key)):
-            return None
-
-        genre = Genre.model_validate_json(data)
-        return genre
-
-    async def _genres_from_cache(self, *args) -> list[Genre]:
-        key = f'{settings.GENRES_INDEX}:' + ','.join(f'{arg}' for arg in args)
-        if not (data := await self.redis.get(key)):
-            return None
-        genres = [Genre.model_validate(g) for g in orjson.loads(data)]
-        return genres
-
-    async def _put_genre_to_cache(self, genre: Genre):
-        key = f'{settings.GENRES_INDEX}:{genre.id}'
-        value = genre.model_dump_json()
-        await self.redis.set(key, value, settings.GENRE_CACHE_EXPIRE_IN_SECONDS)
-
-    async def _put_genres_to_cache(self, genres: list[Genre], *args):
-        key = f'{settings.GENRES_INDEX}:' + ','.join(f'{arg}' for arg in args)
-        value = orjson.dumps([g.model_dump() for g in genres])
-        await self.redis.set(key, value, settings.GENRE_CACHE_EXPIRE_IN_SECONDS)
+        docs = await self.elastic.search(index=settings.MOVIES_INDEX, body=body)
+        return [{'name': b['key'], 'films_count': b['doc_count']} for b in docs['aggregations']['genres']['buckets']]
 
 
 @lru_cache
 def get_genre_service(
-    redis: Redis = Depends(get_redis),
+    redis: Cache = Depends(get_cache),
     elastic: AsyncElasticsearch = Depends(get_elastic),
 ) -> GenreService:
     return GenreService(redis, elastic)
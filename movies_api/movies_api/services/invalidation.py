@@ -0,0 +1,34 @@
+import asyncio
+
+import orjson
+from redis.exceptions import RedisError
+
+from movies_api.core.config import settings
+from movies_api.core.logger import logger
+from movies_api.db.cache import Cache
+from movies_api.services.cache import invalidate
+from movies_api.services.local_cache import local_caches
+
+RECONNECT_DELAY_IN_SECONDS = 1
+
+
+async def listen_invalidations(redis: Cache):
+    """Evicts cached entries of entities announced by the ETL after reindexing"""
+    while True:
+        try:
+            async for message in redis.subscribe(settings.CACHE_INVALIDATION_CHANNEL):
+                try:
+                    event = orjson.loads(message)
+                    index, ids = f"{event['index']}", [f'{uuid}' for uuid in event['ids']]
+                except (orjson.JSONDecodeError, KeyError, TypeError) as e:
+                    # one malformed message must not stop the invalidation of the next ones
+                    logger.error('invalid invalidation message %r: %r', message[:200], e)
+                    continue
+                if local_cache := local_caches.get(index):
+                    for uuid in ids:
+                        local_cache.pop(uuid)
+                evicted = await invalidate(redis, index, ids)
+                logger.debug('evicted %d keys of %d changed %s', evicted, len(ids), index)
+        except RedisError as e:
+            logger.warning('invalidation listener failed: %s, reconnecting', e)
+            await asyncio.sleep(RECONNECT_DELAY_IN_SECONDS)
@@ -0,0 +1,96 @@
+import time
+from collections import OrderedDict
+from typing import Any
+
+from movies_api.core import metrics
+from movies_api.core.config import settings
+
+
+class LocalCache:
+    """In-process LRU of already validated objects bounded by entries count, total bytes and TTL
+
+    Lookups, entries and bytes are exported as metrics labelled by the cache `name`.
+    """
+
+    def __init__(self, name: str, max_items: int, max_bytes: int, expire: float):
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.expire = expire
+        self.size_bytes = 0
+        self._hits = metrics.local_cache_lookups.labels(name, 'hit')
+        self._misses = metrics.local_cache_lookups.labels(name, 'miss')
+        self._items_gauge = metrics.local_cache_items.labels(name)
+        self._bytes_gauge = metrics.local_cache_bytes.labels(name)
+        self._data: OrderedDict[str, tuple[float, int, Any]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: str) -> Any | None:
+        if (entry := self._data.get(key)) is None:
+            self._misses.inc()
+            return None
+
+        expire_at, _, value = entry
+        if expire_at < time.monotonic():
+            self.pop(key)
+            self._misses.inc()
+            return None
+
+        self._data.move_to_end(key)
+        self._hits.inc()
+        return value
+
+    def put(self, key: str, value: Any, size: int):
+        if size > self.max_bytes:
+            return
+
+        self.pop(key)
+        self._data[key] = (time.monotonic() + self.expire, size, value)
+        self.size_bytes += size
+        while len(self._data) > self.max_items or self.size_bytes > self.max_bytes:
+            _, (_, evicted_size, _) = self._data.popitem(last=False)
+            self.size_bytes -= evicted_size
+        self._observe()
+
+    def pop(self, key: str):
+        if (entry := self._data.pop(key, None)) is not None:
+            self.size_bytes -= entry[1]
+            self._observe()
+
+    def clear(self):
+        self._data.clear()
+        self.size_bytes = 0
+        self._observe()
+
+    def _observe(self):
+        self._items_gauge.set(len(self._data))
+        self._bytes_gauge.set(self.size_bytes)
+
+
+local_caches = {
+    settings.MOVIES_INDEX: LocalCache(
+        settings.MOVIES_INDEX,
+        settings.FILM_LOCAL_CACHE_MAX_ITEMS,
+        settings.FILM_LOCAL_CACHE_MAX_BYTES,
+        settings.FILM_LOCAL_CACHE_EXPIRE_IN_SECONDS,
+    ),
+    settings.GENRES_INDEX: LocalCache(
+        settings.GENRES_INDEX,
+        settings.GENRE_LOCAL_CACHE_MAX_ITEMS,
+        settings.GENRE_LOCAL_CACHE_MAX_BYTES,
+        settings.GENRE_LOCAL_CACHE_EXPIRE_IN_SECONDS,
+    ),
+    settings.PERSONS_INDEX: LocalCache(
+        settings.PERSONS_INDEX,
+        settings.PERSON_LOCAL_CACHE_MAX_ITEMS,
+        settings.PERSON_LOCAL_CACHE_MAX_BYTES,
+        settings.PERSON_LOCAL_CACHE_EXPIRE_IN_SECONDS,
+    ),
+    'suggest': LocalCache(
+        'suggest',
+        settings.SUGGEST_LOCAL_CACHE_MAX_ITEMS,
+        settings.SUGGEST_LOCAL_CACHE_MAX_BYTES,
+        settings.SUGGEST_LOCAL_CACHE_EXPIRE_IN_SECONDS,
+    ),
+}
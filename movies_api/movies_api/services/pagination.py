@@ -0,0 +1,86 @@
+import base64
+from typing import Any, Iterable
+
+import orjson
+
+# text fields are sorted by their keyword subfields
+SORT_FIELDS = {'title': 'title.raw', 'name': 'name.raw', 'full_name': 'full_name.raw'}
+# sort values of the other fields are strings
+NUMERIC_SORT_FIELDS = {'rating'}
+# sort values Elasticsearch sends for documents missing a numeric field
+MISSING_NUMBERS = ('Infinity', '-Infinity')
+# index.max_result_window of Elasticsearch, from + size of deeper pages is rejected
+MAX_RESULT_WINDOW = 10000
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class PageOutOfRange(ValueError):
+    pass
+
+
+class Page(list):
+    """Documents of a page with the sort values of its last hit, the next page starts after them"""
+
+    def __init__(self, docs: Iterable[Any] = (), last_sort: list[Any] | None = None):
+        super().__init__(docs)
+        self.last_sort = last_sort
+
+
+def sort_clause(sort: str) -> list[dict[str, Any]]:
+    order, row = ('desc', sort[1:]) if sort[0] == '-' else ('asc', sort)
+    clause = [{SORT_FIELDS.get(row, row): {'order': order}}]
+    if row != 'id':
+        # unique tiebreaker, otherwise search_after skips documents with equal sort values
+        clause.append({'id': {'order': 'asc'}})
+    return clause
+
+
+def page_clause(page_size: int, page_number: int, search_after: list[Any] | None) -> dict[str, Any]:
+    if search_after:
+        return {'size': page_size, 'search_after': search_after}
+    if (page_number + 1) * page_size > MAX_RESULT_WINDOW:
+        # deeper pages are reachable by cursor only
+        raise PageOutOfRange(page_number)
+    return {'size': page_size, 'from': page_number * page_size}
+
+
+def check_cursor(sort: str, values: list[Any]):
+    """Raises InvalidCursor unless `values` are one sort value of every clause of `sort`
+
+    A cursor of another sort or a forged one would be rejected by Elasticsearch.
+    """
+    fields = [field for clause in sort_clause(sort) for field in clause]
+    if len(values) != len(fields) or not all(map(_is_sort_value, fields, values)):
+        raise InvalidCursor(values)
+
+
+def _is_sort_value(field: str, value: Any) -> bool:
+    if field in NUMERIC_SORT_FIELDS:
+        return isinstance(value, (int, float)) and not isinstance(value, bool) or value in MISSING_NUMBERS
+    return isinstance(value, str)
+
+
+def encode_cursor(values: list[Any]) -> str:
+    return base64.urlsafe_b64encode(orjson.dumps(values)).decode()
+
+
+def decode_cursor(cursor: str) -> list[Any] | None:
+    if not cursor:
+        return None
+    try:
+        values = orjson.loads(base64.urlsafe_b64decode(cursor))
+    except ValueError as e:
+        raise InvalidCursor(cursor) from e
+    if not isinstance(values, list) or not values:
+        raise InvalidCursor(cursor)
+    return values
+
+
+def next_cursor_headers(page: Page, page_size: int) -> dict[str, str]:
+    """Cursor of the page after `page` made of the sort values of its last hit, if the page is full"""
+    if not page or len(page) < page_size or not page.last_sort:
+        return {}
+    return {'X-Next-Cursor': encode_cursor(page.last_sort)}
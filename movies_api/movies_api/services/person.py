@@ -1,49 +1,47 @@
 from functools import lru_cache
-from typing import Optional
-from uuid import UUID
+from typing import AsyncIterator, Sequence
 
-import orjson
-from elasticsearch import AsyncElasticsearch, NotFoundError
+from elasticsearch import AsyncElasticsearch
 from fastapi import Depends
-from redis.asyncio import Redis
 
-from movies_api.api.v1.enums import PersonSortOption
+from movies_api.api.v1.enums import FilterMode, PersonSortOption
 from movies_api.core.config import settings
+from movies_api.db.cache import Cache, get_cache
 from movies_api.db.elastic import get_elastic
-from movies_api.db.redis import get_redis
 from movies_api.models.persons import Person
+from movies_api.services.pagination import Page
+from movies_api.services.query import FilterField, bool_query, compile_filters, search_body
+from movies_api.services.repository import CachedRepository
 
 
-class PersonService:
-    def __init__(self, redis: Redis, elastic: AsyncElasticsearch):
-        self.redis = redis
-        self.elastic = elastic
+def _has_role(role: str) -> dict:
+    return {'nested': {'path': 'films', 'query': {'term': {'films.roles': role}}}}
 
-    async def get_by_id(self, uuid: UUID) -> Optional[Person]:
-        if not (person := await self._person_from_cache(uuid)):
-            if not (person := await self._get_person_from_elastic(uuid)):
-                return None
-            await self._put_person_to_cache(person)
 
-        return person
+class PersonService(CachedRepository[Person]):
+    model = Person
+    index = settings.PERSONS_INDEX
+    expire = settings.PERSON_CACHE_EXPIRE_IN_SECONDS
+    filter_fields = {
+        'actor': FilterField('full_name', also=_has_role('actor')),
+        'writer': FilterField('full_name', also=_has_role('writer')),
+        'director': FilterField('full_name', also=_has_role('director')),
+    }
 
     async def get_by_list(
         self,
         sort: PersonSortOption,
         page_size: int,
         page_number: int,
-        actor: str,
-        writer: str,
-        director: str,
-    ) -> list[Person]:
-        if not (persons := await self._persons_from_cache(sort, page_size, page_number, actor, writer, director)):
-            if not (
-                persons := await self._get_persons_from_elastic(sort, page_size, page_number, actor, writer, director)
-            ):
-                return None
-            await self._put_persons_to_cache(persons, sort, page_size, page_number, actor, writer, director)
-
-        return persons
+        actor: Sequence[str],
+        writer: Sequence[str],
+        director: Sequence[str],
+        filter_mode: FilterMode = FilterMode.any,
+        search_after: list | None = None,
+    ) -> Page | None:
+        return await self.search_by_full_name(
+            '', sort, page_size, page_number, actor, writer, director, filter_mode, search_after
+        )
 
     async def search_by_full_name(
         self,
@@ -51,159 +49,52 @@ class PersonService:
         sort: PersonSortOption,
         page_size: int,
         page_number: int,
-        actor: str,
-        writer: str,
-        director: str,
-    ):
-        if not (
-            persons := await self._persons_from_cache(query, sort, page_size, page_number, actor, writer, director)
-        ):
-            if not (
-                persons := await self._search_persons_from_elastic(
-                    query,
-                    sort,
-                    page_size,
-                    page_number,
-                    actor,
-                    writer,
-                    director,
-                )
-            ):
-                return None
-            await self._put_persons_to_cache(persons, query, sort, page_size, page_number, actor, writer, director)
-
-        return persons
-
-    async def _get_person_from_elastic(self, uuid: UUID) -> Optional[Person]:
-        try:
-            doc = await self.elastic.get(index=settings.PERSONS_INDEX, id=f'{uuid}')
-        except NotFoundError:
-            return None
-        return Person.model_validate(doc['_source'])
-
-    async def _get_persons_from_elastic(
-        self,
-        sort: PersonSortOption,
-        page_size: int,
-        page_number: int,
-        actor: str,
-        writer: str,
-        director: str,
-    ) -> list[Person]:
-        filters = []
-
-        if actor:
-            filters.extend(
-                (
-                    {'nested': {'path': 'films', 'query': {'match': {'films.roles': 'actor'}}}},
-                    {'match': {'full_name': actor}},
-                )
-            )
-        if writer:
-            filters.extend(
-                (
-                    {'nested': {'path': 'films', 'query': {'match': {'films.roles': 'writer'}}}},
-                    {'match': {'full_name': writer}},
-                )
-            )
-        if director:
-            filters.extend(
-                (
-                    {'nested': {'path': 'films', 'query': {'match': {'films.roles': 'director'}}}},
-                    {'match': {'full_name': director}},
-                )
-            )
-
-        query = {'bool': {'must': filters}} if filters else {'match_all': {}}
-        order, row = ('desc', sort[1:]) if sort[0] == '-' else ('asc', sort)
-        sort = [{row: {'order': order}}]
-
-        body = {
+        actor: Sequence[str],
+        writer: Sequence[str],
+        director: Sequence[str],
+        filter_mode: FilterMode = FilterMode.any,
+        search_after: list | None = None,
+    ) -> Page | None:
+        family = 'search' if query else 'list'
+        params = {
             'query': query,
-            'from': page_number,
-            'size': page_size,
             'sort': sort,
+            'page_size': page_size,
+            'page_number': page_number,
+            'actor': set(actor),
+            'writer': set(writer),
+            'director': set(director),
+            'filter_mode': filter_mode,
+            'search_after': search_after,
         }
+        must = [{'match': {'full_name': query}}] if query else []
+        query = bool_query(must, self._filters(actor, writer, director, filter_mode))
+        body = search_body(query, sort, page_size, page_number, search_after)
+        return await self.search(family, params, body)
 
-        docs = await self.elastic.search(index=settings.PERSONS_INDEX, body=body)
-        return [Person.model_validate(doc['_source']) for doc in docs['hits']['hits']]
-
-    async def _search_persons_from_elastic(
+    async def export(
         self,
-        query: str,
-        sort: PersonSortOption,
-        page_size: int,
-        page_number: int,
-        actor: str,
-        writer: str,
-        director: str,
-    ) -> list[Person]:
-        filters = [{'match': {'full_name': query}}] if query else []
-
-        if actor:
-            filters.extend(
-                (
-                    {'nested': {'path': 'films', 'query': {'match': {'films.roles': 'actor'}}}},
-                    {'match': {'full_name': actor}},
-                )
-            )
-        if writer:
-            filters.extend(
-                (
-                    {'nested': {'path': 'films', 'query': {'match': {'films.roles': 'writer'}}}},
-                    {'match': {'full_name': writer}},
-                )
-            )
-        if director:
-            filters.extend(
-                (
-                    {'nested': {'path': 'films', 'query': {'match': {'films.roles': 'director'}}}},
-                    {'match': {'full_name': director}},
-                )
-            )
-
-        query = {'bool': {'must': filters}} if filters else {'match_all': {}}
-        order, row = ('desc', sort[1:]) if sort[0] == '-' else ('asc', sort)
-        sort = [{row: {'order': order}}]
-
-        body = {
-            'query': query,
-            'from': page_number,
-            'size': page_size,
-            'sort': sort,
-        }
-
-        docs = await self.elastic.search(index=settings.PERSONS_INDEX, body=body)
-        return [Person.model_validate(doc['_source']) for doc in docs['hits']['hits']]
-
-    async def _person_from_cache(self, uuid: UUID) -> Optional[Person]:
-        key = f'{settings.PERSONS_INDEX}:{uuid}'
-        if not (data := await self.redis.get(key)):
-            return None
-
-        person = Person.model_validate_json(data)
-        return person
-
-    async def _persons_from_cache(self, *args) -> list[Person]:
-        key = f'{settings.PERSONS_INDEX}:' + ','.join(f'{arg}' for arg in args)
-        if not (data := await self.redis.get(key)):
-            return None
-        persons = [Person.model_validate(p) for p in orjson.loads(data)]
-        return persons
-
-    async def _put_person_to_cache(self, person: Person):
-        key = f'{settings.PERSONS_INDEX}:{person.id}'
-        value = person.model_dump_json()
-        await self.redis.set(key, value, settings.PERSON_CACHE_EXPIRE_IN_SECONDS)
-
-    async def _put_persons_to_cache(self, persons: list[Person], *args):
-        key = f'{settings.PERSONS_INDEX}:' + ','.join(f'{arg}' for arg in args)
-        value = orjson.dumps([p.model_dump() for p in persons])
-        await self.redis.set(key, value, settings.PERSON_CACHE_EXPIRE_IN_SECONDS)
+        actor: Sequence[str],
+        writer: Sequence[str],
+        director: Sequence[str],
+        filter_mode: FilterMode = FilterMode.any,
+    ) -> AsyncIterator[list[Person]]:
+        async for persons in self.scan(bool_query(filters=self._filters(actor, writer, director, filter_mode))):
+            yield persons
+
+    def _filters(
+        self,
+        actor: Sequence[str],
+        writer: Sequence[str],
+        director: Sequence[str],
+        filter_mode: FilterMode = FilterMode.any,
+    ) -> list[dict]:
+        values = {'actor': actor, 'writer': writer, 'director': director}
+        return compile_filters(self.filter_fields, values, filter_mode)
 
 
 @lru_cache
 def get_person_service(
-    redis: Redis = Depends(get_redis), elastic: AsyncElasticsearch = Depends(get_elastic)
+    redis: Cache = Depends(get_cache), elastic: AsyncElasticsearch = Depends(get_elastic)
 ) -> PersonService:
     return PersonService(redis, elastic)
@@ -0,0 +1,84 @@
+from typing import Any, Iterable, NamedTuple, Sequence
+
+from movies_api.api.v1.enums import FilterMode
+from movies_api.services.pagination import check_cursor, page_clause, sort_clause
+
+# fields of the documents only indexed for searching, no response returns them
+SOURCE_EXCLUDES = ['suggest']
+
+
+class FilterField(NamedTuple):
+    """How the values of a filter parameter are matched
+
+    `field` is matched as an exact term or as a full text with all its words, inside the nested documents of
+    `path` when set, so that one value is matched by one nested document. `also` is required once with any values.
+    """
+
+    field: str
+    exact: bool = False
+    path: str | None = None
+    also: dict[str, Any] | None = None
+
+
+def compile_filters(
+    fields: dict[str, FilterField], values: dict[str, Sequence[str]], mode: FilterMode = FilterMode.any
+) -> list[dict[str, Any]]:
+    """Filter clauses of the given parameters values, several values of one parameter are ORed or ANDed by `mode`"""
+    filters = []
+    for name, field in fields.items():
+        if not (terms := list(dict.fromkeys(values.get(name) or ()))):
+            continue
+        if field.also:
+            filters.append(field.also)
+        if field.exact and mode == FilterMode.any:
+            clauses = [{'terms': {field.field: terms}}]
+        else:
+            clauses = [_match(field, term) for term in terms]
+            if mode == FilterMode.any and len(clauses) > 1:
+                clauses = [{'bool': {'should': clauses, 'minimum_should_match': 1}}]
+        filters.extend({'nested': {'path': field.path, 'query': c}} if field.path else c for c in clauses)
+    return filters
+
+
+def _match(field: FilterField, term: str) -> dict[str, Any]:
+    if field.exact:
+        return {'term': {field.field: term}}
+    return {'match': {field.field: {'query': term, 'operator': 'and'}}}
+
+
+def bool_query(must: Iterable[dict[str, Any]] = (), filters: Iterable[dict[str, Any]] = ()) -> dict[str, Any]:
+    """Query scoring `must` clauses, `filters` are matched without scoring and cached by Elasticsearch"""
+    must, filters = list(must), list(filters)
+    if not must and not filters:
+        return {'match_all': {}}
+    query = {}
+    if must:
+        query['must'] = must
+    if filters:
+        query['filter'] = filters
+    return {'bool': query}
+
+
+def search_body(
+    query: dict[str, Any],
+    sort: str,
+    page_size: int,
+    page_number: int,
+    search_after: list[Any] | None = None,
+    source: Iterable[str] | None = None,
+) -> dict[str, Any]:
+    """Body of a page search, totals are not counted as no endpoint returns them"""
+    if search_after:
+        check_cursor(sort, search_after)
+    body = {
+        'query': query,
+        'sort': sort_clause(sort),
+        'track_total_hits': False,
+        **page_clause(page_size, page_number, search_after),
+    }
+    return body | {'_source': source_filter(source)}
+
+
+def source_filter(source: Iterable[str] | None = None) -> list[str] | dict[str, list[str]]:
+    """`_source` of the hits, the `source` fields or the documents without the fields only indexed for searching"""
+    return sorted(source) if source is not None else {'excludes': SOURCE_EXCLUDES}
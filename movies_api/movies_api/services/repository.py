@@ -0,0 +1,250 @@
+import time
+from functools import partial
+from typing import Any, AsyncIterator, Awaitable, Callable, Generic, Optional, Sequence, TypeVar
+from uuid import UUID
+
+from elasticsearch import AsyncElasticsearch, BadRequestError, NotFoundError
+from opentelemetry.trace import Span
+from pydantic import BaseModel
+
+from movies_api.core import metrics
+from movies_api.core.config import settings
+from movies_api.core.tracing import tracer
+from movies_api.db.cache import Cache
+from movies_api.services import export
+from movies_api.services.cache import (
+    entity_key,
+    entry_expire,
+    normalised_params,
+    pack_entry,
+    params_key,
+    put_many_to_cache,
+    put_to_cache,
+    schema_version,
+    tag_key,
+    unpack_entry,
+)
+from movies_api.services.codec import codec
+from movies_api.services.local_cache import local_caches
+from movies_api.services.pagination import InvalidCursor, Page
+from movies_api.services.query import SOURCE_EXCLUDES, source_filter
+from movies_api.services.single_flight import SingleFlight
+
+Model = TypeVar('Model', bound=BaseModel)
+T = TypeVar('T')
+
+
+class CachedRepository(Generic[Model]):
+    """Cache-aside access to the documents of one index
+
+    Details go through the per-worker L1 and the cache, results of searches are cached with soft expiry and
+    refreshed in background. Concurrent misses of a key are coalesced into one Elasticsearch request.
+    Keys are namespaced by the index and the model schema version, results are keyed by the endpoint and
+    a digest of its normalised parameters.
+    """
+
+    model: type[Model]
+    index: str
+    expire: int
+    # fields of documents in list responses, the only ones fetched and cached for lists
+    list_fields: set[str] | None = None
+
+    def __init__(self, redis: Cache, elastic: AsyncElasticsearch):
+        self.redis = redis
+        self.elastic = elastic
+        self.namespace = f'{self.index}:v{schema_version(self.model)}'
+        self.local_cache = local_caches[self.index]
+        self.single_flight = SingleFlight(redis, settings.SINGLE_FLIGHT_DISTRIBUTED)
+
+    async def get_by_id(self, uuid: UUID) -> Optional[Model]:
+        attributes = {'index': self.index, 'id': f'{uuid}'}
+        with tracer.start_as_current_span('repository.get_by_id', attributes=attributes) as span:
+            if doc := self.local_cache.get(f'{uuid}'):
+                self._lookup(span, 'detail', 'l1_hit')
+                return doc
+            if doc := await self._doc_from_cache(uuid):
+                self._lookup(span, 'detail', 'hit')
+            else:
+                self._lookup(span, 'detail', 'miss')
+                doc = await self.single_flight.do(
+                    entity_key(self.namespace, uuid),
+                    partial(self._load_doc, uuid),
+                    partial(self._doc_from_cache, uuid),
+                )
+
+            return doc
+
+    async def get_by_ids(self, uuids: list[UUID]) -> list[Model]:
+        uuids = list(dict.fromkeys(uuids))
+        with tracer.start_as_current_span('repository.get_by_ids', attributes={'index': self.index}) as span:
+            docs = {uuid: doc for uuid in uuids if (doc := self.local_cache.get(f'{uuid}'))}
+            self._lookup(span, 'detail', 'l1_hit', len(docs))
+            if missing := [uuid for uuid in uuids if uuid not in docs]:
+                found = await self._docs_by_ids_from_cache(missing)
+                self._lookup(span, 'detail', 'hit', len(found))
+                docs |= found
+            if missing := [uuid for uuid in uuids if uuid not in docs]:
+                self._lookup(span, 'detail', 'miss', len(missing))
+                if found := await self._get_docs_by_ids_from_elastic(missing):
+                    await self._put_docs_to_cache(found)
+                    docs |= {doc.id: doc for doc in found}
+
+            return [docs[uuid] for uuid in uuids if uuid in docs]
+
+    async def search(self, endpoint: str, params: dict[str, Any], body: dict, tags: Sequence[str] = ()) -> Page | None:
+        """Page of documents found by `body`, cached by the `endpoint` and `params` the body is built of
+
+        The entry is tagged by every found document and by `tags` of other entities changing the result.
+        """
+        return await self.cached(
+            endpoint,
+            params,
+            partial(self._search_docs_from_elastic, body),
+            partial(self._dump_page, tags=tags),
+            self._validate_page,
+        )
+
+    async def cached(
+        self,
+        endpoint: str,
+        params: dict[str, Any],
+        load: Callable[[], Awaitable[T]],
+        dump: Callable[[T], tuple[Any, list[str]]],
+        validate: Callable[[Any], T],
+    ) -> T | None:
+        """Result of `load` cached by the `endpoint` and `params`
+
+        `dump` returns data to cache and tags of the entry, `validate` builds the result back from cached data.
+        """
+        key = params_key(self.namespace, endpoint, params)
+        load = partial(self._load, endpoint, key, load, dump)
+        attributes = {'index': self.index, 'cache.family': endpoint, 'cache.key': key}
+        with tracer.start_as_current_span('repository.cached', attributes=attributes) as span:
+            if span.is_recording():
+                span.set_attribute('cache.params', normalised_params(params).decode())
+            data, stale = await self._entry_from_cache(key) or (None, False)
+            if data and (result := validate(data)):
+                if stale:
+                    # served while a background load refreshes it
+                    self.single_flight.refresh(key, load, partial(self._from_cache, key, validate))
+                self._lookup(span, endpoint, 'stale' if stale else 'hit')
+            else:
+                self._lookup(span, endpoint, 'miss')
+                result = await self.single_flight.do(key, load, partial(self._from_cache, key, validate))
+
+            return result or None
+
+    async def scan(self, query: dict, source: list[str] | None = None) -> AsyncIterator[list[Model]]:
+        batches = export.scan(
+            self.elastic,
+            self.index,
+            query,
+            source_filter(source),
+            settings.EXPORT_BATCH_SIZE,
+            settings.EXPORT_KEEP_ALIVE,
+        )
+        async for docs in batches:
+            yield self._validate_docs(docs)
+
+    async def _load_doc(self, uuid: UUID) -> Optional[Model]:
+        if doc := await self._get_doc_from_elastic(uuid):
+            await self._put_docs_to_cache([doc])
+        return doc
+
+    async def _load(
+        self, family: str, key: str, load: Callable[[], Awaitable[T]], dump: Callable[[T], tuple[Any, list[str]]]
+    ) -> T:
+        started = time.monotonic()
+        if result := await load():
+            data, tags = dump(result)
+            value = pack_entry(data, self.expire, time.monotonic() - started)
+            metrics.cache_value_size.labels(self.index, family).observe(len(value))
+            await put_to_cache(self.redis, key, value, entry_expire(self.expire), tags)
+        return result
+
+    async def _get_doc_from_elastic(self, uuid: UUID) -> Optional[Model]:
+        try:
+            doc = await self.elastic.get(index=self.index, id=f'{uuid}', _source_excludes=SOURCE_EXCLUDES)
+        except NotFoundError:
+            return None
+        return self._validate_docs([doc['_source']])[0]
+
+    async def _get_docs_by_ids_from_elastic(self, uuids: list[UUID]) -> list[Model]:
+        docs = await self.elastic.mget(
+            index=self.index, ids=[f'{uuid}' for uuid in uuids], _source_excludes=SOURCE_EXCLUDES
+        )
+        return self._validate_docs([doc['_source'] for doc in docs['docs'] if doc.get('found')])
+
+    async def _search_docs_from_elastic(self, body: dict) -> Page:
+        return self._page((await self._search(body))['hits']['hits'])
+
+    async def _search(self, body: dict) -> dict:
+        """Response of the search of the index, a page after values Elasticsearch rejects has an invalid cursor"""
+        try:
+            return await self.elastic.search(index=self.index, body=body)
+        except BadRequestError as e:
+            if 'search_after' in body:
+                raise InvalidCursor(body['search_after']) from e
+            raise
+
+    def _page(self, hits: list[dict]) -> Page:
+        return Page(self._validate_docs([hit['_source'] for hit in hits]), hits[-1].get('sort') if hits else None)
+
+    async def _doc_from_cache(self, uuid: UUID) -> Optional[Model]:
+        if not (data := await self.redis.get(entity_key(self.namespace, uuid))):
+            return None
+        doc = self._validate_docs([codec.decode(data)])[0]
+        self.local_cache.put(f'{uuid}', doc, len(data))
+        return doc
+
+    async def _docs_by_ids_from_cache(self, uuids: list[UUID]) -> dict[UUID, Model]:
+        keys = [entity_key(self.namespace, uuid) for uuid in uuids]
+        found = [(uuid, data) for uuid, data in zip(uuids, await self.redis.mget(keys)) if data]
+        docs = self._validate_docs([codec.decode(data) for _, data in found])
+        for (uuid, data), doc in zip(found, docs):
+            self.local_cache.put(f'{uuid}', doc, len(data))
+        return {uuid: doc for (uuid, _), doc in zip(found, docs)}
+
+    async def _from_cache(self, key: str, validate: Callable[[Any], T]) -> T | None:
+        data, _ = await self._entry_from_cache(key) or (None, False)
+        return validate(data) if data else None
+
+    async def _entry_from_cache(self, key: str) -> tuple[Any, bool] | None:
+        """Cached data and whether it is stale and should be refreshed"""
+        if not (data := await self.redis.get(key)):
+            return None
+        return unpack_entry(data)
+
+    async def _put_docs_to_cache(self, docs: list[Model]):
+        entries = []
+        for doc in docs:
+            value = codec.encode(doc.model_dump())
+            self.local_cache.put(f'{doc.id}', doc, len(value))
+            metrics.cache_value_size.labels(self.index, 'detail').observe(len(value))
+            entries.append((entity_key(self.namespace, doc.id), value, [tag_key(self.index, doc.id)]))
+        await put_many_to_cache(self.redis, entries, self.expire)
+
+    def _dump_docs(self, docs: list[Model], tags: Sequence[str] = ()) -> tuple[list[dict], list[str]]:
+        include = self.list_fields if settings.CACHE_LIST_PROJECTION else None
+        return [doc.model_dump(include=include) for doc in docs], [*(tag_key(self.index, d.id) for d in docs), *tags]
+
+    def _dump_page(self, page: Page, tags: Sequence[str] = ()) -> tuple[dict, list[str]]:
+        data, tags = self._dump_docs(page, tags)
+        return {'docs': data, 'last_sort': page.last_sort}, tags
+
+    def _validate_page(self, data: dict | list) -> Page:
+        if isinstance(data, list):
+            # pages cached before their sort values are read as misses
+            return Page()
+        return Page(self._validate_docs(data['docs']), data['last_sort'])
+
+    def _validate_docs(self, data: list[dict]) -> list[Model]:
+        attributes = {'model': self.model.__name__, 'count': len(data)}
+        with tracer.start_as_current_span('validate', attributes=attributes):
+            with metrics.model_validation_duration.labels(self.model.__name__).time():
+                return [self.model.model_validate(doc) for doc in data]
+
+    def _lookup(self, span: Span, family: str, result: str, count: int = 1):
+        """Counts lookups of the key family by result, the request span gets their number as `cache.{result}`"""
+        metrics.cache_lookups.labels(self.index, family, result).inc(count)
+        span.set_attribute(f'cache.{result}', count)
@@ -0,0 +1,241 @@
+import asyncio
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterable
+
+import orjson
+from elastic_transport import TransportError
+from elasticsearch import ApiError, AsyncElasticsearch
+from opentelemetry.trace import SpanKind, StatusCode
+from redis.exceptions import RedisError
+
+from movies_api.core import metrics
+from movies_api.core.config import settings
+from movies_api.core.logger import logger
+from movies_api.core.tracing import tracer
+from movies_api.db.cache import Cache, Entry
+
+# queries longer than this are cut in spans
+STATEMENT_MAX_BYTES = 4096
+
+
+class DependencyUnavailable(Exception):
+    """Dependency is skipped by its open circuit, has no free slot or missed the deadline"""
+
+
+class CircuitBreaker:
+    """Stops calling a failing dependency for a while
+
+    Opens after `failure_threshold` consecutive failures. While open one call per `recovery_timeout` is let
+    through as a probe, its success closes the circuit.
+    """
+
+    def __init__(self, name: str, failure_threshold: int, recovery_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.failures = 0
+        self.opened_at: float | None = None
+
+    @property
+    def closed(self) -> bool:
+        return self.opened_at is None
+
+    def allow(self) -> bool:
+        if self.opened_at is None:
+            return True
+        if time.monotonic() - self.opened_at < self.recovery_timeout:
+            return False
+        self.opened_at = time.monotonic()
+        return True
+
+    def success(self):
+        if self.opened_at is not None:
+            logger.warning('%s circuit closed', self.name)
+            metrics.circuit_open.labels(self.name).set(0)
+        self.failures = 0
+        self.opened_at = None
+
+    def failure(self):
+        self.failures += 1
+        if self.failures >= self.failure_threshold:
+            if self.opened_at is None:
+                logger.warning('%s circuit opened after %d failures', self.name, self.failures)
+                metrics.circuit_open.labels(self.name).set(1)
+            self.opened_at = time.monotonic()
+
+
+cache_breaker = CircuitBreaker(
+    'cache', settings.CIRCUIT_BREAKER_FAILURE_THRESHOLD, settings.CIRCUIT_BREAKER_RECOVERY_TIMEOUT_IN_SECONDS
+)
+elastic_breaker = CircuitBreaker(
+    'elasticsearch', settings.CIRCUIT_BREAKER_FAILURE_THRESHOLD, settings.CIRCUIT_BREAKER_RECOVERY_TIMEOUT_IN_SECONDS
+)
+
+
+class FailSafeCache(Cache):
+    """Cache whose failures and slow operations are treated as misses
+
+    Every operation has a deadline, failed ones are counted by the circuit breaker and return what an empty
+    cache would. While the circuit is open the cache is skipped and requests go straight to Elasticsearch.
+    """
+
+    def __init__(self, cache: Cache, breaker: CircuitBreaker = cache_breaker, timeout: float | None = None):
+        self.cache = cache
+        self.breaker = breaker
+        self.timeout = settings.CACHE_TIMEOUT_IN_SECONDS if timeout is None else timeout
+
+    async def _call(self, default: Any, method: Callable[..., Awaitable], *args, **kwargs) -> Any:
+        operation = method.__name__
+        if not self.breaker.allow():
+            metrics.dependency_failures.labels('cache', operation, 'rejected').inc()
+            return default
+        started = time.perf_counter()
+        attributes = {'db.system': 'redis', 'db.operation': operation}
+        with tracer.start_as_current_span(f'cache {operation}', kind=SpanKind.CLIENT, attributes=attributes) as span:
+            try:
+                async with asyncio.timeout(self.timeout):
+                    result = await method(*args, **kwargs)
+            except (RedisError, OSError, TimeoutError) as e:
+                self.breaker.failure()
+                metrics.dependency_failures.labels('cache', operation, 'error').inc()
+                logger.warning('cache %s failed: %r', operation, e)
+                span.set_status(StatusCode.ERROR, repr(e))
+                return default
+            finally:
+                metrics.dependency_request_duration.labels('cache', operation).observe(time.perf_counter() - started)
+        self.breaker.success()
+        return result
+
+    async def get(self, key: str) -> bytes | None:
+        return await self._call(None, self.cache.get, key)
+
+    async def mget(self, keys: list[str]) -> list[bytes | None]:
+        return await self._call([None] * len(keys), self.cache.mget, keys)
+
+    async def set(self, key: str, value: bytes, ex: int | None = None, px: int | None = None, nx: bool = False) -> bool:
+        return await self._call(False, self.cache.set, key, value, ex=ex, px=px, nx=nx)
+
+    async def exists(self, key: str) -> bool:
+        return await self._call(False, self.cache.exists, key)
+
+    async def delete(self, *keys: str | bytes) -> int:
+        return await self._call(0, self.cache.delete, *keys)
+
+    async def put_many(self, entries: Iterable[Entry], expire: int):
+        await self._call(None, self.cache.put_many, entries, expire)
+
+    async def pop_tags(self, tags: list[str]) -> Iterable[bytes]:
+        return await self._call((), self.cache.pop_tags, tags)
+
+    async def release_lock(self, key: str, token: str) -> bool:
+        return await self._call(False, self.cache.release_lock, key, token)
+
+    async def publish(self, channel: str, message: bytes):
+        await self._call(None, self.cache.publish, channel, message)
+
+    def subscribe(self, channel: str) -> AsyncIterator[bytes]:
+        return self.cache.subscribe(channel)
+
+    async def aclose(self):
+        await self.cache.aclose()
+
+
+def is_elastic_failure(e: Exception) -> bool:
+    """Connection errors, timeouts and server errors, not the client errors like a missing document"""
+    return isinstance(e, (TransportError, TimeoutError)) or isinstance(e, ApiError) and e.meta.status >= 500
+
+
+def _statement(kwargs: dict) -> dict[str, str]:
+    attributes = {'db.elasticsearch.index': f"{kwargs.get('index', '')}"}
+    if (statement := kwargs.get('body') or kwargs.get('searches')) is not None:
+        # bodies are built with enum keys, e.g. sort fields and facets
+        statement = orjson.dumps(statement, default=str, option=orjson.OPT_NON_STR_KEYS)
+        attributes['db.statement'] = statement[:STATEMENT_MAX_BYTES].decode(errors='ignore')
+    return attributes
+
+
+class GuardedElastic:
+    """Elasticsearch requests bounded by a bulkhead, a deadline and a circuit breaker
+
+    At most `max_concurrency` requests of the worker are in flight, the others wait for a slot within the same
+    deadline, so a slow cluster can not take up every connection and coroutine of the worker.
+    """
+
+    def __init__(
+        self,
+        elastic: AsyncElasticsearch,
+        breaker: CircuitBreaker = elastic_breaker,
+        max_concurrency: int | None = None,
+        timeout: float | None = None,
+    ):
+        self.elastic = elastic
+        self.breaker = breaker
+        self.bulkhead = asyncio.Semaphore(max_concurrency or settings.ELASTIC_MAX_CONCURRENCY)
+        self.timeout = settings.ELASTIC_TIMEOUT_IN_SECONDS if timeout is None else timeout
+
+    async def _call(self, method: Callable[..., Awaitable], *args, **kwargs) -> Any:
+        operation = method.__name__
+        if not self.breaker.allow():
+            metrics.dependency_failures.labels('elasticsearch', operation, 'rejected').inc()
+            raise DependencyUnavailable(f'{self.breaker.name} circuit is open')
+        started = time.perf_counter()
+        attributes = {'db.system': 'elasticsearch', 'db.operation': operation}
+        # missing documents are answers, only the failures below are errors of the span
+        with tracer.start_as_current_span(
+            f'elasticsearch {operation}',
+            kind=SpanKind.CLIENT,
+            attributes=attributes,
+            record_exception=False,
+            set_status_on_exception=False,
+        ) as span:
+            if span.is_recording():
+                span.set_attributes(_statement(kwargs))
+            try:
+                async with asyncio.timeout(self.timeout):
+                    async with self.bulkhead:
+                        # round-trip excludes the wait for a bulkhead slot
+                        sent = time.perf_counter()
+                        try:
+                            result = await method(*args, **kwargs)
+                        finally:
+                            metrics.dependency_request_duration.labels('elasticsearch', operation).observe(
+                                time.perf_counter() - sent
+                            )
+            except Exception as e:
+                if not is_elastic_failure(e):
+                    # the cluster answered, e.g. a document was not found
+                    self.breaker.success()
+                    raise
+                self.breaker.failure()
+                metrics.dependency_failures.labels('elasticsearch', operation, 'error').inc()
+                span.record_exception(e)
+                span.set_status(StatusCode.ERROR, repr(e))
+                raise DependencyUnavailable(
+                    f'{self.breaker.name} failed in {time.perf_counter() - started:.3f}s: {e!r}'
+                ) from e
+            if 'took' in result:
+                metrics.elastic_took.labels(operation).observe(result['took'] / 1000)
+                span.set_attribute('elasticsearch.took_ms', result['took'])
+        self.breaker.success()
+        return result
+
+    async def get(self, **kwargs) -> Any:
+        return await self._call(self.elastic.get, **kwargs)
+
+    async def mget(self, **kwargs) -> Any:
+        return await self._call(self.elastic.mget, **kwargs)
+
+    async def search(self, **kwargs) -> Any:
+        return await self._call(self.elastic.search, **kwargs)
+
+    async def msearch(self, **kwargs) -> Any:
+        return await self._call(self.elastic.msearch, **kwargs)
+
+    async def open_point_in_time(self, **kwargs) -> Any:
+        return await self._call(self.elastic.open_point_in_time, **kwargs)
+
+    async def close_point_in_time(self, **kwargs) -> Any:
+        return await self._call(self.elastic.close_point_in_time, **kwargs)
+
+    async def close(self):
+        await self.elastic.close()
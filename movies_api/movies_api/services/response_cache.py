@@ -0,0 +1,152 @@
+import hashlib
+from functools import lru_cache
+from typing import Any, Iterable, NamedTuple, Sequence
+
+import orjson
+from fastapi import Depends, Request, Response, status
+from opentelemetry import trace
+from pydantic import BaseModel
+
+from movies_api.api.v1 import schemas
+from movies_api.core import metrics
+from movies_api.core.config import settings
+from movies_api.core.tracing import tracer
+from movies_api.db.cache import Cache, get_cache
+from movies_api.services.cache import params_key, put_to_cache, schema_version
+
+
+class CachedResponse(NamedTuple):
+    etag: str
+    body: bytes
+    headers: dict[str, str] = {}
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    raise TypeError
+
+
+def _family(key: str) -> str:
+    return key.rsplit(':', 2)[1]
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {candidate.strip().removeprefix('W/') for candidate in if_none_match.split(',')}
+    return '*' in candidates or f'"{etag}"' in candidates
+
+
+class ResponseCache:
+    """Serialises responses of an endpoints family once, with a content hash ETag and Cache-Control
+
+    Requests with a matching If-None-Match get 304. When `enabled` bodies are also cached per normalised
+    query together with their ETag, hits skip models construction and serialisation. Keys are namespaced
+    by the schema versions of the response `models`, bodies of other models are never served.
+    """
+
+    def __init__(
+        self,
+        redis: Cache,
+        models: Sequence[type[BaseModel]],
+        enabled: bool,
+        expire: int,
+        max_age: int,
+        stale_while_revalidate: int,
+    ):
+        self.redis = redis
+        self.namespace = f'response:v{".".join(schema_version(model) for model in models)}'
+        self.enabled = enabled
+        self.expire = expire
+        self.cache_control = f'public, max-age={max_age}, stale-while-revalidate={stale_while_revalidate}'
+
+    def key(self, family: str, **params) -> str:
+        return params_key(self.namespace, family, params)
+
+    async def get(self, request: Request, key: str) -> Response | None:
+        if not self.enabled:
+            return None
+        family = _family(key)
+        span = trace.get_current_span()
+        if not (value := await self.redis.get(key)):
+            metrics.cache_lookups.labels('response', family, 'miss').inc()
+            span.set_attribute('response_cache.hit', False)
+            return None
+        metrics.cache_lookups.labels('response', family, 'hit').inc()
+        span.set_attribute('response_cache.hit', True)
+        meta, body = value.split(b'\n', 1)
+        meta = orjson.loads(meta)
+        return self.response(request, CachedResponse(meta['etag'], body, meta['headers']))
+
+    async def respond(
+        self,
+        request: Request,
+        key: str,
+        content: Any,
+        tags: Iterable[str],
+        headers: dict[str, str] | None = None,
+    ) -> Response:
+        with tracer.start_as_current_span('serialize') as span:
+            body = orjson.dumps(content, default=_default)
+            span.set_attribute('body.size', len(body))
+        cached = CachedResponse(hashlib.blake2b(body, digest_size=16).hexdigest(), body, headers or {})
+        if self.enabled:
+            meta = orjson.dumps({'etag': cached.etag, 'headers': cached.headers})
+            metrics.cache_value_size.labels('response', _family(key)).observe(len(meta) + 1 + len(body))
+            await put_to_cache(self.redis, key, meta + b'\n' + body, self.expire, tags)
+        return self.response(request, cached)
+
+    def response(self, request: Request, cached: CachedResponse) -> Response:
+        headers = {'ETag': f'"{cached.etag}"', 'Cache-Control': self.cache_control, **cached.headers}
+        if _etag_matches(request.headers.get('if-none-match'), cached.etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(content=cached.body, media_type='application/json', headers=headers)
+
+
+@lru_cache
+def get_film_response_cache(redis: Cache = Depends(get_cache)) -> ResponseCache:
+    return ResponseCache(
+        redis,
+        (schemas.Film, schemas.FilmsSearch),
+        settings.RESPONSE_CACHE_ENABLED,
+        settings.FILM_CACHE_EXPIRE_IN_SECONDS,
+        settings.FILM_HTTP_MAX_AGE_IN_SECONDS,
+        settings.FILM_HTTP_STALE_WHILE_REVALIDATE_IN_SECONDS,
+    )
+
+
+@lru_cache
+def get_genre_response_cache(redis: Cache = Depends(get_cache)) -> ResponseCache:
+    return ResponseCache(
+        redis,
+        (schemas.Genre, schemas.GenreStats),
+        settings.RESPONSE_CACHE_ENABLED,
+        settings.GENRE_CACHE_EXPIRE_IN_SECONDS,
+        settings.GENRE_HTTP_MAX_AGE_IN_SECONDS,
+        settings.GENRE_HTTP_STALE_WHILE_REVALIDATE_IN_SECONDS,
+    )
+
+
+@lru_cache
+def get_person_response_cache(redis: Cache = Depends(get_cache)) -> ResponseCache:
+    return ResponseCache(
+        redis,
+        (schemas.Person,),
+        settings.RESPONSE_CACHE_ENABLED,
+        settings.PERSON_CACHE_EXPIRE_IN_SECONDS,
+        settings.PERSON_HTTP_MAX_AGE_IN_SECONDS,
+        settings.PERSON_HTTP_STALE_WHILE_REVALIDATE_IN_SECONDS,
+    )
+
+
+@lru_cache
+def get_suggest_response_cache(redis: Cache = Depends(get_cache)) -> ResponseCache:
+    return ResponseCache(
+        redis,
+        (schemas.Suggestions,),
+        settings.RESPONSE_CACHE_ENABLED,
+        settings.SUGGEST_CACHE_EXPIRE_IN_SECONDS,
+        settings.SUGGEST_HTTP_MAX_AGE_IN_SECONDS,
+        settings.SUGGEST_HTTP_STALE_WHILE_REVALIDATE_IN_SECONDS,
+    )
@@ -0,0 +1,70 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, TypeVar
+from uuid import uuid4
+
+from movies_api.core.config import settings
+from movies_api.core.logger import logger
+from movies_api.db.cache import Cache
+
+T = TypeVar('T')
+
+
+class SingleFlight:
+    """Coalesces concurrent cache misses of the same key into one load
+
+    Within a worker concurrent callers await a single in-flight task. With `distributed` the loading
+    worker also takes a Redis lock, other workers poll the cache until the value appears instead of
+    loading it themselves, and fall back to loading after the lock timeout.
+    """
+
+    def __init__(self, redis: Cache, distributed: bool = False):
+        self.redis = redis
+        self.distributed = distributed
+        self._calls: dict[str, asyncio.Task] = {}
+
+    async def do(self, key: str, load: Callable[[], Awaitable[T]], from_cache: Callable[[], Awaitable[T]]) -> T:
+        task = self._start(key, load, from_cache)
+        # a cancelled caller must not cancel the load awaited by the others
+        return await asyncio.shield(task)
+
+    def refresh(self, key: str, load: Callable[[], Awaitable[T]], from_cache: Callable[[], Awaitable[T]]):
+        """Starts the load in background unless it is already in flight"""
+        self._start(key, load, from_cache)
+
+    def _start(
+        self, key: str, load: Callable[[], Awaitable[T]], from_cache: Callable[[], Awaitable[T]]
+    ) -> asyncio.Task:
+        if (task := self._calls.get(key)) is None:
+            coro = self._load_with_lock(key, load, from_cache) if self.distributed else load()
+            task = self._calls[key] = asyncio.ensure_future(coro)
+            task.add_done_callback(self._done(key))
+        return task
+
+    def _done(self, key: str) -> Callable[[asyncio.Task], None]:
+        def callback(task: asyncio.Task):
+            self._calls.pop(key, None)
+            if not task.cancelled() and (e := task.exception()):
+                logger.warning('load of %s failed: %s', key, e)
+
+        return callback
+
+    async def _load_with_lock(
+        self, key: str, load: Callable[[], Awaitable[T]], from_cache: Callable[[], Awaitable[T]]
+    ) -> T:
+        lock, token = f'lock:{key}', uuid4().hex
+        timeout = settings.SINGLE_FLIGHT_LOCK_TIMEOUT_IN_SECONDS
+        if await self.redis.set(lock, token, nx=True, px=int(timeout * 1000)):
+            try:
+                return await load()
+            finally:
+                await self.redis.release_lock(lock, token)
+
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            await asyncio.sleep(settings.SINGLE_FLIGHT_POLL_INTERVAL_IN_SECONDS)
+            if value := await from_cache():
+                return value
+            if not await self.redis.exists(lock):
+                break
+        return await load()
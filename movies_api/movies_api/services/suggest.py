@@ -0,0 +1,96 @@
+from functools import lru_cache, partial
+from typing import Optional
+
+from elasticsearch import AsyncElasticsearch
+from fastapi import Depends
+from opentelemetry.trace import Span
+
+from movies_api.api.v1.schemas import Suggestions
+from movies_api.core import metrics
+from movies_api.core.config import settings
+from movies_api.core.tracing import tracer
+from movies_api.db.cache import Cache, get_cache
+from movies_api.db.elastic import get_elastic
+from movies_api.services.cache import params_key, schema_version
+from movies_api.services.codec import codec
+from movies_api.services.local_cache import local_caches
+from movies_api.services.single_flight import SingleFlight
+
+
+class SuggestService:
+    # suggestions kind: index and the field suggested
+    sources = {
+        'films': (settings.MOVIES_INDEX, 'title'),
+        'persons': (settings.PERSONS_INDEX, 'full_name'),
+        'genres': (settings.GENRES_INDEX, 'name'),
+    }
+    # cached suggestions are validated as the response, they are read back only while it is unchanged
+    namespace = f'suggest:v{schema_version(Suggestions)}'
+
+    def __init__(self, redis: Cache, elastic: AsyncElasticsearch):
+        self.redis = redis
+        self.elastic = elastic
+        self.local_cache = local_caches['suggest']
+        self.single_flight = SingleFlight(redis, settings.SINGLE_FLIGHT_DISTRIBUTED)
+
+    async def suggest(self, prefix: str, size: int) -> dict[str, list[dict]]:
+        prefix = ' '.join(prefix.lower().split())
+        key = params_key(self.namespace, 'suggest', {'prefix': prefix, 'size': size})
+        with tracer.start_as_current_span('suggest', attributes={'cache.key': key}) as span:
+            if suggestions := self.local_cache.get(key):
+                self._lookup(span, 'l1_hit')
+                return suggestions
+            if suggestions := await self._suggestions_from_cache(key):
+                self._lookup(span, 'hit')
+            else:
+                self._lookup(span, 'miss')
+                suggestions = await self.single_flight.do(
+                    key,
+                    partial(self._load_suggestions, key, prefix, size),
+                    partial(self._suggestions_from_cache, key),
+                )
+
+            return suggestions
+
+    @staticmethod
+    def _lookup(span: Span, result: str):
+        metrics.cache_lookups.labels('suggest', 'suggest', result).inc()
+        span.set_attribute(f'cache.{result}', 1)
+
+    async def _load_suggestions(self, key: str, prefix: str, size: int) -> dict[str, list[dict]]:
+        suggestions = await self._get_suggestions_from_elastic(prefix, size)
+        value = codec.encode(suggestions)
+        metrics.cache_value_size.labels('suggest', 'suggest').observe(len(value))
+        self.local_cache.put(key, suggestions, len(value))
+        await self.redis.set(key, value, ex=settings.SUGGEST_CACHE_EXPIRE_IN_SECONDS)
+        return suggestions
+
+    async def _get_suggestions_from_elastic(self, prefix: str, size: int) -> dict[str, list[dict]]:
+        searches = []
+        for index, field in self.sources.values():
+            completion = {'prefix': prefix, 'completion': {'field': 'suggest', 'size': size}}
+            # only suggestions are needed, no hits are fetched or counted
+            body = {'size': 0, 'track_total_hits': False, '_source': ['id', field], 'suggest': {'suggest': completion}}
+            searches.extend(({'index': index}, body))
+        docs = await self.elastic.msearch(searches=searches)
+
+        suggestions = {}
+        for (kind, (_, field)), response in zip(self.sources.items(), docs['responses']):
+            options = response.get('suggest', {}).get('suggest', [{}])[0].get('options', [])
+            suggestions[kind] = [{'uuid': o['_source']['id'], 'text': o['_source'][field]} for o in options]
+        return suggestions
+
+    async def _suggestions_from_cache(self, key: str) -> Optional[dict[str, list[dict]]]:
+        if not (data := await self.redis.get(key)):
+            return None
+        suggestions = codec.decode(data)
+        self.local_cache.put(key, suggestions, len(data))
+        return suggestions
+
+
+@lru_cache
+def get_suggest_service(
+    redis: Cache = Depends(get_cache),
+    elastic: AsyncElasticsearch = Depends(get_elastic),
+) -> SuggestService:
+    return SuggestService(redis, elastic)
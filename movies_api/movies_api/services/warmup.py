@@ -0,0 +1,202 @@
+import argparse
+import asyncio
+import math
+import os
+import time
+from collections import Counter
+from typing import Iterable, NamedTuple, Optional
+from urllib.parse import urlsplit
+
+import orjson
+from starlette.types import ASGIApp, Message
+
+from movies_api.core.config import settings
+from movies_api.core.logger import logger
+
+# pages of the top rated films, their details are warmed after them in batches of one Elasticsearch request
+TOP_FILMS_URL = '/api/v1/films/?sort=-rating&page_size={page_size}&page_number={page_number}'
+FILMS_BATCH_URL = '/api/v1/films/batch'
+FILMS_BATCH_SIZE = 100
+# default pages of the other endpoints
+FIRST_PAGES = ('/api/v1/films/', '/api/v1/genres/', '/api/v1/genres/stats', '/api/v1/persons/')
+
+
+class WarmupRequest(NamedTuple):
+    method: str
+    url: str
+    body: bytes = b''
+
+
+class HotUrls:
+    """Counts of requested urls, only about `size` most requested are kept"""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.counts = Counter()
+
+    def record(self, url: str):
+        self.counts[url] += 1
+        if len(self.counts) > 2 * self.size:
+            self.counts = Counter(dict(self.counts.most_common(self.size)))
+
+    def dump(self, path: str):
+        """Writes the most requested urls first, one per line, the log is kept when nothing was requested"""
+        if not self.counts:
+            return
+        # workers write their own files and replace the log atomically, the last one to stop wins
+        tmp = f'{path}.{os.getpid()}.tmp'
+        with open(tmp, 'w') as f:
+            f.writelines(f'{url}\n' for url, _ in self.counts.most_common(self.size))
+        os.replace(tmp, path)
+
+
+hot_urls = HotUrls(settings.WARMUP_HOT_URLS)
+
+
+def read_hot_log(path: str) -> list[WarmupRequest]:
+    with open(path) as f:
+        urls = [url for line in f if (url := line.strip()) and not url.startswith('#')]
+    return [WarmupRequest('GET', url) for url in dict.fromkeys(urls)]
+
+
+async def request(app: ASGIApp, warmup_request: WarmupRequest) -> tuple[int, bytes]:
+    """Response of the app in process, as if the request was sent by a client"""
+    method, url, content = warmup_request
+    parts = urlsplit(url)
+    headers = [(b'host', b'warmup'), (b'user-agent', b'warmup')]
+    if content:
+        headers += [(b'content-type', b'application/json'), (b'content-length', f'{len(content)}'.encode())]
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': method,
+        'scheme': 'http',
+        'path': parts.path,
+        'raw_path': parts.path.encode(),
+        'query_string': parts.query.encode(),
+        'root_path': '',
+        'headers': headers,
+        'client': None,
+        'server': None,
+        # warmup requests are not observed in request metrics nor recorded as hot
+        'warmup': True,
+    }
+    status, body = 0, []
+    requested, responded = False, asyncio.Event()
+
+    async def receive() -> Message:
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {'type': 'http.request', 'body': content, 'more_body': False}
+        # the client disconnects only after the whole response is sent
+        await responded.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message: Message):
+        nonlocal status
+        if message['type'] == 'http.response.start':
+            status = message['status']
+        elif message['type'] == 'http.response.body':
+            body.append(message.get('body', b''))
+            if not message.get('more_body'):
+                responded.set()
+
+    await app(scope, receive, send)
+    return status, b''.join(body)
+
+
+async def replay(
+    app: ASGIApp, requests: Iterable[WarmupRequest], concurrency: int, keep: bool = False
+) -> list[Optional[bytes]]:
+    """Responses in the order of `requests`, at most `concurrency` requests are in flight
+
+    Successful responses are their bodies when `keep`, empty otherwise, failed ones are None.
+    """
+    requests = list(requests)
+    responses = [None] * len(requests)
+    pending = iter(enumerate(requests))
+
+    async def worker():
+        for i, warmup_request in pending:
+            try:
+                status, body = await request(app, warmup_request)
+            except Exception as e:
+                logger.warning('warmup of %s failed: %r', warmup_request.url, e)
+                continue
+            if status == 200:
+                responses[i] = body if keep else b''
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return responses
+
+
+async def warm_top(app: ASGIApp, films: int, page_size: int, concurrency: int) -> list[Optional[bytes]]:
+    """First pages of every endpoint, pages of the top rated films and their details"""
+    # page numbers are limited by the API
+    pages = [
+        WarmupRequest('GET', TOP_FILMS_URL.format(page_size=page_size, page_number=page_number))
+        for page_number in range(min(math.ceil(films / page_size), 101))
+    ]
+    # only the pages are kept, for the uuids of their films
+    responses = await replay(app, pages, concurrency, keep=True)
+    uuids = [film['uuid'] for body in responses if body for film in orjson.loads(body)]
+    batches = [
+        WarmupRequest('POST', FILMS_BATCH_URL, orjson.dumps({'uuids': uuids[i : i + FILMS_BATCH_SIZE]}))
+        for i in range(0, len(uuids), FILMS_BATCH_SIZE)
+    ]
+    others = await replay(app, [*(WarmupRequest('GET', url) for url in FIRST_PAGES), *batches], concurrency)
+    return [b'' if body is not None else None for body in responses] + others
+
+
+async def warm(app: ASGIApp, source: str | None = None, path: str | None = None):
+    """Fills the caches with the responses most likely requested after a restart
+
+    Urls of the hot requests log are requested as they are, the top rated films are requested when the log is
+    not recorded yet. Requests go through the app, so every cache tier gets the keys of live requests.
+    """
+    source = source or settings.WARMUP_SOURCE
+    path = settings.WARMUP_HOT_LOG_PATH if path is None else path
+    if source == 'none':
+        return
+    started = time.monotonic()
+    if source == 'log' and path and os.path.exists(path):
+        responses = await replay(app, read_hot_log(path), settings.WARMUP_CONCURRENCY)
+    else:
+        if source == 'log':
+            logger.warning('hot requests log %r is not recorded, warming top rated films', path)
+            source = 'top'
+        responses = await warm_top(
+            app, settings.WARMUP_TOP_FILMS, settings.WARMUP_PAGE_SIZE, settings.WARMUP_CONCURRENCY
+        )
+    failed = sum(body is None for body in responses)
+    logger.info(
+        'warmed %d of %d requests from %s in %.1fs',
+        len(responses) - failed,
+        len(responses),
+        source,
+        time.monotonic() - started,
+    )
+
+
+def main():
+    """python -m movies_api.services.warmup, e.g. before switching traffic to a new deploy"""
+    parser = argparse.ArgumentParser(description='Warms the shared cache tiers up before or after a deploy')
+    parser.add_argument('--source', choices=('top', 'log'), default='log', help='the log falls back to top')
+    parser.add_argument('--log', default=None, help='hot requests log, one url per line')
+    args = parser.parse_args()
+
+    from movies_api.main import app
+
+    async def run():
+        # the app is started without its own warmup, only Redis and response cache entries outlive this process
+        settings.WARMUP_SOURCE = 'none'
+        async with app.router.lifespan_context(app):
+            await warm(app, args.source, args.log)
+
+    asyncio.run(run())
+
+
+if __name__ == '__main__':
+    main()
@@ -10,7 +10,15 @@ curl -sX PUT http://127.0.0.1:9200/genres -H 'Content-Type: application/json' -d
         "type": "keyword"
       },
       "name": {
-        "type": "text"
+        "type": "text",
+        "fields": {
+          "raw": {
+            "type":  "keyword"
+          }
+        }
+      },
+      "suggest": {
+        "type": "completion"
       }
     }
   }
@@ -63,6 +63,9 @@ curl -sX PUT http://127.0.0.1:9200/movies -H 'Content-Type: application/json' -d
           }
         }
       },
+      "suggest": {
+        "type": "completion"
+      },
       "description": {
         "type": "text",
         "analyzer": "ru_en"
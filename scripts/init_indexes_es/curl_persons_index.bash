@@ -10,7 +10,15 @@ curl -sX PUT http://127.0.0.1:9200/persons -H 'Content-Type: application/json' -
         "type": "keyword"
       },
       "full_name": {
-        "type": "text"
+        "type": "text",
+        "fields": {
+          "raw": {
+            "type":  "keyword"
+          }
+        }
+      },
+      "suggest": {
+        "type": "completion"
       },
       "films": {
         "type": "nested",
@@ -20,7 +28,7 @@ curl -sX PUT http://127.0.0.1:9200/persons -H 'Content-Type: application/json' -
             "type": "keyword"
           },
           "roles": {
-            "type": "text"
+            "type": "keyword"
           }
         }
       }
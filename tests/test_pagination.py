@@ -0,0 +1,105 @@
+import base64
+
+import pytest
+
+from movies_api.services.pagination import (
+    MAX_RESULT_WINDOW,
+    InvalidCursor,
+    Page,
+    PageOutOfRange,
+    check_cursor,
+    decode_cursor,
+    encode_cursor,
+    next_cursor_headers,
+    page_clause,
+)
+
+FILM_ID = '3d825f60-9fff-4dfe-b294-1a45fa1e115d'
+
+
+@pytest.mark.parametrize(
+    'sort, values',
+    [
+        ('-rating', [8.5, FILM_ID]),
+        ('rating', [7, FILM_ID]),
+        ('-rating', ['-Infinity', FILM_ID]),
+        ('rating', ['Infinity', FILM_ID]),
+        ('title', ['Star Wars', FILM_ID]),
+        ('-full_name', ['George Lucas', FILM_ID]),
+        ('id', [FILM_ID]),
+    ],
+)
+def test_valid_cursor(sort, values):
+    check_cursor(sort, values)
+
+
+@pytest.mark.parametrize(
+    'sort, values',
+    [
+        # cursors of another sort
+        ('-rating', [FILM_ID]),
+        ('id', [8.5, FILM_ID]),
+        ('title', [8.5, FILM_ID]),
+        # forged values
+        ('-rating', ['8.5', FILM_ID]),
+        ('-rating', [True, FILM_ID]),
+        ('-rating', [None, FILM_ID]),
+        ('-rating', [8.5, 42]),
+        ('title', [['Star Wars'], FILM_ID]),
+        ('-rating', [8.5, FILM_ID, FILM_ID]),
+    ],
+)
+def test_invalid_cursor(sort, values):
+    with pytest.raises(InvalidCursor):
+        check_cursor(sort, values)
+
+
+@pytest.mark.parametrize('values', [[8.5, FILM_ID], ['Infinity', FILM_ID], ['Star Wars: Ёжик', FILM_ID]])
+def test_cursor_round_trip(values):
+    assert decode_cursor(encode_cursor(values)) == values
+
+
+@pytest.mark.parametrize('cursor', [None, ''])
+def test_no_cursor(cursor):
+    assert decode_cursor(cursor) is None
+
+
+@pytest.mark.parametrize(
+    'cursor',
+    [
+        'not a cursor',
+        base64.urlsafe_b64encode(b'{not json').decode(),
+        base64.urlsafe_b64encode(b'{"rating": 8.5}').decode(),
+        base64.urlsafe_b64encode(b'8.5').decode(),
+        base64.urlsafe_b64encode(b'[]').decode(),
+    ],
+)
+def test_undecodable_cursor(cursor):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor)
+
+
+def test_page_clause():
+    assert page_clause(50, 0, None) == {'size': 50, 'from': 0}
+    assert page_clause(50, 3, None) == {'size': 50, 'from': 150}
+
+
+def test_page_clause_of_cursor_ignores_page_number():
+    assert page_clause(50, 1000, [8.5, FILM_ID]) == {'size': 50, 'search_after': [8.5, FILM_ID]}
+
+
+def test_page_clause_within_max_result_window():
+    last = MAX_RESULT_WINDOW // 50 - 1
+    assert page_clause(50, last, None) == {'size': 50, 'from': MAX_RESULT_WINDOW - 50}
+    with pytest.raises(PageOutOfRange):
+        page_clause(50, last + 1, None)
+
+
+def test_next_cursor_of_full_page():
+    headers = next_cursor_headers(Page(['a', 'b'], [8.5, FILM_ID]), 2)
+    assert decode_cursor(headers['X-Next-Cursor']) == [8.5, FILM_ID]
+
+
+@pytest.mark.parametrize('page', [Page(['a'], [8.5, FILM_ID]), Page(), Page(['a', 'b'])])
+def test_no_next_cursor(page):
+    assert next_cursor_headers(page, 2) == {}
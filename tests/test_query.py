@@ -0,0 +1,113 @@
+import pytest
+
+from movies_api.api.v1.enums import FilterMode
+from movies_api.services.film import FilmService
+from movies_api.services.person import PersonService
+from movies_api.services.query import bool_query, compile_filters
+
+
+def match(field: str, term: str) -> dict:
+    return {'match': {field: {'query': term, 'operator': 'and'}}}
+
+
+def nested(path: str, query: dict) -> dict:
+    return {'nested': {'path': path, 'query': query}}
+
+
+def should(*clauses: dict) -> dict:
+    return {'bool': {'should': list(clauses), 'minimum_should_match': 1}}
+
+
+def has_role(role: str) -> dict:
+    return nested('films', {'term': {'films.roles': role}})
+
+
+@pytest.mark.parametrize(
+    'values, mode, expected',
+    [
+        ({'genre': ['Action']}, FilterMode.any, [{'terms': {'genres': ['Action']}}]),
+        ({'genre': ['Action', 'Drama', 'Action']}, FilterMode.any, [{'terms': {'genres': ['Action', 'Drama']}}]),
+        ({'genre': ['Action']}, FilterMode.all, [{'term': {'genres': 'Action'}}]),
+        (
+            {'genre': ['Action', 'Drama']},
+            FilterMode.all,
+            [{'term': {'genres': 'Action'}}, {'term': {'genres': 'Drama'}}],
+        ),
+        ({'actor': ['Mark Hamill']}, FilterMode.any, [nested('actors', match('actors.full_name', 'Mark Hamill'))]),
+        (
+            {'actor': ['Mark Hamill', 'Carrie Fisher']},
+            FilterMode.any,
+            [
+                nested(
+                    'actors',
+                    should(match('actors.full_name', 'Mark Hamill'), match('actors.full_name', 'Carrie Fisher')),
+                )
+            ],
+        ),
+        (
+            {'actor': ['Mark Hamill', 'Carrie Fisher']},
+            FilterMode.all,
+            [
+                nested('actors', match('actors.full_name', 'Mark Hamill')),
+                nested('actors', match('actors.full_name', 'Carrie Fisher')),
+            ],
+        ),
+        (
+            {'genre': ['Sci-Fi'], 'writer': ['George Lucas'], 'director': ['George Lucas']},
+            FilterMode.any,
+            [
+                {'terms': {'genres': ['Sci-Fi']}},
+                nested('writers', match('writers.full_name', 'George Lucas')),
+                nested('directors', match('directors.full_name', 'George Lucas')),
+            ],
+        ),
+    ],
+)
+def test_film_filters(values, mode, expected):
+    assert compile_filters(FilmService.filter_fields, values, mode) == expected
+
+
+@pytest.mark.parametrize(
+    'values, mode, expected',
+    [
+        ({'actor': ['Hamill']}, FilterMode.any, [has_role('actor'), match('full_name', 'Hamill')]),
+        (
+            {'actor': ['Hamill', 'Fisher']},
+            FilterMode.any,
+            [has_role('actor'), should(match('full_name', 'Hamill'), match('full_name', 'Fisher'))],
+        ),
+        (
+            {'actor': ['Hamill', 'Fisher']},
+            FilterMode.all,
+            [has_role('actor'), match('full_name', 'Hamill'), match('full_name', 'Fisher')],
+        ),
+        (
+            {'writer': ['Lucas'], 'director': ['Lucas']},
+            FilterMode.all,
+            [has_role('writer'), match('full_name', 'Lucas'), has_role('director'), match('full_name', 'Lucas')],
+        ),
+    ],
+)
+def test_person_filters(values, mode, expected):
+    assert compile_filters(PersonService.filter_fields, values, mode) == expected
+
+
+@pytest.mark.parametrize('mode', list(FilterMode))
+@pytest.mark.parametrize(
+    'fields, values',
+    [
+        (FilmService.filter_fields, {}),
+        (FilmService.filter_fields, {'genre': [], 'actor': [], 'writer': [], 'director': []}),
+        (PersonService.filter_fields, {'actor': (), 'writer': None}),
+    ],
+)
+def test_empty_filters(fields, values, mode):
+    assert compile_filters(fields, values, mode) == []
+    assert bool_query(filters=compile_filters(fields, values, mode)) == {'match_all': {}}
+
+
+def test_filters_are_not_scored():
+    filters = compile_filters(FilmService.filter_fields, {'genre': ['Drama']})
+    assert bool_query([{'match': {'title': 'star'}}], filters) == {
+        'bool': {'must': [{'match': {'title': 'star'}}], 'filter': [{'terms': {'genres': ['Drama']}}]}
+    }
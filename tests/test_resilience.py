@@ -0,0 +1,144 @@
+import asyncio
+
+import pytest
+from redis.exceptions import ConnectionError
+
+from movies_api.db.cache import InMemoryCache
+from movies_api.services import resilience
+from movies_api.services.resilience import CircuitBreaker, FailSafeCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(resilience.time, 'monotonic', clock)
+    return clock
+
+
+def test_breaker_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker('test', failure_threshold=3, recovery_timeout=5)
+    breaker.failure()
+    breaker.failure()
+    assert breaker.closed and breaker.allow()
+    breaker.failure()
+    assert not breaker.closed
+    assert not breaker.allow()
+
+
+def test_breaker_counts_only_consecutive_failures(clock):
+    breaker = CircuitBreaker('test', failure_threshold=2, recovery_timeout=5)
+    breaker.failure()
+    breaker.success()
+    breaker.failure()
+    assert breaker.closed
+
+
+def test_breaker_lets_one_probe_through_per_recovery_timeout(clock):
+    breaker = CircuitBreaker('test', failure_threshold=1, recovery_timeout=5)
+    breaker.failure()
+    clock.now += 4.9
+    assert not breaker.allow()
+    clock.now += 0.1
+    assert breaker.allow()
+    # the probe is in flight, other calls wait for the next recovery timeout
+    assert not breaker.allow()
+    clock.now += 5
+    assert breaker.allow()
+
+
+def test_breaker_is_closed_by_a_successful_probe(clock):
+    breaker = CircuitBreaker('test', failure_threshold=1, recovery_timeout=5)
+    breaker.failure()
+    clock.now += 5
+    assert breaker.allow()
+    breaker.success()
+    assert breaker.closed
+    assert breaker.allow()
+
+
+def test_breaker_stays_open_after_a_failed_probe(clock):
+    breaker = CircuitBreaker('test', failure_threshold=1, recovery_timeout=5)
+    breaker.failure()
+    clock.now += 5
+    assert breaker.allow()
+    breaker.failure()
+    assert not breaker.closed
+    assert not breaker.allow()
+
+
+class SlowCache(InMemoryCache):
+    async def get(self, key: str) -> bytes | None:
+        await asyncio.sleep(1)
+        return await super().get(key)
+
+
+class BrokenCache(InMemoryCache):
+    calls = 0
+
+    async def _fail(self, *args, **kwargs):
+        self.calls += 1
+        raise ConnectionError('connection refused')
+
+    get = mget = set = exists = delete = pop_tags = release_lock = _fail
+
+
+def breaker() -> CircuitBreaker:
+    return CircuitBreaker('test', failure_threshold=100, recovery_timeout=5)
+
+
+def test_fail_safe_cache_passes_results_through():
+    async def run():
+        cache = FailSafeCache(InMemoryCache(), breaker())
+        assert await cache.set('key', b'value')
+        assert await cache.get('key') == b'value'
+        assert await cache.mget(['key', 'missing']) == [b'value', None]
+        assert await cache.exists('key')
+        assert await cache.delete('key') == 1
+
+    asyncio.run(run())
+
+
+def test_fail_safe_cache_misses_on_timeout():
+    async def run():
+        cache = FailSafeCache(SlowCache(), breaker(), timeout=0.01)
+        assert await cache.get('key') is None
+        assert cache.breaker.failures == 1
+
+    asyncio.run(run())
+
+
+def test_fail_safe_cache_returns_empty_cache_answers_on_errors():
+    async def run():
+        cache = FailSafeCache(BrokenCache(), breaker())
+        assert await cache.get('key') is None
+        assert await cache.mget(['a', 'b']) == [None, None]
+        assert await cache.set('key', b'value') is False
+        assert await cache.exists('key') is False
+        assert await cache.delete('key') == 0
+        assert list(await cache.pop_tags(['tag'])) == []
+        assert await cache.release_lock('lock', 'token') is False
+        assert cache.breaker.failures == 7
+
+    asyncio.run(run())
+
+
+def test_fail_safe_cache_skips_the_cache_while_the_circuit_is_open():
+    async def run():
+        broken = BrokenCache()
+        cache = FailSafeCache(broken, CircuitBreaker('test', failure_threshold=2, recovery_timeout=60))
+        assert await cache.get('key') is None
+        assert await cache.get('key') is None
+        assert not cache.breaker.closed
+        assert await cache.get('key') is None
+        assert await cache.mget(['a']) == [None]
+        assert broken.calls == 2
+
+    asyncio.run(run())
@@ -0,0 +1,163 @@
+import asyncio
+
+import pytest
+
+from movies_api.core.config import settings
+from movies_api.db.cache import InMemoryCache
+from movies_api.services.single_flight import SingleFlight
+
+
+class Loader:
+    """Load counting its calls, it returns `value` once released"""
+
+    def __init__(self, value: str = 'value', error: Exception | None = None):
+        self.value = value
+        self.error = error
+        self.calls = 0
+        self.released = asyncio.Event()
+
+    async def __call__(self) -> str:
+        self.calls += 1
+        await self.released.wait()
+        if self.error:
+            raise self.error
+        return self.value
+
+
+async def nothing_cached():
+    return None
+
+
+def test_concurrent_misses_are_coalesced():
+    async def run():
+        flight, load = SingleFlight(InMemoryCache()), Loader()
+        callers = [asyncio.create_task(flight.do('key', load, nothing_cached)) for _ in range(5)]
+        await asyncio.sleep(0)
+        load.released.set()
+        assert await asyncio.gather(*callers) == ['value'] * 5
+        assert load.calls == 1
+
+    asyncio.run(run())
+
+
+def test_keys_are_loaded_separately():
+    async def run():
+        flight, first, second = SingleFlight(InMemoryCache()), Loader('first'), Loader('second')
+        callers = [flight.do('first', first, nothing_cached), flight.do('second', second, nothing_cached)]
+        first.released.set()
+        second.released.set()
+        assert await asyncio.gather(*callers) == ['first', 'second']
+        assert (first.calls, second.calls) == (1, 1)
+
+    asyncio.run(run())
+
+
+def test_key_is_loaded_again_after_the_load():
+    async def run():
+        flight, load = SingleFlight(InMemoryCache()), Loader()
+        load.released.set()
+        assert await flight.do('key', load, nothing_cached) == 'value'
+        assert await flight.do('key', load, nothing_cached) == 'value'
+        assert load.calls == 2
+
+    asyncio.run(run())
+
+
+def test_cancelled_caller_does_not_cancel_the_load():
+    async def run():
+        flight, load = SingleFlight(InMemoryCache()), Loader()
+        cancelled = asyncio.create_task(flight.do('key', load, nothing_cached))
+        waiting = asyncio.create_task(flight.do('key', load, nothing_cached))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        await asyncio.sleep(0)
+        load.released.set()
+        assert await waiting == 'value'
+        assert cancelled.cancelled()
+        assert load.calls == 1
+
+    asyncio.run(run())
+
+
+def test_failed_load_is_raised_to_every_caller():
+    async def run():
+        flight, load = SingleFlight(InMemoryCache()), Loader(error=RuntimeError('down'))
+        callers = [asyncio.create_task(flight.do('key', load, nothing_cached)) for _ in range(2)]
+        await asyncio.sleep(0)
+        load.released.set()
+        results = await asyncio.gather(*callers, return_exceptions=True)
+        assert [type(result) for result in results] == [RuntimeError, RuntimeError]
+        assert load.calls == 1
+
+        # the failure is not remembered
+        load.error = None
+        assert await flight.do('key', load, nothing_cached) == 'value'
+
+    asyncio.run(run())
+
+
+def test_refresh_joins_the_load_in_flight():
+    async def run():
+        flight, load = SingleFlight(InMemoryCache()), Loader()
+        flight.refresh('key', load, nothing_cached)
+        caller = asyncio.create_task(flight.do('key', load, nothing_cached))
+        await asyncio.sleep(0)
+        load.released.set()
+        assert await caller == 'value'
+        assert load.calls == 1
+
+    asyncio.run(run())
+
+
+@pytest.fixture
+def fast_poll(monkeypatch):
+    monkeypatch.setattr(settings, 'SINGLE_FLIGHT_POLL_INTERVAL_IN_SECONDS', 0.001)
+    monkeypatch.setattr(settings, 'SINGLE_FLIGHT_LOCK_TIMEOUT_IN_SECONDS', 1)
+
+
+def test_other_workers_wait_for_the_cached_value(fast_poll):
+    async def run():
+        cache = InMemoryCache()
+        # workers share the cache only
+        loading, waiting = SingleFlight(cache, distributed=True), SingleFlight(cache, distributed=True)
+        first, second = Loader('loaded'), Loader('not loaded')
+        second.released.set()
+
+        async def load_and_cache() -> str:
+            value = await first()
+            await cache.set('key', value.encode())
+            return value
+
+        async def from_cache() -> str | None:
+            return value.decode() if (value := await cache.get('key')) else None
+
+        loader = asyncio.create_task(loading.do('key', load_and_cache, from_cache))
+        await asyncio.sleep(0.01)
+        poller = asyncio.create_task(waiting.do('key', second, from_cache))
+        await asyncio.sleep(0.01)
+        first.released.set()
+        assert await asyncio.gather(loader, poller) == ['loaded', 'loaded']
+        assert (first.calls, second.calls) == (1, 0)
+        # the lock is released after the load
+        assert not await cache.exists('lock:key')
+
+    asyncio.run(run())
+
+
+def test_other_workers_load_when_the_lock_is_released_without_a_value(fast_poll):
+    async def run():
+        cache = InMemoryCache()
+        loading, waiting = SingleFlight(cache, distributed=True), SingleFlight(cache, distributed=True)
+        failing, second = Loader(error=RuntimeError('down')), Loader('loaded')
+        second.released.set()
+
+        loader = asyncio.create_task(loading.do('key', failing, nothing_cached))
+        await asyncio.sleep(0.01)
+        poller = asyncio.create_task(waiting.do('key', second, nothing_cached))
+        await asyncio.sleep(0.01)
+        failing.released.set()
+        with pytest.raises(RuntimeError):
+            await loader
+        assert await poller == 'loaded'
+
+    asyncio.run(run())